@@ -0,0 +1,60 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+
+class AccessGate:
+    """Разделяемый и исключительный доступ к экспертной системе в цикле событий.
+
+    Обработчики, только читающие базу знаний, выполняются одновременно
+    (shared); изменение базы знаний, выполняемое в пуле потоков
+    (загрузка, перезагрузка из общего состояния), ждет завершения
+    читающих обработчиков и выполняется одно (exclusive). Ожидающее
+    изменение не пропускает вперед новые читающие обработчики.
+
+    Attributes:
+        readers (int): Количество выполняющихся читающих обработчиков
+        writing (bool): Выполняется ли изменение
+    """
+
+    def __init__(self):
+        """Конструктор."""
+
+        self.readers = 0
+        self.writing = False
+        self._waiting_writers = 0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def shared(self):
+        """Разделяемый доступ для чтения."""
+
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self.writing and not self._waiting_writers)
+            self.readers += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.readers -= 1
+                self._condition.notify_all()
+
+    @asynccontextmanager
+    async def exclusive(self):
+        """Исключительный доступ для изменения."""
+
+        async with self._condition:
+            self._waiting_writers += 1
+            try:
+                await self._condition.wait_for(lambda: not self.writing and not self.readers)
+            except BaseException:
+                self._waiting_writers -= 1
+                self._condition.notify_all()
+                raise
+            self._waiting_writers -= 1
+            self.writing = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self.writing = False
+                self._condition.notify_all()
@@ -0,0 +1,577 @@
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.fact_trie import FactTrie, rule_wildcards, wildcard_prefix
+from app.model import Condition, Rule
+
+
+class KnowledgeBaseAnalyzer:
+    """Статический анализатор базы знаний.
+
+    Находит правила, которые не влияют на результат infer при текущих фактах:
+    мертвые (условия никогда не становятся ненулевыми), дубликаты (те же
+    условия и вывод с не большим CF) и поглощенные (для правил только с И:
+    есть правило с тем же выводом, подмножеством условий и не меньшим CF).
+    Также находит циклы в графе зависимостей фактов. Для правил с НЕТ над
+    выводимыми фактами результат infer зависит от порядка срабатываний,
+    и сокращенный набор правил может дать иной промежуточный порядок.
+    Шаблонное условие 'префикс*' зависит от всех фактов с префиксом.
+
+    Attributes:
+        facts (Dict[str, float]): Факты базы знаний
+        rules (List[Rule]): Правила базы знаний
+    """
+
+    def __init__(self, facts: Dict[str, float], rules: List[Rule]):
+        """
+        Конструктор анализатора.
+
+        Args:
+            facts (Dict[str, float]): Факты базы знаний
+            rules (List[Rule]): Правила базы знаний
+        """
+
+        self.facts = facts
+        self.rules = rules
+
+    def analyze(self) -> Dict:
+        """
+        Выполнить анализ базы знаний.
+
+        Returns:
+            Dict: Отчет вида
+                {
+                    'total': int,
+                    'dead': List[Dict],
+                    'duplicate': List[Dict],
+                    'subsumed': List[Dict],
+                    'cycles': List[Dict],
+                    'prunable': List[int],
+                    'optimized': int
+                }
+        """
+
+        dead = self._find_dead()
+        dead_indices = {item["rule"] for item in dead}
+        duplicate = self._find_duplicates(dead_indices)
+        pruned = dead_indices | {item["rule"] for item in duplicate}
+        subsumed = self._find_subsumed(pruned)
+        pruned |= {item["rule"] for item in subsumed}
+
+        return {
+            "total": len(self.rules),
+            "dead": dead,
+            "duplicate": duplicate,
+            "subsumed": subsumed,
+            "cycles": self._find_cycles(),
+            "prunable": sorted(pruned),
+            "optimized": len(self.rules) - len(pruned)
+        }
+
+    def optimized_rule_indices(self, report: Optional[Dict] = None) -> List[int]:
+        """
+        Получить индексы правил, достаточных для эквивалентного вывода.
+
+        Args:
+            report (Optional[Dict]): Готовый отчет analyze (если уже вычислен)
+
+        Returns:
+            List[int]: Индексы правил в исходном порядке без мертвых,
+                дублирующихся и поглощенных правил
+        """
+
+        report = report or self.analyze()
+        pruned = set(report["prunable"])
+        return [index for index in range(len(self.rules)) if index not in pruned]
+
+    def redundant_rule_indices(self) -> Set[int]:
+        """
+        Найти правила, лишние при любых фактах.
+
+        Returns:
+            Set[int]: Индексы дублирующихся и поглощенных правил
+                (мертвые правила зависят от фактов и не включаются)
+        """
+
+        redundant = {item["rule"] for item in self._find_duplicates(set())}
+        return redundant | {item["rule"] for item in self._find_subsumed(redundant)}
+
+    def _find_dead(self) -> List[Dict]:
+        """
+        Найти правила, условия которых никогда не становятся ненулевыми.
+
+        Returns:
+            List[Dict]: Мертвые правила с индексом и выводом
+        """
+
+        possible = {fact for fact, cf in self.facts.items() if cf > 0}
+        saturated = {fact for fact, cf in self.facts.items() if cf >= 1.0}
+        users: Dict[str, List[int]] = {}
+        live: Set[int] = set()
+        wildcards = FactTrie()
+
+        for index, rule in enumerate(self.rules):
+            try:
+                for fact, _ in rule_literals(rule):
+                    users.setdefault(fact, []).append(index)
+                    prefix = wildcard_prefix(fact)
+                    if prefix is not None:
+                        wildcards.add(prefix)
+            except TypeError:
+                live.add(index)
+
+        possible_names = FactTrie(possible) if wildcards else None
+
+        pending = list(range(len(self.rules)))
+        while pending:
+            index = pending.pop()
+            if index in live:
+                continue
+
+            rule = self.rules[index]
+            try:
+                if not self._can_fire(rule.conditions, possible, saturated, possible_names):
+                    continue
+            except TypeError:
+                pass
+
+            live.add(index)
+            conclusion = rule.conclusion
+            if rule.cf > 0 and conclusion not in possible:
+                possible.add(conclusion)
+                pending.extend(users.get(conclusion, []))
+                if possible_names is not None:
+                    possible_names.add(conclusion)
+                    for prefix in wildcards.prefixes_of(conclusion):
+                        pending.extend(users[prefix + "*"])
+
+        return [
+            {"rule": index, "conclusion": rule.conclusion}
+            for index, rule in enumerate(self.rules)
+            if index not in live
+        ]
+
+    def _can_fire(self, conditions: Tuple[Condition, ...], possible: Set[str], saturated: Set[str],
+                  possible_names: Optional[FactTrie] = None) -> bool:
+        """
+        Проверить, может ли CF условий стать больше нуля.
+
+        Повторяет логику ExpertSystem._evaluate_conditions над булевыми
+        значениями "CF может быть больше нуля". Шаблон без НЕТ может
+        выполниться, если возможен хотя бы один подходящий факт, шаблон
+        с НЕТ считается выполнимым всегда.
+
+        Args:
+            conditions (Tuple[Condition, ...]): Условия правила
+            possible (Set[str]): Факты, CF которых может быть больше нуля
+            saturated (Set[str]): Факты с CF = 1 (их отрицание всегда равно нулю)
+            possible_names (Optional[FactTrie]): Те же факты possible в префиксном дереве
+                (для шаблонных условий)
+
+        Returns:
+            bool: True, если условия могут выполниться
+        """
+
+        if not conditions:
+            return False
+
+        def literal(member, negated: bool) -> bool:
+            prefix = wildcard_prefix(member)
+            if prefix is not None:
+                return negated or possible_names is None or possible_names.has_prefix(prefix)
+            return member not in saturated if negated else member in possible
+
+        values = []
+        for condition in conditions:
+            fact = condition.fact
+            negated = condition.operator.upper() == "NOT"
+            members = fact if condition.is_group and isinstance(fact, tuple) else (fact,)
+            if not members:
+                values.append(False)
+            else:
+                values.append(all(literal(member, negated) for member in members))
+
+        result = values[0]
+        current_operator = conditions[0].operator.upper() or "AND"
+        for i in range(1, len(values)):
+            if current_operator == "OR":
+                result = result or values[i]
+            else:
+                result = result and values[i]
+            current_operator = conditions[i].operator.upper() or "AND"
+
+        return result
+
+    def _find_duplicates(self, excluded: Set[int]) -> List[Dict]:
+        """
+        Найти правила с одинаковыми условиями и выводом.
+
+        Из группы одинаковых правил остается правило с наибольшим CF
+        (при равенстве - первое), остальные считаются дубликатами.
+
+        Args:
+            excluded (Set[int]): Индексы правил, уже исключенных из вывода
+
+        Returns:
+            List[Dict]: Дубликаты с индексом правила, которое их заменяет
+        """
+
+        groups: Dict[Tuple[Tuple[Condition, ...], str], List[int]] = {}
+        for index, rule in enumerate(self.rules):
+            if index in excluded:
+                continue
+            try:
+                groups.setdefault((rule.conditions, rule.conclusion), []).append(index)
+            except TypeError:
+                continue
+
+        duplicates = []
+        for indices in groups.values():
+            if len(indices) < 2:
+                continue
+            keeper = max(indices, key=lambda i: (self.rules[i].cf, -i))
+            for index in indices:
+                if index != keeper:
+                    duplicates.append({
+                        "rule": index,
+                        "conclusion": self.rules[index].conclusion,
+                        "duplicate_of": keeper
+                    })
+
+        return sorted(duplicates, key=lambda item: item["rule"])
+
+    def _find_subsumed(self, excluded: Set[int]) -> List[Dict]:
+        """
+        Найти правила, поглощенные более сильными правилами с тем же выводом.
+
+        Рассматриваются только правила без шаблонов, условия которых соединены
+        через И: CF их условий равен минимуму по всем фактам, поэтому правило
+        с надмножеством условий и не большим CF никогда не дает большего вывода.
+
+        Args:
+            excluded (Set[int]): Индексы правил, уже исключенных из вывода
+
+        Returns:
+            List[Dict]: Поглощенные правила с индексом поглощающего правила
+        """
+
+        candidates: Dict[str, List[Tuple[int, frozenset]]] = {}
+        for index, rule in enumerate(self.rules):
+            if index in excluded or not is_conjunctive(rule) or rule_wildcards(rule):
+                continue
+            try:
+                literals = frozenset(rule_literals(rule))
+                candidates.setdefault(rule.conclusion, []).append((index, literals))
+            except TypeError:
+                continue
+
+        subsumed = []
+        for group in candidates.values():
+            group.sort(key=lambda item: (len(item[1]), -self.rules[item[0]].cf, item[0]))
+            kept: List[Tuple[int, frozenset]] = []
+
+            for index, literals in group:
+                cf = self.rules[index].cf
+                subsumer = next(
+                    (other for other, other_literals in kept
+                     if other_literals and other_literals <= literals and self.rules[other].cf >= cf),
+                    None
+                )
+                if subsumer is None:
+                    kept.append((index, literals))
+                else:
+                    subsumed.append({
+                        "rule": index,
+                        "conclusion": self.rules[index].conclusion,
+                        "subsumed_by": subsumer
+                    })
+
+        return sorted(subsumed, key=lambda item: item["rule"])
+
+    def _find_cycles(self) -> List[Dict]:
+        """
+        Найти циклы в графе зависимостей фактов (алгоритм Тарьяна).
+
+        Returns:
+            List[Dict]: Компоненты сильной связности с фактами и правилами цикла
+        """
+
+        graph: Dict[str, Set[str]] = {}
+        wildcards = FactTrie()
+        for rule in self.rules:
+            try:
+                for fact, _ in rule_literals(rule):
+                    graph.setdefault(fact, set()).add(rule.conclusion)
+                graph.setdefault(rule.conclusion, set())
+            except TypeError:
+                continue
+            for prefix in rule_wildcards(rule):
+                wildcards.add(prefix)
+
+        if wildcards:
+            for rule in self.rules:
+                for prefix in wildcards.prefixes_of(rule.conclusion):
+                    graph.setdefault(rule.conclusion, set()).add(prefix + "*")
+
+        components = strongly_connected_components(graph)
+
+        cycles = []
+        for component in components:
+            single = next(iter(component))
+            if len(component) == 1 and single not in graph[single]:
+                continue
+            rules = [
+                index for index, rule in enumerate(self.rules)
+                if rule.conclusion in component and any(fact in component for fact, _ in _safe_literals(rule))
+            ]
+            cycles.append({"facts": sorted(component), "rules": rules})
+
+        return cycles
+
+
+def rule_literals(rule: Rule) -> List[Tuple[str, bool]]:
+    """
+    Получить все факты условий правила с признаком отрицания.
+
+    Args:
+        rule (Rule): Правило
+
+    Returns:
+        List[Tuple[str, bool]]: Пары (факт, отрицание) в порядке условий;
+            для групп перечисляются все факты группы
+
+    Raises:
+        TypeError: Если условия содержат нехешируемые значения фактов
+    """
+
+    literals = []
+    for condition in rule.conditions:
+        fact = condition.fact
+        negated = condition.operator.upper() == "NOT"
+        if condition.is_group and isinstance(fact, tuple):
+            for member in fact:
+                hash(member)
+                literals.append((member, negated))
+        else:
+            hash(fact)
+            literals.append((fact, negated))
+    return literals
+
+
+def _safe_literals(rule: Rule) -> List[Tuple[str, bool]]:
+    """
+    Получить факты условий правила, игнорируя некорректные условия.
+
+    Args:
+        rule (Rule): Правило
+
+    Returns:
+        List[Tuple[str, bool]]: Пары (факт, отрицание) или пустой список
+    """
+
+    try:
+        return rule_literals(rule)
+    except TypeError:
+        return []
+
+
+def fact_dependents(rules: List[Rule]) -> Dict[str, List[int]]:
+    """
+    Построить индекс зависимостей: факт -> правила, условия которых его читают.
+
+    Args:
+        rules (List[Rule]): Правила
+
+    Returns:
+        Dict[str, List[int]]: Индексы правил по возрастанию для каждого факта условий
+    """
+
+    dependents: Dict[str, List[int]] = {}
+    for index, rule in enumerate(rules):
+        for fact in dict.fromkeys(fact for fact, _ in _safe_literals(rule)):
+            dependents.setdefault(fact, []).append(index)
+    return dependents
+
+
+def goal_rules(rules: List[Rule], targets: List[str]) -> List[int]:
+    """
+    Найти правила, от которых зависят целевые выводы (обратный конус целей).
+
+    Правило входит в конус, если его вывод - цель или факт, читаемый
+    условиями правила из конуса (шаблон условия читает все подходящие
+    выводы). Правила вне конуса не меняют факты, от которых зависят цели,
+    поэтому вывод только по конусу дает для целей тот же CF, что и полный.
+
+    Args:
+        rules (List[Rule]): Правила
+        targets (List[str]): Целевые выводы
+
+    Returns:
+        List[int]: Индексы правил конуса по возрастанию
+    """
+
+    writers: Dict = {}
+    for index, rule in enumerate(rules):
+        try:
+            writers.setdefault(rule.conclusion, []).append(index)
+        except TypeError:
+            continue
+    conclusions = FactTrie(writers) if any(rule_wildcards(rule) for rule in rules) else None
+
+    cone: Set[int] = set()
+    seen = set()
+    pending = list(targets)
+    while pending:
+        fact = pending.pop()
+        if fact in seen:
+            continue
+        seen.add(fact)
+
+        prefix = wildcard_prefix(fact)
+        names = conclusions.matches(prefix) if prefix is not None and conclusions is not None else [fact]
+        for name in names:
+            for index in writers.get(name, ()):
+                if index not in cone:
+                    cone.add(index)
+                    pending.extend(literal for literal, _ in _safe_literals(rules[index]))
+    return sorted(cone)
+
+
+def rule_components(rules: List[Rule]) -> List[List[int]]:
+    """
+    Разбить правила на слабо связные компоненты графа зависимостей фактов.
+
+    Правила одной компоненты связаны общими фактами условий или выводов
+    (шаблон условия связан со всеми подходящими выводами); правила разных
+    компонент не имеют общих фактов, поэтому вывод по ним можно выполнять
+    независимо.
+
+    Args:
+        rules (List[Rule]): Правила
+
+    Returns:
+        List[List[int]]: Индексы правил каждой компоненты по возрастанию
+            (компоненты упорядочены по первому правилу)
+    """
+
+    parent: Dict = {}
+
+    def find(fact):
+        root = fact
+        while parent[root] != root:
+            root = parent[root]
+        while parent[fact] != root:
+            parent[fact], fact = root, parent[fact]
+        return root
+
+    anchors: List = []
+    for rule in rules:
+        try:
+            facts = [rule.conclusion] + [fact for fact, _ in _safe_literals(rule)]
+            for fact in facts:
+                parent.setdefault(fact, fact)
+        except TypeError:
+            anchors.append(None)
+            continue
+
+        root = find(facts[0])
+        for fact in facts[1:]:
+            other = find(fact)
+            if other != root:
+                parent[other] = root
+        anchors.append(facts[0])
+
+    wildcards = FactTrie(prefix for rule in rules for prefix in rule_wildcards(rule))
+    if wildcards:
+        for rule in rules:
+            for prefix in wildcards.prefixes_of(rule.conclusion):
+                if rule.conclusion in parent:
+                    root, other = find(rule.conclusion), find(prefix + "*")
+                    if other != root:
+                        parent[other] = root
+
+    components: Dict = {}
+    for index, anchor in enumerate(anchors):
+        key = object() if anchor is None else find(anchor)
+        components.setdefault(key, []).append(index)
+    return list(components.values())
+
+
+def is_conjunctive(rule: Rule) -> bool:
+    """
+    Проверить, что все условия правила соединены через И.
+
+    Args:
+        rule (Rule): Правило
+
+    Returns:
+        bool: True, если CF условий равен минимуму по всем фактам условий
+    """
+
+    conditions = rule.conditions
+    if not conditions:
+        return False
+    return all(condition.operator.upper() != "OR" for condition in conditions[:-1])
+
+
+def strongly_connected_components(graph: Dict[str, Set[str]]) -> List[Set[str]]:
+    """
+    Найти компоненты сильной связности графа (итеративный алгоритм Тарьяна).
+
+    Args:
+        graph (Dict[str, Set[str]]): Граф в виде списков смежности
+
+    Returns:
+        List[Set[str]]: Компоненты сильной связности
+    """
+
+    index_of: Dict[str, int] = {}
+    lowlink: Dict[str, int] = {}
+    on_stack: Set[str] = set()
+    stack: List[str] = []
+    components: List[Set[str]] = []
+    counter = 0
+
+    for root in graph:
+        if root in index_of:
+            continue
+
+        work = [(root, iter(graph.get(root, ())))]
+        index_of[root] = lowlink[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+
+        while work:
+            node, neighbours = work[-1]
+            advanced = False
+            for neighbour in neighbours:
+                if neighbour not in index_of:
+                    index_of[neighbour] = lowlink[neighbour] = counter
+                    counter += 1
+                    stack.append(neighbour)
+                    on_stack.add(neighbour)
+                    work.append((neighbour, iter(graph.get(neighbour, ()))))
+                    advanced = True
+                    break
+                if neighbour in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[neighbour])
+
+            if advanced:
+                continue
+
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+
+            if lowlink[node] == index_of[node]:
+                component = set()
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.add(member)
+                    if member == node:
+                        break
+                components.append(component)
+
+    return components
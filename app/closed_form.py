@@ -0,0 +1,289 @@
+import math
+from typing import Callable, Dict, List, Mapping, Optional, Set
+
+from app.analyzer import KnowledgeBaseAnalyzer, rule_literals, strongly_connected_components
+from app.fact_trie import rule_wildcards
+from app.model import Rule
+from app.network import AND, CONST, FACT, GROUP, NOT, OR, ConditionNetwork
+
+
+class ClosedFormEvaluator:
+    """Вычисление выводов ациклической базы знаний в замкнутой форме.
+
+    Граф правил разворачивается в сгенерированный код на Python: для каждого
+    вывода - максимум CF по его правилам с тем же условием срабатывания
+    (CF условий больше нуля), что и в ExpertSystem.infer. Общие подвыражения
+    условий берутся из сети ConditionNetwork и вычисляются один раз, правила
+    с константно нулевыми условиями, дубликаты и поглощенные правила
+    в код не попадают. Результат совпадает с неподвижной точкой infer
+    (при epsilon = 0) без итераций по проходам.
+
+    В замкнутой форме вычисляются только выводы, от которых не достижимы
+    циклы, НЕТ над выводимыми фактами (результат infer для них зависит
+    от порядка срабатываний), шаблонные условия и некорректные правила;
+    остальные выводы перечислены в uncovered и вычисляются обычным infer.
+
+    Attributes:
+        covered (List[str]): Выводы, вычисляемые в замкнутой форме
+            (в топологическом порядке)
+        uncovered (Set[str]): Выводы, требующие обычного infer
+    """
+
+    def __init__(self, rules: List[Rule], network: Optional[ConditionNetwork] = None):
+        """
+        Конструктор: анализирует граф правил.
+
+        Код вычислителей генерируется и компилируется при первом обращении.
+
+        Args:
+            rules (List[Rule]): Правила экспертной системы
+            network (Optional[ConditionNetwork]): Готовая сеть условий этих правил
+        """
+
+        self._rules = rules
+        self._network = network if network is not None else ConditionNetwork(rules)
+        self._rules_of: Dict[str, List[int]] = {}
+        self.uncovered: Set[str] = set()
+
+        redundant = KnowledgeBaseAnalyzer({}, rules).redundant_rule_indices()
+        literals: Dict[int, list] = {}
+        unsupported: Set = set()
+        constant: Dict = {}
+
+        for index, rule in enumerate(rules):
+            root = self._network.rule_nodes[index]
+            conclusion = rule.conclusion
+            try:
+                hash(conclusion)
+            except TypeError:
+                continue
+            if root is None:
+                unsupported.add(conclusion)
+                self._rules_of.setdefault(conclusion, []).append(index)
+                literals[index] = []
+                continue
+            if self._network.kinds[root] == CONST or index in redundant:
+                constant.setdefault(conclusion, None)
+                continue
+            cf = rule.cf
+            rule_facts = rule_literals(rule)
+            if (not isinstance(conclusion, str) or isinstance(cf, bool) or not isinstance(cf, (int, float))
+                    or not math.isfinite(cf) or not all(isinstance(fact, str) for fact, _ in rule_facts)
+                    or rule_wildcards(rule)):
+                unsupported.add(conclusion)
+            self._rules_of.setdefault(conclusion, []).append(index)
+            literals[index] = rule_facts
+
+        graph: Dict[str, Set[str]] = {}
+        for conclusion, indices in self._rules_of.items():
+            graph.setdefault(conclusion, set())
+            for index in indices:
+                for fact, negated in literals[index]:
+                    graph.setdefault(fact, set()).add(conclusion)
+                    if negated and fact in self._rules_of:
+                        unsupported.add(conclusion)
+
+        components = strongly_connected_components(graph)
+        for component in components:
+            single = next(iter(component))
+            if len(component) > 1 or single in graph[single]:
+                unsupported |= component
+
+        pending = [fact for fact in unsupported if fact in self._rules_of]
+        self.uncovered = set(unsupported)
+        while pending:
+            fact = pending.pop()
+            for conclusion in graph.get(fact, ()):
+                if conclusion not in self.uncovered:
+                    self.uncovered.add(conclusion)
+                    pending.append(conclusion)
+
+        self.covered: List[str] = [
+            fact for component in reversed(components) for fact in component
+            if fact in self._rules_of and fact not in self.uncovered
+        ]
+        self._position = {fact: position for position, fact in enumerate(self.covered)}
+        self._constant = [fact for fact in constant if fact not in self._rules_of]
+        self.uncovered |= {fact for fact in self._constant if not isinstance(fact, str)}
+        self._literals = literals
+        self._evaluator: Optional[Callable] = None
+        self._conclusion_evaluators: Dict[str, Callable] = {}
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_evaluator"] = None
+        state["_conclusion_evaluators"] = {}
+        return state
+
+    @property
+    def complete(self) -> bool:
+        """Все ли выводы базы знаний вычисляются в замкнутой форме."""
+
+        return not self.uncovered
+
+    def evaluate(self, facts: Mapping[str, float]) -> Dict[str, float]:
+        """
+        Вычислить все выводы в замкнутой форме.
+
+        Args:
+            facts (Mapping[str, float]): Исходные факты (не изменяются)
+
+        Returns:
+            Dict[str, float]: CF выводов из covered после вывода
+                (выводы без CF, как и в infer, отсутствуют)
+        """
+
+        if self._evaluator is None:
+            self._evaluator = self._compile(self.covered, None)
+        return self._evaluator(facts)
+
+    def conclusion(self, name: str, facts: Mapping[str, float]) -> Optional[float]:
+        """
+        Вычислить один вывод; вычисляется только конус правил, от которых он зависит.
+
+        Args:
+            name (str): Вывод из covered
+            facts (Mapping[str, float]): Исходные факты (не изменяются)
+
+        Returns:
+            Optional[float]: CF вывода после вывода (None - факт не выведен и не задан)
+
+        Raises:
+            KeyError: Если вывод не вычисляется в замкнутой форме
+        """
+
+        evaluator = self._conclusion_evaluators.get(name)
+        if evaluator is None:
+            if name not in self._position:
+                raise KeyError(name)
+            evaluator = self._compile(self._cone(name), name)
+            self._conclusion_evaluators[name] = evaluator
+        return evaluator(facts)
+
+    def source(self, name: Optional[str] = None) -> str:
+        """
+        Получить сгенерированный код вычислителя (для отладки).
+
+        Args:
+            name (Optional[str]): Вывод (None - вычислитель всех выводов)
+
+        Returns:
+            str: Исходный код функции на Python
+        """
+
+        if name is None:
+            return self._generate(self.covered, None)
+        if name not in self._position:
+            raise KeyError(name)
+        return self._generate(self._cone(name), name)
+
+    def _cone(self, name: str) -> List[str]:
+        """
+        Найти выводы, от которых зависит вывод (включая его самого).
+
+        Args:
+            name (str): Вывод из covered
+
+        Returns:
+            List[str]: Выводы конуса в топологическом порядке
+        """
+
+        cone = {name}
+        pending = [name]
+        while pending:
+            conclusion = pending.pop()
+            for index in self._rules_of[conclusion]:
+                for fact, _ in self._literals[index]:
+                    if fact in self._rules_of and fact not in cone:
+                        cone.add(fact)
+                        pending.append(fact)
+        return sorted(cone, key=self._position.__getitem__)
+
+    def _generate(self, conclusions: List[str], target: Optional[str]) -> str:
+        """
+        Сгенерировать код вычислителя.
+
+        Args:
+            conclusions (List[str]): Вычисляемые выводы в топологическом порядке
+            target (Optional[str]): Возвращаемый вывод (None - словарь всех выводов)
+
+        Returns:
+            str: Исходный код функции evaluate(facts)
+        """
+
+        network = self._network
+        derived = {conclusion: number for number, conclusion in enumerate(conclusions)}
+        emitted: Set[int] = set()
+        lines = ["def evaluate(facts):", "    get = facts.get"]
+
+        def emit(root: int):
+            needed = []
+            stack = [root]
+            while stack:
+                node = stack.pop()
+                if node in emitted:
+                    continue
+                emitted.add(node)
+                needed.append(node)
+                kind, arg = network.kinds[node], network.args[node]
+                if kind in (GROUP, AND, OR):
+                    stack.extend(arg)
+
+            for node in sorted(needed):
+                kind, arg = network.kinds[node], network.args[node]
+                if kind == FACT and arg in derived:
+                    value = "0.0 if c{0} is None else c{0}".format(derived[arg])
+                elif kind == FACT:
+                    value = "get({!r}, 0.0)".format(arg)
+                elif kind == NOT:
+                    value = "1.0 - get({!r}, 0.0)".format(arg)
+                elif kind == GROUP:
+                    value = "min({})".format(", ".join("v{}".format(child) for child in arg))
+                elif kind in (AND, OR):
+                    value = "{}(v{}, v{})".format("min" if kind == AND else "max", arg[0], arg[1])
+                else:
+                    value = repr(float(arg))
+                lines.append("    v{} = {}".format(node, value))
+
+        for conclusion in conclusions:
+            number = derived[conclusion]
+            lines.append("    c{} = get({!r})".format(number, conclusion))
+            for index in self._rules_of[conclusion]:
+                root = network.rule_nodes[index]
+                emit(root)
+                lines.append("    if v{} > 0:".format(root))
+                lines.append("        r = v{} * {!r}".format(root, self._rules[index].cf))
+                lines.append("        if c{0} is None or r > c{0}:".format(number))
+                lines.append("            c{} = r".format(number))
+
+        if target is not None:
+            lines.append("    return c{}".format(derived[target]))
+        else:
+            lines.append("    result = {}")
+            for conclusion in conclusions:
+                number = derived[conclusion]
+                lines.append("    if c{} is not None:".format(number))
+                lines.append("        result[{!r}] = c{}".format(conclusion, number))
+            for conclusion in self._constant:
+                lines.append("    if {!r} in facts:".format(conclusion))
+                lines.append("        result[{0!r}] = facts[{0!r}]".format(conclusion))
+            lines.append("    return result")
+
+        return "\n".join(lines) + "\n"
+
+    def _compile(self, conclusions: List[str], target: Optional[str]) -> Callable:
+        """
+        Сгенерировать и скомпилировать вычислитель.
+
+        Args:
+            conclusions (List[str]): Вычисляемые выводы в топологическом порядке
+            target (Optional[str]): Возвращаемый вывод (None - словарь всех выводов)
+
+        Returns:
+            Callable: Функция evaluate(facts)
+        """
+
+        namespace = {"min": min, "max": max}
+        code = compile(self._generate(conclusions, target), "<closed-form>", "exec")
+        exec(code, namespace)
+        return namespace["evaluate"]
@@ -0,0 +1,351 @@
+import glob
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.expert_system import ExpertSystem
+from app.overlay import FactOverlay
+
+SNAPSHOT_FORMAT = 2
+
+
+class CompiledKnowledgeBase:
+    """Неизменяемая скомпилированная база знаний для вычисления случаев.
+
+    При компиляции правила и факты загружаются в собственный экземпляр
+    ExpertSystem и заранее строится сеть условий; факты базы хранятся без
+    выводов. Вычисление случая записывает входные факты в слой FactOverlay
+    поверх фактов базы и выполняет над ним полный вывод (для баз знаний,
+    все выводы которых вычисляются в замкнутой форме, - ClosedFormEvaluator
+    без проходов по правилам), поэтому результат
+    зависит только от фактов базы и входных фактов случая, общий экземпляр
+    expert_system и сама база знаний не меняются, а одновременные
+    вычисления не мешают друг другу.
+
+    Attributes:
+        name (str): Имя файла базы знаний
+        version (str): Версия базы знаний (хэш содержимого файла)
+        conclusions (List[str]): Факты, выводимые правилами базы знаний
+    """
+
+    def __init__(self, data: Dict, name: str = "", version: str = "", cache_size: int = 1024):
+        """
+        Конструктор: компилирует базу знаний.
+
+        Args:
+            data (Dict): Данные базы знаний {'facts': {...}, 'rules': [...]}
+            name (str): Имя файла базы знаний
+            version (str): Версия базы знаний
+            cache_size (int): Количество хранимых результатов вычисления случаев
+        """
+
+        self.name = name
+        self.version = version
+        self._engine = ExpertSystem()
+        self._engine.load_from_dict(data)
+        self._engine.condition_network()
+        closed_form = self._engine.closed_form()
+        self._closed_form = closed_form if closed_form.complete else None
+        if self._engine._wildcard_index() is not None:
+            self._engine.facts.prefix_matches("")
+        self.conclusions: List[str] = list(dict.fromkeys(rule.conclusion for rule in self._engine.rules))
+
+        self._cache: "OrderedDict[str, Dict]" = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_cache"] = OrderedDict()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def facts(self) -> Dict[str, float]:
+        """Факты базы знаний без выводов (копия)."""
+
+        return dict(self._engine.facts)
+
+    def evaluate(self, inputs: Dict[str, float]) -> Tuple[Dict, bool]:
+        """
+        Вычислить выводы для входных фактов случая.
+
+        Args:
+            inputs (Dict[str, float]): Входные факты случая с CF
+
+        Returns:
+            Tuple[Dict, bool]: Результат вида
+                {
+                    'input_hash': str,
+                    'conclusions': [{'fact': str, 'cf': float}, ...],
+                    'inferred': Dict[str, float],
+                    'passes': int,
+                    'firings': int
+                }
+                (passes и firings равны 0 при вычислении в замкнутой форме)
+                и признак того, что результат взят из кэша
+
+        Raises:
+            ValueError: Если CF входного факта вне диапазона от 0 до 1
+        """
+
+        for cf in inputs.values():
+            if not 0 <= cf <= 1:
+                raise ValueError("Коэффициент уверенности должен быть от 0 до 1")
+
+        key = input_hash(inputs)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached, True
+
+        facts = FactOverlay(self._engine.facts, inputs)
+        if self._closed_form is not None:
+            values = self._closed_form.evaluate(facts)
+            outcome = {
+                "inferred": {fact: cf for fact, cf in values.items() if facts.get(fact) != cf},
+                "passes": 0,
+                "firings": 0
+            }
+        else:
+            for outcome in self._engine.iter_infer(facts=facts):
+                pass
+            values = facts
+
+        conclusions = []
+        for fact in self.conclusions:
+            cf = values[fact] if fact in values else facts.get(fact)
+            if cf is not None and cf > 0:
+                conclusions.append({"fact": fact, "cf": cf})
+        conclusions.sort(key=lambda item: item["cf"], reverse=True)
+
+        result = {
+            "input_hash": key,
+            "conclusions": conclusions,
+            "inferred": outcome["inferred"],
+            "passes": outcome["passes"],
+            "firings": outcome["firings"]
+        }
+
+        with self._lock:
+            self._cache[key] = result
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return result, False
+
+
+class KnowledgeBaseRegistry:
+    """Реестр скомпилированных баз знаний из директории knowledge_base.
+
+    База знаний компилируется при первом обращении и перекомпилируется,
+    если файл изменился (проверяются время изменения и размер, версия -
+    хэш содержимого). Хранится не более capacity баз, вытесняются
+    давно не использованные.
+
+    Если задана директория снимков, скомпилированная база сохраняется
+    в нее (pickle, имя файла содержит версию базы и SNAPSHOT_FORMAT),
+    и следующий процесс загружает снимок вместо разбора и компиляции.
+    Снимки загружаются через pickle, поэтому директория должна быть
+    доступна для записи только самому серверу.
+
+    Attributes:
+        directory (Path): Директория файлов баз знаний
+        capacity (int): Максимальное количество скомпилированных баз
+        snapshot_dir (Optional[Path]): Директория снимков (None - без снимков)
+    """
+
+    def __init__(self, directory: Path, capacity: int = 8, snapshot_dir: Optional[Path] = None):
+        """
+        Конструктор реестра.
+
+        Args:
+            directory (Path): Директория файлов баз знаний
+            capacity (int): Максимальное количество скомпилированных баз
+            snapshot_dir (Optional[Path]): Директория снимков скомпилированных баз
+        """
+
+        self.directory = Path(directory)
+        self.capacity = capacity
+        self.snapshot_dir = Path(snapshot_dir) if snapshot_dir is not None else None
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, int], CompiledKnowledgeBase]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name: str, timings: Optional[Dict[str, float]] = None) -> CompiledKnowledgeBase:
+        """
+        Получить скомпилированную базу знаний.
+
+        Args:
+            name (str): Имя файла базы знаний (расширение .json можно не указывать)
+            timings (Optional[Dict[str, float]]): Словарь для времени фаз в секундах
+                ('read', 'snapshot_load' или 'parse' и 'compile', 'snapshot_write')
+
+        Returns:
+            CompiledKnowledgeBase: Актуальная скомпилированная база знаний
+
+        Raises:
+            ValueError: Если имя файла содержит путь
+            FileNotFoundError: Если файл базы знаний не найден
+        """
+
+        if not name or Path(name).name != name or name.startswith("."):
+            raise ValueError("Некорректное имя базы знаний")
+        if not name.endswith(".json"):
+            name += ".json"
+
+        path = self.directory / name
+        stat = path.stat()
+        signature = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(name)
+                return entry[1]
+
+        timings = {} if timings is None else timings
+        started = time.perf_counter()
+        content = path.read_bytes()
+        version = hashlib.sha256(content).hexdigest()[:16]
+        timings["read"] = time.perf_counter() - started
+
+        compiled = self._load_snapshot(name, version, timings)
+        if compiled is None:
+            started = time.perf_counter()
+            data = json.loads(content.decode("utf-8"))
+            timings["parse"] = time.perf_counter() - started
+            started = time.perf_counter()
+            compiled = CompiledKnowledgeBase(data, name=name, version=version)
+            timings["compile"] = time.perf_counter() - started
+            self._save_snapshot(compiled, timings)
+
+        with self._lock:
+            self._entries[name] = (signature, compiled)
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+        return compiled
+
+    def _snapshot_path(self, name: str, version: str) -> Path:
+        """
+        Получить путь снимка версии базы знаний.
+
+        Args:
+            name (str): Имя файла базы знаний
+            version (str): Версия базы знаний
+
+        Returns:
+            Path: Путь файла снимка
+        """
+
+        return self.snapshot_dir / f"{name}.{version}.v{SNAPSHOT_FORMAT}.pickle"
+
+    def _load_snapshot(self, name: str, version: str, timings: Dict[str, float]) -> Optional[CompiledKnowledgeBase]:
+        """
+        Загрузить снимок скомпилированной базы знаний.
+
+        Args:
+            name (str): Имя файла базы знаний
+            version (str): Версия базы знаний
+            timings (Dict[str, float]): Словарь для времени фаз
+
+        Returns:
+            Optional[CompiledKnowledgeBase]: База знаний или None, если снимка нет
+                или его не удалось загрузить (тогда база компилируется заново)
+        """
+
+        if self.snapshot_dir is None:
+            return None
+        path = self._snapshot_path(name, version)
+        if not path.is_file():
+            return None
+
+        started = time.perf_counter()
+        try:
+            with open(path, "rb") as f:
+                compiled = pickle.load(f)
+        except Exception as e:
+            print(f"Не удалось загрузить снимок {path.name}: {e}")
+            return None
+        if not isinstance(compiled, CompiledKnowledgeBase) or compiled.version != version:
+            return None
+        timings["snapshot_load"] = time.perf_counter() - started
+        return compiled
+
+    def _save_snapshot(self, compiled: CompiledKnowledgeBase, timings: Dict[str, float]):
+        """
+        Сохранить снимок скомпилированной базы знаний и удалить снимки ее прежних версий.
+
+        Снимок записывается атомарно (через временный файл и os.replace),
+        ошибки записи не мешают работе с базой знаний.
+
+        Args:
+            compiled (CompiledKnowledgeBase): Скомпилированная база знаний
+            timings (Dict[str, float]): Словарь для времени фаз
+        """
+
+        if self.snapshot_dir is None:
+            return
+        started = time.perf_counter()
+        path = self._snapshot_path(compiled.name, compiled.version)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            self.snapshot_dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+            for old in self.snapshot_dir.glob(f"{glob.escape(compiled.name)}.*.pickle"):
+                if old != path and old.name[len(compiled.name) + 1:].count(".") == 2:
+                    old.unlink(missing_ok=True)
+        except Exception as e:
+            tmp_path.unlink(missing_ok=True)
+            print(f"Не удалось сохранить снимок {path.name}: {e}")
+            return
+        timings["snapshot_write"] = time.perf_counter() - started
+
+    def evict(self, name: Optional[str] = None):
+        """
+        Удалить скомпилированную базу знаний из реестра вместе с ее снимками.
+
+        Args:
+            name (Optional[str]): Имя файла (None - очистить реестр полностью, снимки не удаляются)
+        """
+
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+                return
+            if not name.endswith(".json"):
+                name += ".json"
+            self._entries.pop(name, None)
+
+        if self.snapshot_dir is None or Path(name).name != name:
+            return
+        for snapshot in self.snapshot_dir.glob(f"{glob.escape(name)}.*.pickle"):
+            if snapshot.name[len(name) + 1:].count(".") == 2:
+                snapshot.unlink(missing_ok=True)
+
+
+def input_hash(inputs: Dict[str, float]) -> str:
+    """
+    Вычислить хэш входных фактов случая, не зависящий от порядка ключей.
+
+    Args:
+        inputs (Dict[str, float]): Входные факты
+
+    Returns:
+        str: Шестнадцатеричный хэш SHA-256 (первые 16 символов)
+    """
+
+    canonical = json.dumps(inputs, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
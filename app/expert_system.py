@@ -1,5 +1,21 @@
-from typing import List, Dict
-
+import heapq
+import sys
+import time
+from typing import List, Dict, FrozenSet, Iterable, Iterator, Mapping, MutableMapping, Optional, Set, Tuple
+
+from app.analyzer import KnowledgeBaseAnalyzer, fact_dependents, goal_rules, rule_components
+from app.closed_form import ClosedFormEvaluator
+from app.fact_store import FactStore, next_version
+from app.fact_trie import WildcardIndex, wildcard_prefix, wildcard_value
+from app.fuzzy_index import similar_facts
+from app.model import Condition, ConditionPool, Rule
+from app.network import ConditionNetwork
+from app.overlay import FactOverlay
+from app.parallel import ShardedInference
+from app.query_index import QueryBatch, RuleStructureIndex
+from app.profiler import InferenceProfiler
+from app.provenance import ProvenanceLog
+from app.reload import KnowledgeBaseDiff, remap_dependents
 
 
 class ExpertSystem:
@@ -12,14 +28,265 @@ class ExpertSystem:
 
     Attributes:
         facts (Dict[str, float]): Словарь фактов с коэффициентами уверенности.
-        rules (List[Dict]): Список правил вида {'if': условия, 'then': вывод, 'cf': CF}.
+        rules (List[Rule]): Список правил (компактные объекты Rule с интернированными условиями).
+        rules_version (int): Версия последнего изменения списка правил.
+        last_inference (Dict): Итоги последнего вызова infer (проходы, срабатывания, прерывание).
+        profiler (InferenceProfiler): Профилировщик вывода по правилам (по умолчанию выключен).
+        provenance (ProvenanceLog): Журнал происхождения выведенных фактов (по умолчанию выключен).
+        optimize_inference (bool): Исключать ли из вывода мертвые, дублирующиеся и поглощенные правила.
+        use_network (bool): Вычислять ли условия через сеть общих подвыражений (ConditionNetwork).
+        parallel_workers (Optional[int]): Количество процессов параллельного вывода (по умолчанию число ядер;
+            задается до первого параллельного вывода).
+        parallel_min_rules (int): Минимальное число правил, при котором вывод выполняется параллельно.
+        fuzzy_threshold (Optional[float]): Минимальное сходство имен фактов при приближенном сопоставлении
+            запросов (None - только точное совпадение нормализованных имен).
+        fuzzy_limit (int): Количество кандидатов приближенного сопоставления в matched_items.
     """
 
     def __init__(self):
         """Конструктор экспертной системы."""
 
-        self.facts: Dict[str, float] = {}
-        self.rules: List[Dict] = []
+        self._facts: FactStore = FactStore()
+        self._rules: List[Rule] = []
+        self._pool = ConditionPool()
+        self.rules_version: int = next_version()
+        self.last_inference: Optional[Dict] = None
+        self.profiler = InferenceProfiler()
+        self.provenance = ProvenanceLog()
+        self.optimize_inference = False
+        self._inference_plan_cache: Tuple[Optional[Tuple[int, int]], List[int]] = (None, [])
+        self._base_version = next_version()
+        self.use_network = True
+        self._network_cache: Tuple[Optional[int], Optional[ConditionNetwork]] = (None, None)
+        self._dependents_cache: Tuple[Optional[int], Dict[str, List[int]]] = (None, {})
+        self._wildcard_cache: Tuple[Optional[int], Optional[WildcardIndex]] = (None, None)
+        self._goal_cache: Tuple[Optional[int], FrozenSet[str], List[int]] = (None, frozenset(), [])
+        self._closed_form_cache: Tuple[Optional[int], Optional[ClosedFormEvaluator]] = (None, None)
+        self.parallel_workers: Optional[int] = None
+        self.parallel_min_rules = 2000
+        self._sharded: Optional[ShardedInference] = None
+        self._components_cache: Tuple[Optional[int], List[List[int]]] = (None, [])
+        self._query_index_cache: Tuple[Optional[int], Optional[RuleStructureIndex]] = (None, None)
+        self._base_facts: Optional[Dict[str, float]] = None
+        self._inferred = False
+        self._rule_keys_cache: Tuple[Optional[int], Optional[List]] = (None, None)
+        self.fuzzy_threshold: Optional[float] = None
+        self.fuzzy_limit = 5
+
+    @property
+    def facts(self) -> FactStore:
+        """Словарь фактов с коэффициентами уверенности."""
+
+        return self._facts
+
+    @facts.setter
+    def facts(self, facts: Dict[str, float]):
+        self._facts = FactStore(facts)
+        self._base_facts = None
+        self._base_version = next_version()
+        self._inferred = False
+
+    @property
+    def rules(self) -> List[Rule]:
+        """Список правил базы знаний."""
+
+        return self._rules
+
+    @rules.setter
+    def rules(self, rules: List):
+        self._pool = ConditionPool()
+        self._rules = [
+            rule if isinstance(rule, Rule) else self._make_rule(rule["if"], rule["then"], rule["cf"])
+            for rule in rules
+        ]
+        self.rules_version = next_version()
+
+    @property
+    def version(self) -> int:
+        """Версия состояния базы знаний.
+
+        Меняется при любом изменении фактов или правил, включая
+        факты, выведенные методом infer.
+        """
+
+        return max(self._facts.version, self.rules_version)
+
+    @property
+    def base_version(self) -> int:
+        """Версия исходных фактов и правил.
+
+        Меняется при загрузке, изменении фактов пользователем и изменении
+        правил, но не при выводе.
+        """
+
+        return max(self._base_version, self.rules_version)
+
+    @property
+    def base_facts(self) -> Dict[str, float]:
+        """Исходные факты (копия): факты последней загрузки с изменениями пользователя.
+
+        Если исходные факты неизвестны (факты заменялись целиком),
+        возвращаются текущие факты.
+        """
+
+        return dict(self._base_facts if self._base_facts is not None else self._facts)
+
+    def analyze(self) -> Dict:
+        """Выполняет статический анализ базы знаний.
+
+        Returns:
+            Отчет KnowledgeBaseAnalyzer.analyze: мертвые, дублирующиеся,
+            поглощенные правила и циклы зависимостей.
+        """
+
+        return KnowledgeBaseAnalyzer(self.facts, self.rules).analyze()
+
+    def _inference_plan(self) -> List[int]:
+        """Возвращает индексы правил, участвующих в выводе.
+
+        При включенном optimize_inference мертвые, дублирующиеся и поглощенные
+        правила исключаются; план пересчитывается при изменении правил или
+        исходных фактов (выводы infer план не меняют: выводимые факты
+        анализатор и так считает возможными).
+
+        Returns:
+            Индексы правил в исходном порядке.
+        """
+
+        if not self.optimize_inference:
+            return list(range(len(self.rules)))
+
+        key, plan = self._inference_plan_cache
+        if key != (self.rules_version, self._base_version):
+            plan = KnowledgeBaseAnalyzer(self.facts, self.rules).optimized_rule_indices()
+            self._inference_plan_cache = ((self.rules_version, self._base_version), plan)
+        return plan
+
+    def condition_network(self) -> ConditionNetwork:
+        """Возвращает сеть общих подвыражений условий для текущих правил.
+
+        Сеть строится заново только после изменения списка правил.
+
+        Returns:
+            Скомпилированная сеть условий.
+        """
+
+        version, network = self._network_cache
+        if version != self.rules_version or network is None:
+            network = ConditionNetwork(self.rules)
+            self._network_cache = (self.rules_version, network)
+        return network
+
+    def _rule_dependents(self) -> Dict[str, List[int]]:
+        """Возвращает индекс зависимостей: факт -> правила, читающие его в условиях.
+
+        Индекс строится заново только после изменения списка правил.
+
+        Returns:
+            Индексы правил по возрастанию для каждого факта условий.
+        """
+
+        version, dependents = self._dependents_cache
+        if version != self.rules_version:
+            dependents = fact_dependents(self.rules)
+            self._dependents_cache = (self.rules_version, dependents)
+        return dependents
+
+    def _wildcard_index(self) -> Optional[WildcardIndex]:
+        """Возвращает индекс правил с шаблонными условиями.
+
+        Индекс строится заново только после изменения списка правил.
+
+        Returns:
+            Индекс шаблонов или None, если шаблонных условий в правилах нет.
+        """
+
+        version, index = self._wildcard_cache
+        if version != self.rules_version:
+            index = WildcardIndex(self.rules) or None
+            self._wildcard_cache = (self.rules_version, index)
+        return index
+
+    def _goal_rules(self, targets: Iterable[str]) -> List[int]:
+        """Возвращает правила обратного конуса целевых выводов (см. analyzer.goal_rules).
+
+        Конус последнего набора целей хранится до изменения списка правил,
+        поэтому повторные проверки тех же целей не обходят граф заново.
+
+        Args:
+            targets: Целевые выводы.
+
+        Returns:
+            Индексы правил конуса по возрастанию.
+        """
+
+        targets = frozenset(targets)
+        version, cached_targets, cone = self._goal_cache
+        if version != self.rules_version or cached_targets != targets:
+            cone = goal_rules(self.rules, list(targets))
+            self._goal_cache = (self.rules_version, targets, cone)
+        return cone
+
+    def closed_form(self) -> ClosedFormEvaluator:
+        """Возвращает вычислитель выводов в замкнутой форме для текущих правил.
+
+        Вычислитель строится заново только после изменения списка правил.
+
+        Returns:
+            Вычислитель ClosedFormEvaluator.
+        """
+
+        version, evaluator = self._closed_form_cache
+        if version != self.rules_version or evaluator is None:
+            evaluator = ClosedFormEvaluator(self.rules, self.condition_network())
+            self._closed_form_cache = (self.rules_version, evaluator)
+        return evaluator
+
+    def evaluate_conclusions(self, targets: Optional[List[str]] = None,
+                             facts: Optional[Mapping[str, float]] = None) -> Dict[str, float]:
+        """Вычисляет CF выводов после вывода, не меняя факты.
+
+        Выводы ациклической части базы знаний вычисляются в замкнутой форме
+        без проходов по правилам; если запрошен хотя бы один вывод вне ее,
+        выполняется infer над слоем FactOverlay. Результат совпадает
+        с фактами после infer (epsilon = 0, без ограничений бюджета).
+
+        Args:
+            targets: Запрашиваемые факты (по умолчанию все выводы правил).
+            facts: Исходные факты (по умолчанию self.facts).
+
+        Returns:
+            Словарь CF запрошенных фактов, имеющих CF после вывода.
+        """
+
+        facts = self.facts if facts is None else facts
+        evaluator = self.closed_form()
+
+        if targets is None:
+            if evaluator.complete:
+                return evaluator.evaluate(facts)
+            targets = list(dict.fromkeys(rule.conclusion for rule in self.rules))
+
+        if any(target in evaluator.uncovered for target in targets):
+            overlay = FactOverlay(facts)
+            self.infer(facts=overlay)
+            return {target: overlay[target] for target in targets if target in overlay}
+
+        result = {}
+        for target in targets:
+            try:
+                cf = evaluator.conclusion(target, facts)
+            except KeyError:
+                cf = facts.get(target)
+            if cf is not None:
+                result[target] = cf
+        return result
+
+    def clear(self):
+        """Очищает все факты и правила."""
+
+        self.facts = {}
+        self.rules = []
 
     def add_fact(self, fact: str, cf: float):
         """Добавляет факт с коэффициентом уверенности.
@@ -32,6 +299,9 @@ class ExpertSystem:
         if not 0 <= cf <= 1:
             raise ValueError("Коэффициент уверенности должен быть от 0 до 1")
         self.facts[fact] = cf
+        self._base_version = next_version()
+        if self._base_facts is not None:
+            self._base_facts[fact] = cf
 
     def delete_fact(self, fact: str):
         """Удаляет факт из базы знаний.
@@ -42,12 +312,17 @@ class ExpertSystem:
 
         if fact in self.facts:
             del self.facts[fact]
+            self._base_version = next_version()
+        if self._base_facts is not None:
+            self._base_facts.pop(fact, None)
 
     def parse_conditions_string(self, conditions_str: str) -> List[Dict]:
         """Парсит строку условий в структурированный формат.
 
         Преобразует строковое представление условий (например, "A И B ИЛИ НЕТ C")
-        в список словарей с операторами и группировкой.
+        в список словарей с операторами и группировкой. Факт, заканчивающийся
+        на '*', - шаблон по префиксу: 'симптом_кашель_*' или 'ЛЮБОЙ симптом_кашель_*' -
+        любой подходящий факт, '(симптом_кашель_*)' или 'ВСЕ симптом_кашель_*' - все.
 
         Args:
             conditions_str: Строка условий на естественном языке.
@@ -87,6 +362,15 @@ class ExpertSystem:
         while i < len(tokens):
             token = tokens[i]
 
+            quantifier = self._parse_quantifier(tokens, i + 1 if token.upper() == 'НЕТ' else i)
+            if quantifier is not None:
+                if token.upper() == 'НЕТ':
+                    quantifier["operator"] = "NOT"
+                    i += 1
+                result.append(quantifier)
+                i += 2
+                continue
+
             if token.upper() == 'НЕТ':
                 if i + 1 < len(tokens):
                     next_token = tokens[i + 1]
@@ -190,6 +474,30 @@ class ExpertSystem:
 
         return result
 
+    def _parse_quantifier(self, tokens: List[str], i: int) -> Optional[Dict]:
+        """Разбирает шаблон с квантором: 'ВСЕ префикс*' или 'ЛЮБОЙ префикс*'.
+
+        'ЛЮБОЙ префикс*' равносилен 'префикс*' (максимум CF подходящих фактов),
+        'ВСЕ префикс*' - '(префикс*)' (минимум CF подходящих фактов).
+
+        Args:
+            tokens: Список токенов.
+            i: Позиция возможного квантора.
+
+        Returns:
+            Условие с шаблоном или None, если в позиции нет квантора с шаблоном.
+        """
+
+        if i + 1 >= len(tokens) or tokens[i].upper() not in ('ВСЕ', 'ЛЮБОЙ'):
+            return None
+        if wildcard_prefix(tokens[i + 1]) is None:
+            return None
+        return {
+            "fact": tokens[i + 1],
+            "operator": "",
+            "is_group": tokens[i].upper() == 'ВСЕ'
+        }
+
     def add_rule(self, conditions, conclusion: str, cf: float):
         """Добавляет правило в экспертную систему.
 
@@ -202,26 +510,44 @@ class ExpertSystem:
         if not 0 <= cf <= 1:
             raise ValueError("Коэффициент уверенности должен быть от 0 до 1")
 
+        self._rules.append(self._make_rule(conditions, conclusion, cf))
+        self.rules_version = next_version()
+
+    def _make_rule(self, conditions, conclusion: str, cf: float) -> Rule:
+        """Создает компактное правило с интернированными условиями.
+
+        Одинаковые условия всех правил хранятся в одном экземпляре Condition,
+        а одинаковые списки условий - в одном кортеже.
+
+        Args:
+            conditions: Условия правила (строка, список строк, словарей или Condition).
+            conclusion: Вывод правила (строка).
+            cf: Коэффициент уверенности правила.
+
+        Returns:
+            Правило Rule.
+        """
+
         if isinstance(conditions, str):
             conditions = self.parse_conditions_string(conditions)
-        elif isinstance(conditions, list):
-            parsed_conditions = []
+
+        pool = self._pool
+        compact = []
+        if isinstance(conditions, (list, tuple)):
             for i, condition in enumerate(conditions):
                 if isinstance(condition, str):
-                    parsed_conditions.append({
-                        "fact": condition,
-                        "operator": "AND" if i < len(conditions) - 1 else "",
-                        "is_group": False
-                    })
-                elif isinstance(condition, dict):
-                    parsed_conditions.append(condition)
-            conditions = parsed_conditions
+                    compact.append(pool.condition(condition, "AND" if i < len(conditions) - 1 else "", False))
+                elif isinstance(condition, (dict, Condition)):
+                    compact.append(pool.condition(
+                        condition.get("fact", ""),
+                        condition.get("operator", ""),
+                        condition.get("is_group", False)
+                    ))
 
-        self.rules.append({
-            "if": conditions,
-            "then": conclusion,
-            "cf": cf
-        })
+        if isinstance(conclusion, str):
+            conclusion = sys.intern(conclusion)
+
+        return Rule(pool.antecedent(compact), conclusion, cf)
 
     def delete_rule(self, index: int):
         """Удаляет правило по индексу.
@@ -230,50 +556,67 @@ class ExpertSystem:
             index: Индекс правила в списке rules.
         """
 
-        if 0 <= index < len(self.rules):
-            self.rules.pop(index)
+        if 0 <= index < len(self._rules):
+            self._rules.pop(index)
+            self.rules_version = next_version()
 
-    def _get_fact_cf(self, fact_name: str, operator: str = "") -> float:
+    def _get_fact_cf(self, fact_name: str, operator: str = "", facts: Optional[Mapping[str, float]] = None,
+                     every: bool = False) -> float:
         """Получает CF для факта с учетом оператора NOT.
 
+        Название, заканчивающееся на '*', - шаблон: CF берется по всем фактам
+        с этим префиксом (см. fact_trie.wildcard_value).
+
         Args:
              fact_name: Название факта.
             operator: Логический оператор ('NOT' или '').
+            facts: Факты для чтения (по умолчанию self.facts).
+            every: Для шаблона - минимум по всем подходящим фактам вместо максимума.
 
         Returns:
             Коэффициент уверенности факта (1 - CF для NOT).
         """
 
-        cf = self.facts.get(fact_name, 0.0)
+        facts = self.facts if facts is None else facts
+        prefix = wildcard_prefix(fact_name)
+        if prefix is not None:
+            return wildcard_value(facts, prefix, operator == "NOT", every)
+
+        cf = facts.get(fact_name, 0.0)
         if operator == "NOT":
             return 1.0 - cf
         return cf
 
-    def _evaluate_single_condition(self, condition: Dict) -> float:
+    def _evaluate_single_condition(self, condition: Condition, facts: Optional[Mapping[str, float]] = None) -> float:
         """Оценивает одно условие.
 
+        Шаблон 'префикс*' означает любой факт с префиксом (максимум CF),
+        а шаблон в отдельной группе '(префикс*)' - все такие факты (минимум CF).
+
         Args:
-            condition: Словарь условия.
+            condition: Условие правила.
+            facts: Факты для чтения (по умолчанию self.facts).
 
         Returns:
             CF условия после применения операторов.
         """
 
-        fact = condition.get("fact", "")
-        operator = condition.get("operator", "").upper()
-        is_group = condition.get("is_group", False)
+        fact = condition.fact
+        operator = condition.operator.upper()
 
-        if is_group and isinstance(fact, list):
-            cfs = [self._get_fact_cf(f, operator) for f in fact]
+        if condition.is_group and isinstance(fact, tuple):
+            cfs = [self._get_fact_cf(f, operator, facts) for f in fact]
             return min(cfs) if cfs else 0.0
         else:
-            return self._get_fact_cf(fact, operator)
+            return self._get_fact_cf(fact, operator, facts, condition.is_group)
 
-    def _evaluate_conditions(self, conditions: List[Dict]) -> float:
+    def _evaluate_conditions(self, conditions: Tuple[Condition, ...],
+                             facts: Optional[Mapping[str, float]] = None) -> float:
         """Оценивает все условия правила с правильной логикой AND/OR.
 
         Args:
             conditions: Список условий.
+            facts: Факты для чтения (по умолчанию self.facts).
 
         Returns:
             Общий CF для всех условий с учетом операторов.
@@ -283,14 +626,14 @@ class ExpertSystem:
             return 0.0
 
         if len(conditions) == 1:
-            return self._evaluate_single_condition(conditions[0])
+            return self._evaluate_single_condition(conditions[0], facts)
 
         result = None
         current_operator = "AND"
 
         for i, condition in enumerate(conditions):
-            condition_cf = self._evaluate_single_condition(condition)
-            operator = condition.get("operator", "").upper()
+            condition_cf = self._evaluate_single_condition(condition, facts)
+            operator = condition.operator.upper()
 
             if i == len(conditions) - 1:
                 operator = ""
@@ -310,43 +653,563 @@ class ExpertSystem:
 
         return result if result is not None else 0.0
 
-    def infer(self) -> Dict[str, float]:
+    def infer(self, time_limit: Optional[float] = None, max_firings: Optional[int] = None,
+              max_passes: Optional[int] = None, epsilon: float = 0.0,
+              facts: Optional[MutableMapping[str, float]] = None,
+              targets: Optional[Dict[str, float]] = None) -> Dict[str, float]:
         """Выполняет логический вывод по методу Шортлиффа.
 
         Проходит по всем правилам, вычисляет их применимость
         и добавляет новые факты с учетом коэффициентов уверенности.
+        Итоги вывода (число проходов, срабатываний и признак прерывания
+        по бюджету) сохраняются в last_inference.
+
+        Args:
+            time_limit: Ограничение времени вывода в секундах.
+            max_firings: Максимальное число срабатываний правил.
+            max_passes: Максимальное число проходов по правилам.
+            epsilon: Минимальное приращение CF, считающееся улучшением вывода.
+            facts: Факты, над которыми выполняется вывод, например FactOverlay
+                (по умолчанию self.facts).
+            targets: Целевые выводы с порогами CF (см. iter_infer).
 
         Returns:
             Словарь новых выведенных фактов с их CF.
         """
 
+        inferred = {}
+        for event in self.iter_infer(time_limit, max_firings, max_passes, epsilon, facts, targets):
+            if event["event"] == "summary":
+                inferred = event["inferred"]
+        return inferred
+
+    def iter_infer(self, time_limit: Optional[float] = None, max_firings: Optional[int] = None,
+                   max_passes: Optional[int] = None, epsilon: float = 0.0,
+                   facts: Optional[MutableMapping[str, float]] = None,
+                   targets: Optional[Dict[str, float]] = None) -> Iterator[Dict]:
+        """Выполняет логический вывод, выдавая результаты по мере получения.
+
+        Генератор выдает событие при каждом новом или улучшенном выводе,
+        а после достижения неподвижной точки или исчерпания бюджета -
+        итоговое событие. При исчерпании бюджета в фактах остается лучший
+        частичный результат, а в итоговом событии выставляется truncated.
+
+        Вывод над переданными фактами (например, слоем FactOverlay) не меняет
+        self.facts и last_inference и выполняется по всем правилам, так как
+        сокращенный план optimize_inference построен для базовых фактов.
+
+        С целевыми выводами (targets) оцениваются только правила их
+        обратного конуса (analyzer.goal_rules) в том же порядке, что и при
+        полном выводе, а вывод останавливается, как только CF всех целей
+        достигли порогов: CF фактов при выводе только растут, поэтому
+        достигнутая цель решена. Цель, не достигшая порога к неподвижной
+        точке конуса, тоже решена (ее CF совпадает с полным выводом).
+        Остальные факты после досрочной остановки могут быть выведены
+        не полностью.
+
+        Если между событиями self.facts заменены (например, загрузкой
+        базы знаний), вывод останавливается с причиной facts_replaced:
+        новые факты не дополняются выводами старых, а last_inference
+        не меняется.
+
+        Args:
+            time_limit: Ограничение времени вывода в секундах.
+            max_firings: Максимальное число срабатываний правил.
+            max_passes: Максимальное число проходов по правилам.
+            epsilon: Минимальное приращение CF, считающееся улучшением вывода.
+            facts: Факты, над которыми выполняется вывод (по умолчанию self.facts).
+            targets: Целевые выводы с порогами CF от 0 до 1.
+
+        Yields:
+            Словари событий:
+                {'event': 'inferred', 'fact': str, 'cf': float, 'rule': int, 'pass': int}
+                {'event': 'summary', 'inferred': Dict[str, float], 'passes': int,
+                 'firings': int, 'truncated': bool, 'reason': str или None}
+            С целями итоговое событие дополнительно содержит
+                'targets': {цель: {'cf': float, 'threshold': float, 'reached': bool, 'decided': bool}}
+                и 'relevant_rules': int (количество правил конуса целей).
+
+        Raises:
+            ValueError: Если параметры бюджета или порог цели некорректны.
+        """
+
+        if time_limit is not None and time_limit < 0:
+            raise ValueError("Ограничение времени не может быть отрицательным")
+        if max_firings is not None and max_firings < 0:
+            raise ValueError("Максимальное число срабатываний не может быть отрицательным")
+        if max_passes is not None and max_passes < 1:
+            raise ValueError("Максимальное число проходов должно быть не меньше 1")
+        if epsilon < 0:
+            raise ValueError("Минимальное приращение CF не может быть отрицательным")
+        if targets is not None and not all(0 <= threshold <= 1 for threshold in targets.values()):
+            raise ValueError("Порог цели должен быть от 0 до 1")
+
+        started = time.monotonic()
+        deadline = started + time_limit if time_limit is not None else None
+        rules = list(self.rules)
+        external = facts is not None
+        plan = list(range(len(rules))) if external else self._inference_plan()
+        network = self.condition_network() if self.use_network else None
+        session = network.session() if network is not None else None
+        if not external:
+            facts = self.facts
+        remaining = None
+        if targets is not None:
+            cone = set(self._goal_rules(targets))
+            plan = [index for index in plan if index in cone]
+            remaining = {target for target, threshold in targets.items() if facts.get(target, 0.0) < threshold}
+        profiler = self.profiler if self.profiler.enabled else None
+        if profiler is not None:
+            profiler.begin_inference(self.rules_version, rules)
+        provenance = self.provenance if self.provenance.enabled and not external else None
+        if provenance is not None:
+            provenance.begin(self.rules_version, rules, facts)
+
         new_inferences = True
         inferred = {}
+        passes = 0
+        firings = 0
+        reason = None
+
+        while new_inferences and reason is None and (remaining is None or remaining):
+            if max_passes is not None and passes >= max_passes:
+                if self._would_fire(rules, plan, facts, session, epsilon):
+                    reason = "max_passes"
+                break
 
-        while new_inferences:
             new_inferences = False
+            passes += 1
+
+            for index in plan:
+                rule = rules[index]
+                if deadline is not None and time.monotonic() >= deadline:
+                    reason = "deadline"
+                    break
 
-            for rule in self.rules:
-                conditions = rule["if"]
-                conclusion = rule["then"]
-                rule_cf = rule["cf"]
+                conditions = rule.conditions
+                conclusion = rule.conclusion
+                rule_cf = rule.cf
 
                 try:
-                    condition_cf = self._evaluate_conditions(conditions)
+                    if profiler is not None:
+                        evaluation_started = time.perf_counter_ns()
+
+                    if session is not None and network.rule_nodes[index] is not None:
+                        condition_cf = session.rule_value(index, facts)
+                    else:
+                        condition_cf = self._evaluate_conditions(conditions, facts)
+
+                    if profiler is not None:
+                        profiler.record_evaluation(index, time.perf_counter_ns() - evaluation_started)
 
                     if condition_cf > 0:
                         result_cf = condition_cf * rule_cf
 
-                        if conclusion not in self.facts or result_cf > self.facts[conclusion]:
-                            self.facts[conclusion] = result_cf
+                        if conclusion not in facts or result_cf > facts[conclusion] + epsilon:
+                            if max_firings is not None and firings >= max_firings:
+                                reason = "max_firings"
+                                break
+
+                            if provenance is not None:
+                                provenance.record(conclusion, index, result_cf, facts)
+                            facts[conclusion] = result_cf
+                            if session is not None:
+                                session.fact_changed(conclusion)
                             inferred[conclusion] = result_cf
                             new_inferences = True
+                            firings += 1
+                            if profiler is not None:
+                                profiler.record_firing(index)
+                            observed_version = getattr(facts, "version", None)
+                            yield {
+                                "event": "inferred",
+                                "fact": conclusion,
+                                "cf": result_cf,
+                                "rule": index,
+                                "pass": passes
+                            }
+                            if not external and self._facts is not facts:
+                                reason = "facts_replaced"
+                                break
+                            if session is not None and getattr(facts, "version", None) != observed_version:
+                                session.reset()
+                            if remaining and conclusion in remaining and result_cf >= targets[conclusion]:
+                                remaining.discard(conclusion)
+                                if not remaining:
+                                    break
                 except Exception as e:
                     continue
 
+        if profiler is not None:
+            profiler.end_inference(passes, firings, time.monotonic() - started, reason is not None)
+
+        summary = {
+            "event": "summary",
+            "inferred": inferred,
+            "passes": passes,
+            "firings": firings,
+            "truncated": reason is not None,
+            "reason": reason
+        }
+        if targets is not None:
+            summary["targets"] = {
+                target: {
+                    "cf": facts.get(target, 0.0),
+                    "threshold": threshold,
+                    "reached": target not in remaining,
+                    "decided": target not in remaining or reason is None
+                }
+                for target, threshold in targets.items()
+            }
+            summary["relevant_rules"] = len(plan)
+        if not external and reason != "facts_replaced":
+            self.last_inference = summary
+            self._inferred = self._inferred or targets is None
+        yield summary
+
+    def _would_fire(self, rules: List[Rule], plan: List[int], facts: Mapping[str, float], session,
+                    epsilon: float) -> bool:
+        """Проверяет, изменит ли факты следующий проход вывода.
+
+        Правила только оцениваются, факты не меняются: если ни одно правило
+        не повышает CF своего вывода, факты уже в неподвижной точке.
+
+        Args:
+            rules: Правила вывода.
+            plan: Индексы правил прохода.
+            facts: Факты вывода.
+            session: Сессия сети условий или None.
+            epsilon: Минимальное приращение CF, считающееся улучшением вывода.
+
+        Returns:
+            True, если хотя бы одно правило сработало бы.
+        """
+
+        network = session.network if session is not None else None
+        for index in plan:
+            rule = rules[index]
+            try:
+                if network is not None and network.rule_nodes[index] is not None:
+                    condition_cf = session.rule_value(index, facts)
+                else:
+                    condition_cf = self._evaluate_conditions(rule.conditions, facts)
+                if condition_cf <= 0:
+                    continue
+                conclusion = rule.conclusion
+                if conclusion not in facts or condition_cf * rule.cf > facts[conclusion] + epsilon:
+                    return True
+            except Exception:
+                continue
+        return False
+
+    def infer_parallel(self, time_limit: Optional[float] = None, max_firings: Optional[int] = None,
+                       max_passes: Optional[int] = None, epsilon: float = 0.0) -> Dict[str, float]:
+        """Выполняет логический вывод параллельно по независимым частям базы знаний.
+
+        Правила разбиваются на слабо связные компоненты графа зависимостей
+        фактов, компоненты распределяются по шардам, вывод по шардам
+        выполняется в пуле процессов (ShardedInference), и выведенные факты
+        объединяются в self.facts. Результат совпадает с infer. Если база
+        знаний не делится на части, правил меньше parallel_min_rules, задан
+        бюджет по времени или срабатываниям (он общий для всех правил)
+        или включен профилировщик, выполняется обычный infer.
+
+        Args:
+            time_limit: Ограничение времени вывода в секундах.
+            max_firings: Максимальное число срабатываний правил.
+            max_passes: Максимальное число проходов по правилам.
+            epsilon: Минимальное приращение CF, считающееся улучшением вывода.
+
+        Returns:
+            Словарь новых выведенных фактов с их CF.
+        """
+
+        plan = self._inference_plan()
+        if time_limit is not None or max_firings is not None or self.profiler.enabled \
+                or len(plan) < self.parallel_min_rules:
+            return self.infer(time_limit, max_firings, max_passes, epsilon)
+
+        if max_passes is not None and max_passes < 1:
+            raise ValueError("Максимальное число проходов должно быть не меньше 1")
+        if epsilon < 0:
+            raise ValueError("Минимальное приращение CF не может быть отрицательным")
+
+        version, components = self._components_cache
+        if version != self.rules_version:
+            components = rule_components(self.rules)
+            self._components_cache = (self.rules_version, components)
+
+        if self._sharded is None:
+            self._sharded = ShardedInference(self.parallel_workers)
+
+        shards = self._sharded.shards(components, plan)
+        if len(shards) < 2:
+            return self.infer(time_limit, max_firings, max_passes, epsilon)
+
+        provenance = self.provenance.enabled
+        results = self._sharded.run(shards, self.rules, self.facts, max_passes, epsilon, provenance)
+        if provenance:
+            self.provenance.begin(self.rules_version, self.rules, self.facts)
+            for shard, result in zip(shards, results):
+                self.provenance.merge(result["provenance"], shard)
+
+        inferred = {}
+        for result in results:
+            inferred.update(result["inferred"])
+        if inferred:
+            self.facts.update(inferred)
+
+        truncated = any(result["truncated"] for result in results)
+        self.last_inference = {
+            "event": "summary",
+            "inferred": inferred,
+            "passes": max(result["passes"] for result in results),
+            "firings": sum(result["firings"] for result in results),
+            "truncated": truncated,
+            "reason": "max_passes" if truncated else None,
+            "shards": len(shards)
+        }
+        self._inferred = True
         return inferred
 
-    def query(self, symptoms_input: str) -> Dict:
+    def explain(self, fact: str, max_depth: int = 20) -> Dict:
+        """Объясняет CF факта по журналу происхождения без повторного вывода.
+
+        Args:
+            fact: Факт.
+            max_depth: Максимальная глубина дерева объяснения.
+
+        Returns:
+            Дерево объяснения (см. ProvenanceLog.explain).
+
+        Raises:
+            KeyError: Если факта нет в базе знаний.
+            ValueError: Если глубина меньше 1.
+        """
+
+        if fact not in self.facts:
+            raise KeyError(fact)
+        if max_depth < 1:
+            raise ValueError("Глубина объяснения должна быть не меньше 1")
+        if self.provenance.rules_version != self.rules_version:
+            self.provenance.reset()
+
+        return self.provenance.explain(
+            fact, self.facts, self.rules, max_depth,
+            lambda rule: self._format_conditions(rule.conditions)
+        )
+
+    def _propagate(self, facts: MutableMapping[str, float], changed: List[str], epsilon: float = 0.0,
+                   seed_rules: Iterable[int] = (), provenance: Optional[ProvenanceLog] = None) -> Dict:
+        """Распространяет изменения фактов только по зависящим от них правилам.
+
+        Оцениваются лишь правила, условия которых читают изменившиеся
+        (в том числе выведенные по ходу) факты. Порядок повторяет infer:
+        правила одного прохода оцениваются по возрастанию индекса, изменение,
+        затронувшее правило с большим индексом, учитывается в том же проходе,
+        а с меньшим или равным - в следующем. Если базовые факты уже
+        доведены infer до неподвижной точки, результат совпадает с infer
+        над измененными фактами. Вывод монотонный, как и infer: уменьшение
+        CF входного факта не отменяет ранее выведенных фактов.
+
+        Args:
+            facts: Факты, в которые записываются выводы (обычно FactOverlay).
+            changed: Названия изменившихся фактов.
+            epsilon: Минимальное приращение CF, считающееся улучшением вывода.
+            seed_rules: Правила, оцениваемые в первом проходе независимо от changed.
+            provenance: Журнал происхождения для записи срабатываний.
+
+        Returns:
+            Итоги распространения:
+                {'inferred': Dict[str, float], 'passes': int, 'firings': int, 'evaluations': int}
+        """
+
+        rules = self.rules
+        dependents = self._rule_dependents()
+        wildcards = self._wildcard_index()
+        network = self.condition_network() if self.use_network else None
+        session = network.session() if network is not None else None
+
+        current = set(seed_rules)
+        for fact in changed:
+            current.update(dependents.get(fact, ()))
+            if wildcards is not None:
+                current.update(wildcards.readers(fact))
+        current = sorted(current)
+
+        inferred = {}
+        passes = 0
+        firings = 0
+        evaluations = 0
+
+        while current:
+            passes += 1
+            pending = []
+            following = set()
+            heapq.heapify(current)
+
+            while current:
+                index = heapq.heappop(current)
+                while current and current[0] == index:
+                    heapq.heappop(current)
+
+                rule = rules[index]
+                conclusion = rule.conclusion
+                evaluations += 1
+                try:
+                    if session is not None and network.rule_nodes[index] is not None:
+                        condition_cf = session.rule_value(index, facts)
+                    else:
+                        condition_cf = self._evaluate_conditions(rule.conditions, facts)
+
+                    if condition_cf <= 0:
+                        continue
+
+                    result_cf = condition_cf * rule.cf
+                    if conclusion in facts and result_cf <= facts[conclusion] + epsilon:
+                        continue
+                except Exception:
+                    continue
+
+                if provenance is not None:
+                    provenance.record(conclusion, index, result_cf, facts)
+                facts[conclusion] = result_cf
+                if session is not None:
+                    session.fact_changed(conclusion)
+                inferred[conclusion] = result_cf
+                firings += 1
+
+                readers = dependents.get(conclusion, ())
+                if wildcards is not None:
+                    readers = [*readers, *wildcards.readers(conclusion)]
+                for dependent in readers:
+                    if dependent > index:
+                        heapq.heappush(current, dependent)
+                    else:
+                        following.add(dependent)
+
+            current = sorted(following)
+
+        return {
+            "inferred": inferred,
+            "passes": passes,
+            "firings": firings,
+            "evaluations": evaluations
+        }
+
+    def _conclusion_cone(self, facts: Iterable[str], dependents: Optional[Dict[str, List[int]]] = None) -> Set[str]:
+        """Находит факты, достижимые по правилам от заданных фактов.
+
+        Args:
+            facts: Исходные факты.
+            dependents: Индекс зависимостей (по умолчанию _rule_dependents).
+
+        Returns:
+            Исходные факты и все выводы правил, условия которых читают их
+            прямо или через другие выводы.
+        """
+
+        if dependents is None:
+            dependents = self._rule_dependents()
+        rules = self.rules
+        wildcards = self._wildcard_index()
+        cone = set(facts)
+        pending = list(cone)
+        while pending:
+            fact = pending.pop()
+            readers = dependents.get(fact, ())
+            if wildcards is not None:
+                readers = [*readers, *wildcards.readers(fact)]
+            for index in readers:
+                conclusion = rules[index].conclusion
+                if isinstance(conclusion, str) and conclusion not in cone:
+                    cone.add(conclusion)
+                    pending.append(conclusion)
+        return cone
+
+    def _cone_rules(self, cone: Set[str]) -> List[int]:
+        """Возвращает правила, выводящие факты конуса.
+
+        Args:
+            cone: Факты конуса (см. _conclusion_cone).
+
+        Returns:
+            Индексы правил по возрастанию.
+        """
+
+        return [
+            index for index, rule in enumerate(self.rules)
+            if isinstance(rule.conclusion, str) and rule.conclusion in cone
+        ]
+
+    def what_if(self, changes: Dict[str, Optional[float]], query: Optional[str] = None,
+                epsilon: float = 0.0) -> Dict:
+        """Оценивает гипотетические изменения фактов, не меняя базу знаний.
+
+        Изменения записываются в слой FactOverlay поверх текущих фактов,
+        после чего пересчитываются только выводы, достижимые из измененных
+        фактов (см. _propagate). Базовые факты не копируются и не меняются,
+        поэтому несколько гипотез можно оценивать одновременно.
+
+        Если факты уже выведены infer, выводы, достижимые из измененных
+        фактов, сначала сбрасываются в слое к исходным значениям загрузки
+        (как в reload_from_dict), поэтому уменьшение или удаление факта
+        отменяет зависящие от него выводы. Для баз знаний без NOT над
+        выводимыми фактами результат совпадает с выводом заново над
+        фактами с примененными изменениями. Если исходные факты неизвестны
+        (факты заменялись целиком), выводы не сбрасываются.
+
+        Args:
+            changes: Гипотетические CF фактов (None - факт неизвестен).
+            query: Строка запроса, выполняемого над гипотетическими фактами.
+            epsilon: Минимальное приращение CF, считающееся улучшением вывода.
+
+        Returns:
+            Словарь с результатами:
+                {
+                    'changes': Dict[str, Optional[float]],
+                    'inferred': Dict[str, float],
+                    'delta': Dict[str, Optional[float]],
+                    'passes': int,
+                    'firings': int,
+                    'evaluations': int,
+                    'query': Dict (только если передан query)
+                }
+
+        Raises:
+            ValueError: Если CF вне диапазона от 0 до 1.
+        """
+
+        for cf in changes.values():
+            if cf is not None and not 0 <= cf <= 1:
+                raise ValueError("Коэффициент уверенности должен быть от 0 до 1")
+        if epsilon < 0:
+            raise ValueError("Минимальное приращение CF не может быть отрицательным")
+
+        overlay = FactOverlay(self.facts, changes)
+        changed = set(changes)
+        seed_rules = []
+        base = self._base_facts
+        if self._inferred and base is not None:
+            cone = self._conclusion_cone(changes) - set(changes)
+            for fact in cone:
+                if fact in base:
+                    if overlay.get(fact) != base[fact]:
+                        overlay[fact] = base[fact]
+                elif fact in overlay:
+                    del overlay[fact]
+            changed.update(cone)
+            seed_rules = self._cone_rules(changed)
+
+        result = {"changes": dict(changes)}
+        result.update(self._propagate(overlay, list(changed), epsilon, seed_rules))
+        result["delta"] = overlay.changes()
+
+        if query is not None:
+            result["query"] = self.query(query, facts=overlay)
+        return result
+
+    def query(self, symptoms_input: str, facts: Optional[Mapping[str, float]] = None) -> Dict:
         """Выполняет анализ на основе введенных данных.
 
         Основной метод для взаимодействия с пользователем.
@@ -355,6 +1218,7 @@ class ExpertSystem:
 
         Args:
             symptoms_input: Строка с симптомами/условиями (на естественном языке).
+            facts: Факты для сопоставления, например FactOverlay (по умолчанию self.facts).
 
         Returns:
             Словарь с результатами анализа:
@@ -366,6 +1230,8 @@ class ExpertSystem:
                     'matched_items': List[Dict],
                     'partial_matches': Dict или None
                 }
+                При включенном приближенном сопоставлении (fuzzy_threshold) элементы
+                matched_items дополнительно содержат 'similarity' и 'candidates'.
         """
 
         parsed_conditions = self.parse_conditions_string(symptoms_input)
@@ -386,7 +1252,9 @@ class ExpertSystem:
         }
 
         matched_items = []
-        all_fact_names = list(self.facts.keys())
+        if facts is None:
+            facts = self.facts
+        all_fact_names = list(facts.keys()) if self.fuzzy_threshold is None else []
 
         for condition in parsed_conditions:
             fact_name = condition.get("fact", "")
@@ -394,18 +1262,77 @@ class ExpertSystem:
 
             if isinstance(fact_name, list):
                 for fact in fact_name:
-                    self._match_fact(fact, operator, matched_items, all_fact_names)
+                    self._match_fact(fact, operator, matched_items, all_fact_names, facts)
             else:
-                self._match_fact(fact_name, operator, matched_items, all_fact_names)
+                self._match_fact(fact_name, operator, matched_items, all_fact_names, facts)
 
         result["matched_items"] = matched_items
+        resolved_conditions = self._resolve_conditions(parsed_conditions, matched_items)
+
+        result["conclusions"] = self._collect_conclusions(range(len(self.rules)), resolved_conditions, matched_items)
+
+        if not result["conclusions"]:
+            partial_rules = self._find_partial_matches(matched_items, resolved_conditions)
+            if partial_rules:
+                result["partial_matches"] = {
+                    "message": "Точных выводов не найдено, но есть близкие правила",
+                    "partial_rules": partial_rules
+                }
+
+        return result
+
+    def query_index(self) -> RuleStructureIndex:
+        """Возвращает индекс правил для сопоставления запросов.
+
+        Индекс строится заново только после изменения списка правил.
+
+        Returns:
+            Индекс RuleStructureIndex.
+        """
+
+        version, index = self._query_index_cache
+        if version != self.rules_version or index is None:
+            index = RuleStructureIndex(self.rules)
+            self._query_index_cache = (self.rules_version, index)
+        return index
+
+    def query_batch(self, queries: List[str], facts: Optional[Mapping[str, float]] = None) -> List[Dict]:
+        """Выполняет пакет запросов с общей работой по сопоставлению.
+
+        Одинаковые запросы выполняются один раз, факты запросов сопоставляются
+        по индексу нормализованных имен, правила-кандидаты берутся из
+        query_index (см. QueryBatch).
+
+        Args:
+            queries: Строки запросов.
+            facts: Факты для сопоставления (по умолчанию self.facts).
+
+        Returns:
+            Результаты в порядке запросов в формате query.
+        """
+
+        return QueryBatch(self, facts).run(queries)
+
+    def _collect_conclusions(self, rule_indices: Iterable[int], parsed_conditions: List[Dict],
+                             matched_items: List[Dict]) -> List[Dict]:
+        """Находит выводы правил, структура которых совпадает с запросом.
+
+        Args:
+            rule_indices: Индексы проверяемых правил по возрастанию.
+            parsed_conditions: Разобранные условия запроса.
+            matched_items: Сопоставленные факты.
+
+        Returns:
+            Выводы с CF, отсортированные по убыванию CF.
+        """
 
         possible_conclusions = {}
 
-        for rule in self.rules:
+        for index in rule_indices:
+            rule = self.rules[index]
             if self._check_rule_structure_match(rule, parsed_conditions, matched_items):
-                conclusion_name = rule["then"]
-                rule_cf = rule["cf"]
+                conclusion_name = rule.conclusion
+                rule_cf = rule.cf
 
                 condition_cf = self._calculate_rule_cf(rule, matched_items)
 
@@ -420,28 +1347,17 @@ class ExpertSystem:
                             "name": conclusion_name,
                             "cf": conclusion_cf,
                             "rule_cf": rule_cf,
-                            "conditions": self._format_conditions(rule["if"]),
+                            "conditions": self._format_conditions(rule.conditions),
                             "calculation": calculation_info,
                             "min_condition_cf": condition_cf,
                             "confidence": self._get_confidence_level(conclusion_cf)
                         }
 
-        for conclusion_data in possible_conclusions.values():
-            result["conclusions"].append(conclusion_data)
+        conclusions = list(possible_conclusions.values())
+        conclusions.sort(key=lambda x: x["cf"], reverse=True)
+        return conclusions
 
-        result["conclusions"].sort(key=lambda x: x["cf"], reverse=True)
-
-        if not result["conclusions"]:
-            partial_rules = self._find_partial_matches(matched_items, parsed_conditions)
-            if partial_rules:
-                result["partial_matches"] = {
-                    "message": "Точных выводов не найдено, но есть близкие правила",
-                    "partial_rules": partial_rules
-                }
-
-        return result
-
-    def _check_rule_structure_match(self, rule: Dict, query_conditions: List[Dict], matched_items: List[Dict]) -> bool:
+    def _check_rule_structure_match(self, rule: Rule, query_conditions: List[Dict], matched_items: List[Dict]) -> bool:
         """Проверяет полное соответствие структуры правила и запроса.
 
         Args:
@@ -453,25 +1369,25 @@ class ExpertSystem:
             True если структура правила полностью соответствует запросу.
         """
 
-        rule_conditions = rule["if"]
+        rule_conditions = rule.conditions
 
         if len(rule_conditions) != len(query_conditions):
             return False
 
         for rule_cond, query_cond in zip(rule_conditions, query_conditions):
-            rule_fact = rule_cond.get("fact", "")
+            rule_fact = rule_cond.fact
             query_fact = query_cond.get("fact", "")
 
-            if isinstance(rule_fact, list) and isinstance(query_fact, list):
+            if isinstance(rule_fact, tuple) and isinstance(query_fact, list):
                 if set(rule_fact) != set(query_fact):
                     return False
-            elif isinstance(rule_fact, list) or isinstance(query_fact, list):
+            elif isinstance(rule_fact, tuple) or isinstance(query_fact, list):
                 return False
             else:
                 if rule_fact != query_fact:
                     return False
 
-            rule_operator = rule_cond.get("operator", "").upper()
+            rule_operator = rule_cond.operator.upper()
             query_operator = query_cond.get("operator", "").upper()
 
             rule_op = "AND" if rule_operator in ["", "AND"] else rule_operator
@@ -481,10 +1397,10 @@ class ExpertSystem:
                 return False
 
         for condition in rule_conditions:
-            fact_name = condition.get("fact", "")
-            operator = condition.get("operator", "").upper()
+            fact_name = condition.fact
+            operator = condition.operator.upper()
 
-            if isinstance(fact_name, list):
+            if isinstance(fact_name, tuple):
                 for fact in fact_name:
                     if not self._fact_in_matched(fact, operator, matched_items):
                         return False
@@ -494,19 +1410,26 @@ class ExpertSystem:
 
         return True
 
-    def _match_fact(self, fact_name: str, operator: str, matched_items: List[Dict], all_fact_names: List[str]) -> None:
+    def _match_fact(self, fact_name: str, operator: str, matched_items: List[Dict], all_fact_names: List[str],
+                    facts: Optional[Mapping[str, float]] = None) -> None:
         """Сопоставляет факт с базой знаний.
 
         Ищет точное или нормализованное соответствие между входным фактом
-        и фактами в базе знаний.
+        и фактами в базе знаний, а при заданном fuzzy_threshold - похожие
+        факты по индексу триграмм (_fuzzy_match).
 
         Args:
             fact_name: Факт из запроса.
             operator: Логический оператор.
             matched_items: Список для сохранения сопоставлений.
             all_fact_names: Все факты из базы знаний.
+            facts: Факты для чтения CF (по умолчанию self.facts).
         """
 
+        if self.fuzzy_threshold is not None:
+            matched_items.append(self._fuzzy_match(fact_name, operator, facts))
+            return
+
         matched = False
 
         input_normalized = ' '.join(fact_name.lower().replace('_', ' ').split())
@@ -515,7 +1438,7 @@ class ExpertSystem:
             stored_normalized = ' '.join(stored_fact.lower().replace('_', ' ').split())
 
             if input_normalized == stored_normalized:
-                cf = self.facts[stored_fact]
+                cf = (self.facts if facts is None else facts)[stored_fact]
                 if operator == "NOT":
                     cf = 1.0 - cf
 
@@ -536,6 +1459,68 @@ class ExpertSystem:
                 "operator": operator
             })
 
+    def _fuzzy_match(self, fact_name: str, operator: str, facts: Optional[Mapping[str, float]] = None) -> Dict:
+        """Сопоставляет факт запроса с похожими фактами базы знаний.
+
+        Кандидаты ищутся по индексу триграмм нормализованных имен фактов
+        (fuzzy_index.TrigramIndex) без перебора всех фактов; факт с тем же
+        нормализованным именем всегда идет первым.
+
+        Args:
+            fact_name: Факт из запроса.
+            operator: Логический оператор.
+            facts: Факты для поиска и чтения CF (по умолчанию self.facts).
+
+        Returns:
+            Сопоставление {'input', 'matched_fact', 'cf', 'operator', 'similarity',
+            'candidates': [{'fact', 'similarity', 'cf'}, ...]} с лучшим кандидатом
+            в matched_fact (None, если похожих фактов нет).
+        """
+
+        facts = self.facts if facts is None else facts
+        candidates = []
+        for stored_fact, similarity in similar_facts(facts, fact_name, self.fuzzy_threshold, self.fuzzy_limit):
+            cf = facts[stored_fact]
+            if operator == "NOT":
+                cf = 1.0 - cf
+            candidates.append({"fact": stored_fact, "similarity": similarity, "cf": cf})
+
+        best = candidates[0] if candidates else {"fact": None, "similarity": 0.0, "cf": 0.0}
+        return {
+            "input": fact_name,
+            "matched_fact": best["fact"],
+            "cf": best["cf"],
+            "operator": operator,
+            "similarity": best["similarity"],
+            "candidates": candidates
+        }
+
+    def _resolve_conditions(self, parsed_conditions: List[Dict], matched_items: List[Dict]) -> List[Dict]:
+        """Заменяет факты условий запроса сопоставленными фактами базы знаний.
+
+        Применяется при приближенном сопоставлении, чтобы структура запроса
+        с опечатками совпадала со структурой правил; без него условия
+        возвращаются как есть.
+
+        Args:
+            parsed_conditions: Разобранные условия запроса.
+            matched_items: Сопоставления фактов в порядке условий.
+
+        Returns:
+            Условия с фактами базы знаний вместо фактов запроса.
+        """
+
+        if self.fuzzy_threshold is None:
+            return parsed_conditions
+
+        items = iter(matched_items)
+        resolved = []
+        for condition in parsed_conditions:
+            fact = condition.get("fact", "")
+            names = [next(items)["matched_fact"] or name for name in (fact if isinstance(fact, list) else [fact])]
+            resolved.append(dict(condition, fact=names if isinstance(fact, list) else names[0]))
+        return resolved
+
     def _facts_match(self, input_fact: str, stored_fact: str) -> bool:
         """Проверяет, соответствует ли входной факт сохраненному факту.
 
@@ -580,7 +1565,7 @@ class ExpertSystem:
                     return item["cf"] > 0
         return False
 
-    def _calculate_rule_cf(self, rule: Dict, matched_items: List[Dict]) -> float:
+    def _calculate_rule_cf(self, rule: Rule, matched_items: List[Dict]) -> float:
         """Рассчитывает CF для правил на основе сопоставленных фактов.
 
         Args:
@@ -593,12 +1578,11 @@ class ExpertSystem:
 
         condition_cfs = []
 
-        for condition in rule["if"]:
-            fact_name = condition.get("fact", "")
-            operator = condition.get("operator", "").upper()
-            is_group = condition.get("is_group", False)
+        for condition in rule.conditions:
+            fact_name = condition.fact
+            operator = condition.operator.upper()
 
-            if is_group and isinstance(fact_name, list):
+            if condition.is_group and isinstance(fact_name, tuple):
                 group_cfs = []
                 for fact in fact_name:
                     cf = self._get_matched_cf(fact, operator, matched_items)
@@ -618,7 +1602,7 @@ class ExpertSystem:
         result = condition_cfs[0]
 
         for i in range(1, len(condition_cfs)):
-            operator = rule["if"][i - 1].get("operator", "").upper()
+            operator = rule.conditions[i - 1].operator.upper()
             next_cf = condition_cfs[i]
 
             if operator == "AND":
@@ -655,7 +1639,7 @@ class ExpertSystem:
                 return cf
         return 0.0
 
-    def _format_conditions(self, conditions: List[Dict]) -> List[str]:
+    def _format_conditions(self, conditions: Tuple[Condition, ...]) -> List[str]:
         """Форматирует условия для отображения.
 
         Args:
@@ -668,12 +1652,13 @@ class ExpertSystem:
         formatted = []
 
         for condition in conditions:
-            fact = condition.get("fact", "")
-            operator = condition.get("operator", "").upper()
-            is_group = condition.get("is_group", False)
+            fact = condition.fact
+            operator = condition.operator.upper()
 
-            if is_group and isinstance(fact, list):
+            if condition.is_group and isinstance(fact, tuple):
                 text = f"({', '.join(fact)})"
+            elif condition.is_group and wildcard_prefix(fact) is not None:
+                text = f"({fact})"
             else:
                 text = fact
 
@@ -687,7 +1672,7 @@ class ExpertSystem:
 
         return formatted
 
-    def _format_calculation(self, rule: Dict, matched_items: List[Dict], rule_cf: float, conclusion_cf: float) -> str:
+    def _format_calculation(self, rule: Rule, matched_items: List[Dict], rule_cf: float, conclusion_cf: float) -> str:
         """Форматирует строку расчета.
 
         Создает человекочитаемое представление вычисления CF.
@@ -704,12 +1689,11 @@ class ExpertSystem:
 
         parts = []
 
-        for i, condition in enumerate(rule["if"]):
-            fact = condition.get("fact", "")
-            operator = condition.get("operator", "").upper()
-            is_group = condition.get("is_group", False)
+        for i, condition in enumerate(rule.conditions):
+            fact = condition.fact
+            operator = condition.operator.upper()
 
-            if is_group and isinstance(fact, list):
+            if condition.is_group and isinstance(fact, tuple):
                 group_parts = []
                 for f in fact:
                     cf = self._get_matched_cf(f, operator, matched_items)
@@ -721,7 +1705,7 @@ class ExpertSystem:
                 cf = self._get_matched_cf(fact, operator, matched_items)
                 parts.append(f"{cf:.2f}")
 
-            if operator in ["AND", "OR"] and i < len(rule["if"]) - 1:
+            if operator in ["AND", "OR"] and i < len(rule.conditions) - 1:
                 parts.append(operator.lower())
 
         if len(parts) == 1:
@@ -731,7 +1715,8 @@ class ExpertSystem:
 
         return f"{expression} × {rule_cf:.2f} = {conclusion_cf:.4f}"
 
-    def _find_partial_matches(self, matched_items: List[Dict], query_conditions: List[Dict]) -> List[Dict]:
+    def _find_partial_matches(self, matched_items: List[Dict], query_conditions: List[Dict],
+                              rule_indices: Optional[Iterable[int]] = None) -> List[Dict]:
         """Находит частичные совпадения с правилами.
 
         Ищет правила, которые частично соответствуют запросу
@@ -740,24 +1725,25 @@ class ExpertSystem:
         Args:
             matched_items: Сопоставленные факты.
             query_conditions: Условия запроса.
+            rule_indices: Индексы проверяемых правил по возрастанию (по умолчанию все правила).
 
         Returns:
             Список частично совпадающих правил.
         """
 
         partial_rules = []
+        rules = self.rules if rule_indices is None else [self.rules[index] for index in rule_indices]
 
-        for rule in self.rules:
+        for rule in rules:
             matched_count = 0
             total_conditions = 0
             missing = []
 
-            for condition in rule["if"]:
-                fact = condition.get("fact", "")
-                operator = condition.get("operator", "").upper()
-                is_group = condition.get("is_group", False)
+            for condition in rule.conditions:
+                fact = condition.fact
+                operator = condition.operator.upper()
 
-                if is_group and isinstance(fact, list):
+                if condition.is_group and isinstance(fact, tuple):
                     for f in fact:
                         total_conditions += 1
                         if self._fact_in_matched(f, operator, matched_items):
@@ -773,7 +1759,7 @@ class ExpertSystem:
 
             if matched_count > 0 and matched_count < total_conditions:
                 partial_rules.append({
-                    "conclusion": rule["then"],
+                    "conclusion": rule.conclusion,
                     "matched": matched_count,
                     "total": total_conditions,
                     "missing": missing
@@ -802,11 +1788,16 @@ class ExpertSystem:
         else:
             return "очень низкая"
 
-    def load_from_dict(self, data: dict):
+    def load_from_dict(self, data: dict, analyze: bool = False, optimize: bool = False) -> Optional[Dict]:
         """Загружает состояние системы из словаря.
 
         Args:
             data: Словарь с данными системы {'facts': {...}, 'rules': [...]}
+            analyze: Выполнить статический анализ загруженной базы знаний.
+            optimize: Включить вывод по сокращенному набору правил (подразумевает analyze).
+
+        Returns:
+            Отчет анализа, если запрошен analyze или optimize, иначе None.
         """
 
         self.facts = data.get("facts", {})
@@ -814,6 +1805,138 @@ class ExpertSystem:
 
         for rule in data.get("rules", []):
             self.add_rule(rule["if"], rule["then"], rule["cf"])
+        self._base_facts = dict(self.facts)
+
+        return self._analyze_loaded(analyze, optimize)
+
+    def reload_from_dict(self, data: dict, analyze: bool = False, optimize: bool = False) -> Dict:
+        """Перезагружает базу знаний по разнице с загруженной версией.
+
+        Новая версия сравнивается с исходными фактами и правилами последней
+        загрузки (KnowledgeBaseDiff), и применяется только разница: объекты
+        неизменных правил, узлы сети условий, индекс зависимостей и журнал
+        происхождения переиспользуются, новые правила докомпилируются.
+        Если после загрузки выполнялся infer, заново выводятся только
+        затронутые выводы: факты, достижимые по правилам от измененных
+        фактов и выводов добавленных и удаленных правил, сбрасываются к
+        исходным значениям и распространяются от них (_propagate).
+        Для баз знаний без NOT над выводимыми фактами результат совпадает
+        с load_from_dict и последующим infer (epsilon = 0, без бюджета),
+        иначе - с load_from_dict. Если исходные факты неизвестны (факты
+        заменялись целиком после загрузки), выполняется полная загрузка.
+
+        Args:
+            data: Словарь с данными системы {'facts': {...}, 'rules': [...]}
+            analyze: Выполнить статический анализ загруженной базы знаний.
+            optimize: Включить вывод по сокращенному набору правил (подразумевает analyze).
+
+        Returns:
+            Отчет о перезагрузке:
+                {'mode': 'diff' | 'full', 'facts': {'added', 'removed', 'changed'},
+                 'rules': {'added', 'removed', 'unchanged'},
+                 'reinferred': {'conclusions', 'evaluations', 'firings'} или None,
+                 'analysis': Dict (если запрошен analyze или optimize)}
+        """
+
+        if self._base_facts is None:
+            analysis = self.load_from_dict(data, analyze=analyze, optimize=optimize)
+            report = {"mode": "full", "reinferred": None}
+            if analysis is not None:
+                report["analysis"] = analysis
+            return report
+
+        version, keys = self._rule_keys_cache
+        diff = KnowledgeBaseDiff(self._base_facts, self.rules, data, self._make_rule,
+                                 keys if version == self.rules_version else None)
+        report = {"mode": "diff", **diff.summary(), "reinferred": None}
+        affected = set(diff.added_facts) | set(diff.removed_facts) | set(diff.changed_facts)
+        old_rules = self.rules
+        old_version = self.rules_version
+        rule_map = diff.rule_map(len(old_rules))
+
+        if diff.rules_changed:
+            dependents = remap_dependents(self._rule_dependents(), rule_map, diff.rules, diff.added_rules)
+            affected.update(rule.conclusion for rule in (old_rules[index] for index in diff.removed_rules)
+                            if isinstance(rule.conclusion, str))
+            affected.update(rule.conclusion for rule in (diff.rules[index] for index in diff.added_rules)
+                            if isinstance(rule.conclusion, str))
+
+            version, network = self._network_cache
+            if version != self.rules_version or network is None \
+                    or network.retired + len(diff.removed_rules) > len(diff.rules) // 4:
+                network = None
+            else:
+                network.rebind(diff.rules, diff.previous)
+
+            self._rules = diff.rules
+            self.rules_version = next_version()
+            self._dependents_cache = (self.rules_version, dependents)
+            self._network_cache = (self.rules_version if network is not None else None, network)
+        else:
+            dependents = self._rule_dependents()
+
+        facts = self.facts
+        if self._inferred and affected:
+            rules = self.rules
+            cone = self._conclusion_cone(affected, dependents)
+
+            provenance = self.provenance if self.provenance.enabled else None
+            if provenance is not None:
+                if provenance.rules_version == old_version:
+                    provenance.rebase(self.rules_version, rules, rule_map, cone)
+                else:
+                    provenance.begin(self.rules_version, rules)
+
+            for fact in cone:
+                if fact in diff.facts:
+                    facts[fact] = diff.facts[fact]
+                elif fact in facts:
+                    del facts[fact]
+
+            result = self._propagate(facts, list(cone), seed_rules=self._cone_rules(cone), provenance=provenance)
+            report["reinferred"] = {
+                "conclusions": len(cone),
+                "evaluations": result["evaluations"],
+                "firings": result["firings"]
+            }
+        else:
+            for fact in diff.removed_facts:
+                facts.pop(fact, None)
+            for fact in diff.added_facts + diff.changed_facts:
+                facts[fact] = diff.facts[fact]
+
+        self._base_facts = diff.facts
+        self._base_version = next_version()
+        self._rule_keys_cache = (self.rules_version, diff.keys)
+        analysis = self._analyze_loaded(analyze, optimize)
+        if analysis is not None:
+            report["analysis"] = analysis
+        return report
+
+    def _analyze_loaded(self, analyze: bool, optimize: bool) -> Optional[Dict]:
+        """Выполняет анализ после загрузки базы знаний, если он запрошен.
+
+        Args:
+            analyze: Выполнить статический анализ загруженной базы знаний.
+            optimize: Включить вывод по сокращенному набору правил (подразумевает analyze);
+                False выключает его, даже если он был включен раньше.
+
+        Returns:
+            Отчет анализа, если запрошен analyze или optimize, иначе None.
+        """
+
+        self.optimize_inference = optimize
+
+        if not (analyze or optimize):
+            return None
+
+        analyzer = KnowledgeBaseAnalyzer(self.facts, self.rules)
+        report = analyzer.analyze()
+        if optimize:
+            self._inference_plan_cache = (
+                (self.rules_version, self._base_version), analyzer.optimized_rule_indices(report)
+            )
+        return report
 
     def to_dict(self):
         """Преобразует состояние системы в словарь.
@@ -824,5 +1947,14 @@ class ExpertSystem:
 
         return {
             "facts": self.facts,
-            "rules": self.rules
-        }
\ No newline at end of file
+            "rules": self.rules_as_dicts()
+        }
+
+    def rules_as_dicts(self) -> List[Dict]:
+        """Преобразует правила в формат JSON-файлов базы знаний.
+
+        Returns:
+            Список словарей вида {'if': [...], 'then': вывод, 'cf': CF}.
+        """
+
+        return [rule.to_dict() for rule in self.rules]
\ No newline at end of file
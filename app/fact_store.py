@@ -0,0 +1,140 @@
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+from app.fact_trie import FactTrie
+from app.fuzzy_index import TrigramIndex
+
+
+_version_counter = itertools.count(1)
+
+
+def next_version() -> int:
+    """Возвращает следующий номер версии базы знаний.
+
+    Счетчик общий для всех хранилищ процесса, поэтому версия
+    не повторяется даже после замены словаря фактов новым.
+
+    Returns:
+        Монотонно возрастающий номер версии.
+    """
+
+    return next(_version_counter)
+
+
+class FactStore(dict):
+    """Словарь фактов, отслеживающий версию своих изменений.
+
+    Ведет себя как обычный dict (сериализуется в JSON без преобразований),
+    но при каждой записи или удалении обновляет атрибут version.
+    Индексы имен - префиксное дерево для шаблонных условий и индекс
+    триграмм для приближенного сопоставления запросов - строятся при первом
+    поиске и дальше поддерживаются при каждом изменении.
+
+    Attributes:
+        version (int): Версия последнего изменения фактов.
+    """
+
+    _trie: Optional[FactTrie] = None
+    _fuzzy: Optional[TrigramIndex] = None
+
+    def __init__(self, *args, **kwargs):
+        """Конструктор хранилища фактов."""
+
+        super().__init__(*args, **kwargs)
+        self.version = next_version()
+        self._trie: Optional[FactTrie] = None
+        self._fuzzy: Optional[TrigramIndex] = None
+
+    def __getstate__(self):
+        return {"version": self.version, "_trie": None, "_fuzzy": None}
+
+    def __setitem__(self, key: str, value: float):
+        if (self._trie is not None or self._fuzzy is not None) and key not in self:
+            self._index(key)
+        super().__setitem__(key, value)
+        self.version = next_version()
+
+    def __delitem__(self, key: str):
+        super().__delitem__(key)
+        self._unindex(key)
+        self.version = next_version()
+
+    def __ior__(self, other: Dict[str, float]):
+        self.update(other)
+        return self
+
+    def update(self, *args, **kwargs):
+        items = dict(*args, **kwargs)
+        super().update(items)
+        for key in items:
+            self._index(key)
+        self.version = next_version()
+
+    def pop(self, key: str, *default):
+        value = super().pop(key, *default)
+        self._unindex(key)
+        self.version = next_version()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._unindex(item[0])
+        self.version = next_version()
+        return item
+
+    def setdefault(self, key: str, default: float = None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def clear(self):
+        super().clear()
+        self._trie = None
+        self._fuzzy = None
+        self.version = next_version()
+
+    def prefix_matches(self, prefix: str) -> List[str]:
+        """Находит факты, названия которых начинаются с префикса.
+
+        Args:
+            prefix: Префикс названия.
+
+        Returns:
+            Названия фактов с префиксом.
+        """
+
+        if self._trie is None:
+            self._trie = FactTrie(self)
+        return self._trie.matches(prefix)
+
+    def fuzzy_matches(self, name: str, threshold: float, limit: int) -> List[Tuple[str, float]]:
+        """Находит факты с названиями, похожими на заданное.
+
+        Args:
+            name: Название из запроса.
+            threshold: Минимальное сходство (от 0 до 1).
+            limit: Максимальное количество результатов.
+
+        Returns:
+            Пары (название факта, сходство) по убыванию сходства (см. TrigramIndex.search).
+        """
+
+        if self._fuzzy is None:
+            self._fuzzy = TrigramIndex(self)
+        return self._fuzzy.search(name, threshold, limit)
+
+    def _index(self, key: str):
+        """Добавляет название факта в построенные индексы."""
+
+        if self._trie is not None:
+            self._trie.add(key)
+        if self._fuzzy is not None:
+            self._fuzzy.add(key)
+
+    def _unindex(self, key: str):
+        """Удаляет название факта из построенных индексов."""
+
+        if self._trie is not None:
+            self._trie.discard(key)
+        if self._fuzzy is not None:
+            self._fuzzy.discard(key)
@@ -0,0 +1,304 @@
+from typing import Dict, Iterable, List, Mapping, Optional
+
+from app.model import Rule
+
+
+WILDCARD = "*"
+
+
+class FactTrie:
+    """Префиксное дерево имен фактов.
+
+    Узел - словарь "символ -> дочерний узел"; имя, заканчивающееся в узле,
+    хранится в нем под ключом None. Добавление и удаление имени стоят
+    O(длина имени), поиск имен с префиксом - O(длина префикса + число
+    найденных имен и узлов под префиксом), независимо от общего числа имен.
+
+    Attributes:
+        size (int): Количество имен в дереве
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        """
+        Конструктор дерева.
+
+        Args:
+            names (Iterable[str]): Начальные имена (не строки пропускаются)
+        """
+
+        self._root: Dict = {}
+        self.size = 0
+        for name in names:
+            self.add(name)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __contains__(self, name) -> bool:
+        node = self._find(name) if isinstance(name, str) else None
+        return node is not None and None in node
+
+    def add(self, name: str):
+        """
+        Добавить имя.
+
+        Args:
+            name (str): Имя факта (не строки пропускаются)
+        """
+
+        if not isinstance(name, str):
+            return
+        node = self._root
+        for char in name:
+            child = node.get(char)
+            if child is None:
+                child = node[char] = {}
+            node = child
+        if None not in node:
+            node[None] = name
+            self.size += 1
+
+    def discard(self, name: str):
+        """
+        Удалить имя, если оно есть, вместе с опустевшими узлами.
+
+        Args:
+            name (str): Имя факта
+        """
+
+        if not isinstance(name, str):
+            return
+        path = []
+        node = self._root
+        for char in name:
+            child = node.get(char)
+            if child is None:
+                return
+            path.append((node, char))
+            node = child
+        if None not in node:
+            return
+
+        del node[None]
+        self.size -= 1
+        while path and not node:
+            node, char = path.pop()
+            del node[char]
+
+    def has_prefix(self, prefix: str) -> bool:
+        """
+        Проверить, есть ли имена с заданным префиксом.
+
+        Args:
+            prefix (str): Префикс
+
+        Returns:
+            bool: True, если хотя бы одно имя начинается с префикса
+        """
+
+        return self._find(prefix) is not None
+
+    def matches(self, prefix: str) -> List[str]:
+        """
+        Найти все имена с заданным префиксом.
+
+        Args:
+            prefix (str): Префикс
+
+        Returns:
+            List[str]: Имена с префиксом (включая сам префикс, если это имя)
+        """
+
+        node = self._find(prefix)
+        if node is None:
+            return []
+
+        names = []
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for char, child in node.items():
+                if char is None:
+                    names.append(child)
+                else:
+                    stack.append(child)
+        return names
+
+    def prefixes_of(self, name: str) -> List[str]:
+        """
+        Найти все имена дерева, являющиеся префиксами заданного имени.
+
+        Args:
+            name (str): Имя
+
+        Returns:
+            List[str]: Имена-префиксы от коротких к длинным
+        """
+
+        if not isinstance(name, str):
+            return []
+        prefixes = []
+        node = self._root
+        if None in node:
+            prefixes.append(node[None])
+        for char in name:
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node:
+                prefixes.append(node[None])
+        return prefixes
+
+    def _find(self, prefix: str) -> Optional[Dict]:
+        """
+        Найти узел префикса.
+
+        Args:
+            prefix (str): Префикс
+
+        Returns:
+            Optional[Dict]: Узел или None, если имен с таким префиксом нет
+        """
+
+        node = self._root
+        for char in prefix:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node
+
+
+class WildcardIndex:
+    """Индекс правил с шаблонными условиями: префикс -> правила, читающие его.
+
+    Дополняет analyzer.fact_dependents: факт влияет на шаблон, если имя
+    факта начинается с префикса шаблона, поэтому правила, зависящие от
+    факта, находятся по префиксам его имени в дереве шаблонов.
+
+    Attributes:
+        prefixes (FactTrie): Префиксы шаблонов условий
+        rules (Dict[str, List[int]]): Индексы правил по возрастанию для каждого префикса
+    """
+
+    def __init__(self, rules: List[Rule]):
+        """
+        Конструктор индекса.
+
+        Args:
+            rules (List[Rule]): Правила экспертной системы
+        """
+
+        self.rules: Dict[str, List[int]] = {}
+        for index, rule in enumerate(rules):
+            for prefix in dict.fromkeys(rule_wildcards(rule)):
+                self.rules.setdefault(prefix, []).append(index)
+        self.prefixes = FactTrie(self.rules)
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def readers(self, fact: str) -> List[int]:
+        """
+        Получить правила, шаблоны которых покрывают факт.
+
+        Args:
+            fact (str): Название факта
+
+        Returns:
+            List[int]: Индексы правил (без упорядочивания, возможны повторы)
+        """
+
+        readers = []
+        for prefix in self.prefixes.prefixes_of(fact):
+            readers.extend(self.rules[prefix])
+        return readers
+
+
+def wildcard_prefix(fact) -> Optional[str]:
+    """
+    Получить префикс шаблона факта.
+
+    Шаблон - имя факта, заканчивающееся на '*': 'симптом_кашель_*'
+    соответствует всем фактам, имена которых начинаются с 'симптом_кашель_'.
+
+    Args:
+        fact: Имя факта из условия
+
+    Returns:
+        Optional[str]: Префикс или None, если это не шаблон
+    """
+
+    if isinstance(fact, str) and fact.endswith(WILDCARD):
+        return fact[:-1]
+    return None
+
+
+def rule_wildcards(rule: Rule) -> List[str]:
+    """
+    Получить префиксы шаблонов в условиях правила.
+
+    Args:
+        rule (Rule): Правило
+
+    Returns:
+        List[str]: Префиксы в порядке условий
+    """
+
+    prefixes = []
+    for condition in rule.conditions:
+        fact = condition.fact
+        for member in fact if condition.is_group and isinstance(fact, tuple) else (fact,):
+            prefix = wildcard_prefix(member)
+            if prefix is not None:
+                prefixes.append(prefix)
+    return prefixes
+
+
+def match_facts(facts: Mapping[str, float], prefix: str) -> List[str]:
+    """
+    Найти факты с заданным префиксом.
+
+    Для словарей с индексом (FactStore, FactOverlay) поиск идет
+    по префиксному дереву, для остальных - перебором.
+
+    Args:
+        facts (Mapping[str, float]): Факты
+        prefix (str): Префикс
+
+    Returns:
+        List[str]: Имена фактов с префиксом
+    """
+
+    prefix_matches = getattr(facts, "prefix_matches", None)
+    if prefix_matches is not None:
+        return prefix_matches(prefix)
+    return [fact for fact in facts if isinstance(fact, str) and fact.startswith(prefix)]
+
+
+def wildcard_value(facts: Mapping[str, float], prefix: str, negated: bool = False, every: bool = False) -> float:
+    """
+    Вычислить CF шаблонного условия.
+
+    CF шаблона - максимум ("любой" факт) или минимум ("все" факты) CF
+    фактов с префиксом; НЕТ применяется к каждому факту. Если подходящих
+    фактов нет, шаблон ведет себя как отсутствующий факт (0, под НЕТ - 1).
+
+    Args:
+        facts (Mapping[str, float]): Факты
+        prefix (str): Префикс шаблона
+        negated (bool): Применить НЕТ к каждому факту
+        every (bool): Агрегировать минимумом ("все") вместо максимума ("любой")
+
+    Returns:
+        float: CF шаблона
+    """
+
+    get = facts.get
+    names = match_facts(facts, prefix)
+    if not names:
+        return 1.0 if negated else 0.0
+    if negated:
+        cfs = [1.0 - get(name, 0.0) for name in names]
+    else:
+        cfs = [get(name, 0.0) for name in names]
+    return min(cfs) if every else max(cfs)
@@ -0,0 +1,204 @@
+import heapq
+import math
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, Tuple
+
+from app.query_index import normalize_fact_name
+
+
+def trigrams(normalized: str) -> FrozenSet[str]:
+    """
+    Получить триграммы нормализованного имени.
+
+    Триграммы строятся по каждому слову отдельно (слово дополняется двумя
+    пробелами слева и одним справа), поэтому множество триграмм не зависит
+    от порядка слов.
+
+    Args:
+        normalized (str): Нормализованное имя (normalize_fact_name)
+
+    Returns:
+        FrozenSet[str]: Множество триграмм
+    """
+
+    grams = set()
+    for word in normalized.split():
+        padded = f"  {word} "
+        for position in range(len(padded) - 2):
+            grams.add(padded[position:position + 3])
+    return frozenset(grams)
+
+
+class TrigramIndex:
+    """Инвертированный индекс триграмм нормализованных имен фактов.
+
+    Сходство имен - коэффициент Жаккара их множеств триграмм. Кандидаты
+    ищутся по спискам самых редких триграмм запроса: имя со сходством
+    не меньше порога обязано содержать хотя бы одну из них, поэтому
+    просматриваются только имена с общими редкими триграммами, а не все
+    факты (и из них - только с подходящим по порогу числом триграмм).
+    При пороге не больше 0 подходит любое имя, в том числе без общих
+    триграмм, и просматриваются все имена.
+    Добавление и удаление имени обновляют только его триграммы.
+
+    Attributes:
+        size (int): Количество различных нормализованных имен
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        """
+        Конструктор индекса.
+
+        Args:
+            names (Iterable[str]): Начальные имена фактов (не строки пропускаются)
+        """
+
+        self._postings: Dict[str, Set[str]] = {}
+        self._grams: Dict[str, FrozenSet[str]] = {}
+        self._names: Dict[str, List[str]] = {}
+        for name in names:
+            self.add(name)
+
+    @property
+    def size(self) -> int:
+        """Количество различных нормализованных имен."""
+
+        return len(self._names)
+
+    def add(self, name: str):
+        """
+        Добавить имя факта.
+
+        Args:
+            name (str): Имя факта
+        """
+
+        if not isinstance(name, str):
+            return
+        key = normalize_fact_name(name)
+        stored = self._names.get(key)
+        if stored is not None:
+            if name not in stored:
+                stored.append(name)
+            return
+
+        self._names[key] = [name]
+        grams = trigrams(key)
+        self._grams[key] = grams
+        for gram in grams:
+            self._postings.setdefault(gram, set()).add(key)
+
+    def discard(self, name: str):
+        """
+        Удалить имя факта, если оно есть.
+
+        Args:
+            name (str): Имя факта
+        """
+
+        if not isinstance(name, str):
+            return
+        key = normalize_fact_name(name)
+        stored = self._names.get(key)
+        if stored is None or name not in stored:
+            return
+
+        stored.remove(name)
+        if stored:
+            return
+        del self._names[key]
+        for gram in self._grams.pop(key):
+            postings = self._postings[gram]
+            postings.discard(key)
+            if not postings:
+                del self._postings[gram]
+
+    def search(self, name: str, threshold: float, limit: int) -> List[Tuple[str, float]]:
+        """
+        Найти имена фактов, похожие на заданное.
+
+        Args:
+            name (str): Имя из запроса
+            threshold (float): Минимальное сходство (от 0 до 1)
+            limit (int): Максимальное количество результатов
+
+        Returns:
+            List[Tuple[str, float]]: Пары (имя факта, сходство) по убыванию сходства;
+                имя с тем же нормализованным видом (сходство 1.0) - первым
+        """
+
+        if limit < 1:
+            return []
+        key = normalize_fact_name(name)
+        grams = trigrams(key)
+        results = []
+        if key in self._names:
+            results.append((self._names[key][0], 1.0))
+
+        if grams:
+            if threshold > 0:
+                required = max(1, math.ceil(threshold * len(grams) - 1e-9))
+                rare = sorted(grams, key=lambda gram: len(self._postings.get(gram, ())))
+                candidates = set()
+                for gram in rare[:len(grams) - required + 1]:
+                    candidates.update(self._postings.get(gram, ()))
+            else:
+                candidates = set(self._grams)
+            candidates.discard(key)
+
+            shortest = threshold * len(grams)
+            longest = len(grams) / threshold if threshold > 0 else math.inf
+            scored = []
+            for candidate in candidates:
+                other = self._grams[candidate]
+                if not shortest <= len(other) <= longest:
+                    continue
+                shared = len(grams & other)
+                similarity = shared / (len(grams) + len(other) - shared)
+                if similarity >= threshold:
+                    scored.append((-similarity, candidate))
+            for negative, candidate in heapq.nsmallest(limit - len(results), scored):
+                results.append((self._names[candidate][0], -negative))
+
+        return results
+
+
+def similar_facts(facts: Mapping[str, float], name: str, threshold: float, limit: int) -> List[Tuple[str, float]]:
+    """
+    Найти факты, похожие на имя из запроса.
+
+    Для словарей с индексом (FactStore, FactOverlay) используется их
+    индекс триграмм, для остальных индекс строится на время вызова.
+
+    Args:
+        facts (Mapping[str, float]): Факты
+        name (str): Имя из запроса
+        threshold (float): Минимальное сходство
+        limit (int): Максимальное количество результатов
+
+    Returns:
+        List[Tuple[str, float]]: Пары (имя факта, сходство) (см. TrigramIndex.search)
+    """
+
+    fuzzy_matches = getattr(facts, "fuzzy_matches", None)
+    if fuzzy_matches is not None:
+        return fuzzy_matches(name, threshold, limit)
+    return TrigramIndex(facts).search(name, threshold, limit)
+
+
+def merge_matches(groups: Iterable[List[Tuple[str, float]]], limit: int,
+                  excluded: Optional[Set[str]] = None) -> List[Tuple[str, float]]:
+    """
+    Объединить результаты поиска нескольких индексов.
+
+    Args:
+        groups (Iterable[List[Tuple[str, float]]]): Результаты TrigramIndex.search
+        limit (int): Максимальное количество результатов
+        excluded (Optional[Set[str]]): Исключаемые имена фактов
+
+    Returns:
+        List[Tuple[str, float]]: Пары (имя факта, сходство) по убыванию сходства
+    """
+
+    merged = [match for group in groups for match in group if not excluded or match[0] not in excluded]
+    merged.sort(key=lambda match: -match[1])
+    return merged[:limit]
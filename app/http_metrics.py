@@ -0,0 +1,323 @@
+import asyncio
+import functools
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from fastapi.routing import APIRoute
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current_timing: ContextVar[Optional["ServerTiming"]] = ContextVar("server_timing", default=None)
+
+
+class ServerTiming:
+    """Разбивка времени обработки одного запроса по фазам.
+
+    Фазы: parse (маршрутизация, чтение и валидация тела запроса),
+    engine (работа ExpertSystem), serialize (кодирование ответа в JSON)
+    и io (работа с файлами баз знаний).
+
+    Attributes:
+        started (float): Момент начала обработки запроса (perf_counter)
+        phases (Dict[str, float]): Длительность фаз в секундах
+    """
+
+    def __init__(self):
+        """Конструктор разбивки времени запроса."""
+
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+
+    def add(self, name: str, seconds: float):
+        """
+        Добавить время к фазе.
+
+        Args:
+            name (str): Название фазы
+            seconds (float): Длительность в секундах
+        """
+
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def end_parse(self):
+        """Отметить начало работы обработчика endpoint и завершение фазы parse."""
+
+        elapsed = time.perf_counter() - self.started
+        self.add("parse", max(0.0, elapsed - sum(self.phases.values())))
+
+    def header(self, total: float) -> str:
+        """
+        Сформировать значение заголовка Server-Timing.
+
+        Args:
+            total (float): Полное время обработки запроса в секундах
+
+        Returns:
+            str: Значение заголовка вида "parse;dur=0.12, engine;dur=3.40, total;dur=3.90"
+        """
+
+        parts = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in self.phases.items()]
+        parts.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(parts)
+
+
+def start_request_timing() -> ServerTiming:
+    """
+    Начать учет фаз для текущего запроса.
+
+    Returns:
+        ServerTiming: Разбивка времени текущего запроса
+    """
+
+    timing = ServerTiming()
+    _current_timing.set(timing)
+    return timing
+
+
+def current_timing() -> Optional[ServerTiming]:
+    """
+    Получить разбивку времени текущего запроса.
+
+    Returns:
+        Optional[ServerTiming]: Разбивка времени или None вне обработки запроса
+    """
+
+    return _current_timing.get()
+
+
+@contextmanager
+def timed_phase(name: str):
+    """
+    Контекстный менеджер для учета времени фазы текущего запроса.
+
+    Вне обработки HTTP-запроса ничего не делает.
+
+    Args:
+        name (str): Название фазы (parse, engine, serialize, io)
+    """
+
+    timing = _current_timing.get()
+    if timing is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timing.add(name, time.perf_counter() - started)
+
+
+class TimedRoute(APIRoute):
+    """Маршрут FastAPI, отмечающий завершение фазы parse перед вызовом endpoint."""
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        if asyncio.iscoroutinefunction(endpoint):
+            original = endpoint
+
+            @functools.wraps(original)
+            async def timed_endpoint(*endpoint_args, **endpoint_kwargs):
+                timing = _current_timing.get()
+                if timing is not None:
+                    timing.end_parse()
+                return await original(*endpoint_args, **endpoint_kwargs)
+
+            endpoint = timed_endpoint
+
+        super().__init__(path, endpoint, **kwargs)
+
+
+class LatencyHistogram:
+    """Гистограмма задержек с фиксированными границами корзин.
+
+    Attributes:
+        buckets (Tuple[float, ...]): Верхние границы корзин в секундах
+        counts (List[int]): Количество наблюдений в каждой корзине (последняя - +Inf)
+        count (int): Общее количество наблюдений
+        total (float): Сумма наблюдений в секундах
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        """
+        Конструктор гистограммы.
+
+        Args:
+            buckets (Tuple[float, ...]): Верхние границы корзин в секундах
+        """
+
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        """
+        Учесть наблюдение.
+
+        Args:
+            seconds (float): Длительность в секундах
+        """
+
+        self.counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Оценить квантиль по гистограмме (верхняя граница корзины).
+
+        Args:
+            q (float): Квантиль от 0 до 1
+
+        Returns:
+            Optional[float]: Оценка квантиля в секундах или None, если квантиль
+                превышает последнюю границу корзин
+        """
+
+        if not self.count:
+            return 0.0
+
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return self.buckets[index] if index < len(self.buckets) else None
+        return None
+
+
+class EndpointStats:
+    """Статистика HTTP-запросов к одному endpoint.
+
+    Attributes:
+        latency (LatencyHistogram): Гистограмма задержек
+        request_bytes (int): Суммарный размер тел запросов
+        response_bytes (int): Суммарный размер тел ответов
+        statuses (Dict[int, int]): Количество ответов по кодам статуса
+        phases (Dict[str, float]): Суммарное время по фазам в секундах
+    """
+
+    def __init__(self):
+        """Конструктор статистики endpoint."""
+
+        self.latency = LatencyHistogram()
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.statuses: Dict[int, int] = {}
+        self.phases: Dict[str, float] = {}
+
+
+class HttpMetrics:
+    """Реестр HTTP-метрик приложения по endpoint.
+
+    Attributes:
+        endpoints (Dict[Tuple[str, str], EndpointStats]): Статистика по паре (метод, шаблон пути)
+    """
+
+    def __init__(self):
+        """Конструктор реестра HTTP-метрик."""
+
+        self.endpoints: Dict[Tuple[str, str], EndpointStats] = {}
+
+    def record(self, method: str, path: str, status: int, seconds: float,
+               request_bytes: int, response_bytes: int, phases: Dict[str, float]):
+        """
+        Учесть обработанный запрос.
+
+        Args:
+            method (str): HTTP-метод
+            path (str): Шаблон пути маршрута
+            status (int): Код статуса ответа
+            seconds (float): Полное время обработки в секундах
+            request_bytes (int): Размер тела запроса
+            response_bytes (int): Размер тела ответа
+            phases (Dict[str, float]): Время по фазам в секундах
+        """
+
+        stats = self.endpoints.get((method, path))
+        if stats is None:
+            stats = self.endpoints[(method, path)] = EndpointStats()
+
+        stats.latency.observe(seconds)
+        stats.request_bytes += request_bytes
+        stats.response_bytes += response_bytes
+        stats.statuses[status] = stats.statuses.get(status, 0) + 1
+        for name, value in phases.items():
+            stats.phases[name] = stats.phases.get(name, 0.0) + value
+
+    def report(self) -> List[Dict]:
+        """
+        Сформировать JSON-отчет по endpoint.
+
+        Returns:
+            List[Dict]: Статистика по endpoint, отсортированная по суммарному времени
+        """
+
+        report = []
+        for (method, path), stats in self.endpoints.items():
+            latency = stats.latency
+            report.append({
+                "method": method,
+                "path": path,
+                "count": latency.count,
+                "seconds_total": latency.total,
+                "seconds_mean": latency.total / latency.count if latency.count else 0.0,
+                "p50": latency.quantile(0.5),
+                "p95": latency.quantile(0.95),
+                "p99": latency.quantile(0.99),
+                "request_bytes": stats.request_bytes,
+                "response_bytes": stats.response_bytes,
+                "statuses": {str(status): count for status, count in stats.statuses.items()},
+                "phases": stats.phases,
+                "buckets": {
+                    str(bound): count for bound, count in zip(latency.buckets + ("+Inf",), latency.counts)
+                }
+            })
+
+        report.sort(key=lambda item: item["seconds_total"], reverse=True)
+        return report
+
+    def render_prometheus(self) -> str:
+        """
+        Сформировать метрики в текстовом формате Prometheus.
+
+        Returns:
+            str: Гистограммы задержек, размеры запросов/ответов и время по фазам
+        """
+
+        lines = [
+            "# HELP expert_system_http_request_duration_seconds HTTP request latency.",
+            "# TYPE expert_system_http_request_duration_seconds histogram",
+        ]
+        for (method, path), stats in self.endpoints.items():
+            labels = f'method="{method}",path="{path}"'
+            cumulative = 0
+            for bound, count in zip(stats.latency.buckets, stats.latency.counts):
+                cumulative += count
+                lines.append(f'expert_system_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(
+                f'expert_system_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.latency.count}'
+            )
+            lines.append(f"expert_system_http_request_duration_seconds_sum{{{labels}}} {stats.latency.total:.9f}")
+            lines.append(f"expert_system_http_request_duration_seconds_count{{{labels}}} {stats.latency.count}")
+
+        counters = [
+            ("expert_system_http_request_bytes_total", "HTTP request body bytes.",
+             lambda stats: [("", stats.request_bytes)]),
+            ("expert_system_http_response_bytes_total", "HTTP response body bytes.",
+             lambda stats: [("", stats.response_bytes)]),
+            ("expert_system_http_phase_seconds_total", "HTTP request time per phase.",
+             lambda stats: [(f',phase="{name}"', value) for name, value in stats.phases.items()]),
+        ]
+        for name, description, values in counters:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} counter")
+            for (method, path), stats in self.endpoints.items():
+                for extra, value in values(stats):
+                    lines.append(f'{name}{{method="{method}",path="{path}"{extra}}} {value}')
+
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,145 @@
+from typing import Dict, List, Optional, Tuple
+
+from app.expert_system import ExpertSystem
+from app.model import Rule
+
+
+class KnowledgeBaseListing:
+    """Постраничная выдача фактов и правил для веб-интерфейса.
+
+    Списки имен фактов и индексов правил, отобранных поиском, кэшируются
+    до следующего изменения базы знаний, поэтому прокрутка большого списка
+    не требует повторного обхода всех фактов и правил.
+
+    Attributes:
+        engine (ExpertSystem): Экспертная система, данные которой выдаются
+    """
+
+    def __init__(self, engine: ExpertSystem):
+        """
+        Конструктор постраничной выдачи.
+
+        Args:
+            engine (ExpertSystem): Экспертная система
+        """
+
+        self.engine = engine
+        self._facts_cache: Tuple[Optional[int], str, List[str]] = (None, "", [])
+        self._rules_cache: Tuple[Optional[int], str, List[int]] = (None, "", [])
+
+    def fact_names(self, search: str = "") -> List[str]:
+        """
+        Получить имена фактов в порядке добавления с учетом поиска.
+
+        Args:
+            search (str): Подстрока для поиска без учета регистра
+
+        Returns:
+            List[str]: Имена фактов
+        """
+
+        facts = self.engine.facts
+        search = search.strip().lower()
+        version, cached_search, names = self._facts_cache
+        if version != facts.version or cached_search != search:
+            names = [name for name in facts if not search or search in str(name).lower()]
+            self._facts_cache = (facts.version, search, names)
+        return names
+
+    def rule_indices(self, search: str = "") -> List[int]:
+        """
+        Получить индексы правил, подходящих под поиск.
+
+        Правило подходит, если подстрока встречается в выводе
+        или в одном из фактов условий.
+
+        Args:
+            search (str): Подстрока для поиска без учета регистра
+
+        Returns:
+            List[int]: Индексы правил по возрастанию
+        """
+
+        rules = self.engine.rules
+        search = search.strip().lower()
+        if not search:
+            return list(range(len(rules)))
+
+        version, cached_search, indices = self._rules_cache
+        if version != self.engine.rules_version or cached_search != search:
+            indices = [index for index, rule in enumerate(rules) if _rule_matches(rule, search)]
+            self._rules_cache = (self.engine.rules_version, search, indices)
+        return indices
+
+    def facts_page(self, offset: int, limit: int, search: str = "") -> Dict:
+        """
+        Получить страницу фактов.
+
+        Args:
+            offset (int): Номер первого факта страницы
+            limit (int): Максимальное количество фактов на странице
+            search (str): Подстрока для поиска
+
+        Returns:
+            Dict: {'total': int, 'offset': int, 'limit': int, 'items': [{'fact': str, 'cf': float}, ...]}
+        """
+
+        facts = self.engine.facts
+        names = self.fact_names(search)
+        return {
+            "total": len(names),
+            "offset": offset,
+            "limit": limit,
+            "items": [{"fact": name, "cf": facts[name]} for name in names[offset:offset + limit]]
+        }
+
+    def rules_page(self, offset: int, limit: int, search: str = "") -> Dict:
+        """
+        Получить страницу правил.
+
+        Args:
+            offset (int): Номер первого правила страницы (среди найденных)
+            limit (int): Максимальное количество правил на странице
+            search (str): Подстрока для поиска
+
+        Returns:
+            Dict: {'total': int, 'offset': int, 'limit': int,
+                   'items': [{'index': int, 'if': [...], 'then': str, 'cf': float}, ...]}
+        """
+
+        rules = self.engine.rules
+        if search.strip():
+            indices = self.rule_indices(search)
+            total = len(indices)
+            page = indices[offset:offset + limit]
+        else:
+            total = len(rules)
+            page = range(min(offset, total), min(offset + limit, total))
+
+        return {
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "items": [{"index": index, **rules[index].to_dict()} for index in page]
+        }
+
+
+def _rule_matches(rule: Rule, search: str) -> bool:
+    """
+    Проверить, встречается ли подстрока в выводе или условиях правила.
+
+    Args:
+        rule (Rule): Правило
+        search (str): Подстрока в нижнем регистре
+
+    Returns:
+        bool: True, если правило подходит под поиск
+    """
+
+    if search in str(rule.conclusion).lower():
+        return True
+    for condition in rule.conditions:
+        members = condition.fact if isinstance(condition.fact, tuple) else (condition.fact,)
+        if any(search in str(member).lower() for member in members):
+            return True
+    return False
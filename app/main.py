@@ -1,23 +1,57 @@
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
+import asyncio
 import json
+import threading
+import time
 import urllib.parse
 
 import uvicorn
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Request, HTTPException, Query
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
+from starlette.routing import Match
 
+from app.access_gate import AccessGate
+from app.compiled_kb import KnowledgeBaseRegistry
 from app.expert_system import ExpertSystem
+from app.http_metrics import HttpMetrics, TimedRoute, start_request_timing, timed_phase
+from app.listing import KnowledgeBaseListing
+from app.query_index import QueryBatch
+from app.reload import KnowledgeBaseWatcher
+from app.serialization import PreEncodedJSONResponse, StatePayloads
+from app.shared_state import SharedKnowledgeBase
+from app.single_flight import SingleFlight
+
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Жизненный цикл приложения: прогрев баз знаний до приема запросов.
+
+    Процесс начинает принимать запросы только после warm_start, поэтому
+    первые запросы после перезапуска не платят за разбор и компиляцию.
+
+    Args:
+        app (FastAPI): Приложение
+    """
+
+    await asyncio.to_thread(warm_start)
+    yield
+
 
 app = FastAPI(
     title="Универсальная экспертная система",
     description="Система логического вывода на основе метода Шортлиффа",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
+app.router.route_class = TimedRoute
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -33,6 +67,50 @@ for directory in [css_dir, js_dir, templates_dir, knowledge_base_dir]:
 app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
 templates = Jinja2Templates(directory=str(templates_dir))
 expert_system = ExpertSystem()
+expert_system.profiler.enabled = os.getenv("EXPERT_SYSTEM_PROFILE", "0") == "1"
+expert_system.provenance.enabled = os.getenv("EXPERT_SYSTEM_PROVENANCE", "1") == "1"
+if os.getenv("EXPERT_SYSTEM_INFER_PROCESSES"):
+    expert_system.parallel_workers = int(os.getenv("EXPERT_SYSTEM_INFER_PROCESSES"))
+if os.getenv("EXPERT_SYSTEM_FUZZY_THRESHOLD"):
+    expert_system.fuzzy_threshold = float(os.getenv("EXPERT_SYSTEM_FUZZY_THRESHOLD"))
+expert_system.fuzzy_limit = int(os.getenv("EXPERT_SYSTEM_FUZZY_LIMIT", 5))
+max_query_batch = int(os.getenv("EXPERT_SYSTEM_MAX_BATCH", 500))
+http_metrics = HttpMetrics()
+listing = KnowledgeBaseListing(expert_system)
+state_payloads = StatePayloads(expert_system)
+preload_knowledge_bases = [name.strip() for name in os.getenv("EXPERT_SYSTEM_PRELOAD", "").split(",") if name.strip()]
+preload_active = os.getenv("EXPERT_SYSTEM_PRELOAD_ACTIVE")
+snapshot_dir = os.getenv("EXPERT_SYSTEM_SNAPSHOT_DIR")
+compiled_knowledge_bases = KnowledgeBaseRegistry(
+    knowledge_base_dir,
+    capacity=max(8, len(preload_knowledge_bases)),
+    snapshot_dir=Path(snapshot_dir) if snapshot_dir else None
+)
+startup_report: Dict = {"ready": False, "seconds": None, "phases": {}, "knowledge_bases": [], "errors": []}
+knowledge_base_reads = SingleFlight()
+knowledge_base_loads = SingleFlight()
+engine_access = AccessGate()
+
+shared_state_dir = os.getenv("EXPERT_SYSTEM_SHARED_DIR")
+shared_state = SharedKnowledgeBase(shared_state_dir) if shared_state_dir else None
+
+reload_interval = os.getenv("EXPERT_SYSTEM_RELOAD_INTERVAL")
+knowledge_base_watcher = KnowledgeBaseWatcher(float(reload_interval)) if reload_interval else None
+
+ENGINE_UPDATES = {
+    ("POST", "/api/fact"),
+    ("DELETE", "/api/fact/{fact:path}"),
+    ("POST", "/api/rule"),
+    ("DELETE", "/api/rule/{index}"),
+    ("POST", "/api/clear-all"),
+}
+ENGINE_LOADS = {("GET", "/api/knowledge-base/{filename}")}
+ENGINE_INDEPENDENT = {
+    ("GET", "/api/knowledge-bases"),
+    ("DELETE", "/api/knowledge-base/{filename}"),
+    ("POST", "/api/evaluate"),
+    ("GET", "/api/metrics/http"),
+}
 
 
 class FactData(BaseModel):
@@ -74,6 +152,117 @@ class QueryData(BaseModel):
     query: str
 
 
+class QueryBatchData(BaseModel):
+    """
+    Модель данных для пакета запросов к экспертной системе.
+
+    Attributes:
+        queries (List[str]): Запросы в виде строк для анализа
+    """
+
+    queries: List[str]
+
+
+class InferenceData(BaseModel):
+    """
+    Модель данных для ограничения бюджета логического вывода.
+
+    Attributes:
+        timeout_ms (Optional[float]): Ограничение времени вывода в миллисекундах
+        max_firings (Optional[int]): Максимальное число срабатываний правил
+        max_passes (Optional[int]): Максимальное число проходов по правилам
+        epsilon (float): Минимальное приращение CF, считающееся улучшением вывода
+        parallel (bool): Выполнять ли вывод параллельно по независимым частям базы знаний
+        targets (Optional[Dict[str, float]]): Целевые выводы с порогами CF; вывод идет только
+            по правилам, ведущим к целям, и останавливается, когда цели решены
+    """
+
+    timeout_ms: Optional[float] = None
+    max_firings: Optional[int] = None
+    max_passes: Optional[int] = None
+    epsilon: float = 0.0
+    parallel: bool = False
+    targets: Optional[Dict[str, float]] = None
+
+    def budget(self) -> Dict:
+        """
+        Преобразовать параметры запроса в аргументы ExpertSystem.infer.
+
+        Returns:
+            Dict: Именованные аргументы бюджета вывода
+        """
+
+        return {
+            "time_limit": self.timeout_ms / 1000 if self.timeout_ms is not None else None,
+            "max_firings": self.max_firings,
+            "max_passes": self.max_passes,
+            "epsilon": self.epsilon,
+            "targets": self.targets
+        }
+
+
+def json_response(content: Dict, status_code: int = 200) -> JSONResponse:
+    """
+    Сформировать JSON-ответ с учетом времени сериализации в Server-Timing.
+
+    Значения EncodedJSON (факты и правила из state_payloads) вставляются
+    в тело ответа без повторного кодирования.
+
+    Args:
+        content (Dict): Содержимое ответа
+        status_code (int): Код статуса ответа
+
+    Returns:
+        JSONResponse: Готовый JSON-ответ
+    """
+
+    with timed_phase("serialize"):
+        return PreEncodedJSONResponse(status_code=status_code, content=content)
+
+
+class WhatIfData(BaseModel):
+    """
+    Модель данных для оценки гипотетических изменений фактов.
+
+    Attributes:
+        changes (Dict[str, Optional[float]]): Гипотетические CF фактов (null - факт неизвестен)
+        query (Optional[str]): Запрос, выполняемый над гипотетическими фактами
+        epsilon (float): Минимальное приращение CF, считающееся улучшением вывода
+    """
+
+    changes: Dict[str, Optional[float]]
+    query: Optional[str] = None
+    epsilon: float = 0.0
+
+
+class EvaluateData(BaseModel):
+    """
+    Модель данных для вычисления случая по скомпилированной базе знаний.
+
+    Attributes:
+        knowledge_base (str): Имя файла базы знаний
+        facts (Dict[str, float]): Входные факты случая с коэффициентами уверенности
+    """
+
+    knowledge_base: str
+    facts: Dict[str, float]
+
+
+def state_summary() -> Dict:
+    """
+    Получить краткое состояние базы знаний для ответов в режиме compact.
+
+    Returns:
+        Dict: Количество фактов и правил и версия базы знаний
+    """
+
+    return {
+        "fact_count": len(expert_system.facts),
+        "rule_count": len(expert_system.rules),
+        "version": expert_system.version
+    }
+
+
 def list_knowledge_bases() -> List[str]:
     """
     Получить список файлов баз знаний из директории knowledge_base.
@@ -142,6 +331,231 @@ def delete_knowledge_base(filename: str) -> None:
     filepath.unlink()
 
 
+def warm_start():
+    """
+    Прогреть процесс перед приемом запросов.
+
+    Компилирует базы знаний из EXPERT_SYSTEM_PRELOAD (через снимки реестра
+    в EXPERT_SYSTEM_SNAPSHOT_DIR, если директория задана и снимки есть)
+    и загружает базу EXPERT_SYSTEM_PRELOAD_ACTIVE в общий экземпляр
+    expert_system с заранее построенными сетью условий и индексами.
+    Время каждой фазы записывается в startup_report (отдается /healthz)
+    и выводится в журнал; ошибки загрузки также записываются в отчет.
+    """
+
+    started = time.perf_counter()
+    phases = startup_report["phases"]
+
+    for name in preload_knowledge_bases:
+        timings = {}
+        try:
+            compiled = compiled_knowledge_bases.get(name, timings)
+        except Exception as e:
+            startup_report["errors"].append(f"{name}: {e}")
+            continue
+        for phase, seconds in timings.items():
+            phases[phase] = phases.get(phase, 0.0) + seconds
+        startup_report["knowledge_bases"].append({
+            "name": compiled.name,
+            "version": compiled.version,
+            "source": "snapshot" if "snapshot_load" in timings else "compiled",
+            "phases_ms": {phase: round(seconds * 1000, 1) for phase, seconds in timings.items()}
+        })
+
+    if preload_active:
+        try:
+            phase_started = time.perf_counter()
+            data = load_knowledge_base(preload_active)
+            phases["active_read"] = time.perf_counter() - phase_started
+
+            phase_started = time.perf_counter()
+            expert_system.load_from_dict(data)
+            phases["active_load"] = time.perf_counter() - phase_started
+
+            phase_started = time.perf_counter()
+            expert_system.condition_network()
+            expert_system._rule_dependents()
+            expert_system.query_index()
+            if expert_system._wildcard_index() is not None:
+                expert_system.facts.prefix_matches("")
+            phases["active_warm"] = time.perf_counter() - phase_started
+
+            if knowledge_base_watcher is not None:
+                knowledge_base_watcher.watch(knowledge_base_dir / preload_active)
+            if shared_state is not None:
+                shared_state.sync(expert_system)
+        except Exception as e:
+            startup_report["errors"].append(f"{preload_active}: {getattr(e, 'detail', None) or e}")
+
+    startup_report["seconds"] = time.perf_counter() - started
+    startup_report["ready"] = not startup_report["errors"]
+
+    summary = ", ".join(f"{phase} {seconds * 1000:.1f}ms" for phase, seconds in phases.items())
+    print(f"Прогрев завершен за {startup_report['seconds'] * 1000:.1f}ms" + (f": {summary}" if summary else ""))
+    for error in startup_report["errors"]:
+        print(f"Не удалось предзагрузить базу знаний {error}")
+
+
+def route_path(request: Request) -> Optional[str]:
+    """
+    Найти шаблон пути endpoint запроса до его обработки.
+
+    Args:
+        request (Request): Объект запроса FastAPI
+
+    Returns:
+        Optional[str]: Шаблон пути (например, /api/fact/{fact:path}) или None
+    """
+
+    for route in app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            return getattr(route, "path", None)
+    return None
+
+
+@asynccontextmanager
+async def engine_update():
+    """
+    Исключительный доступ для изменения исходных фактов и правил expert_system.
+
+    Ждет завершения читающих обработчиков (engine_access). При общем
+    состоянии процессов изменение выполняется под межпроцессной
+    блокировкой поверх последней опубликованной версии и публикуется
+    после выполнения; работа с общим состоянием выполняется в пуле потоков.
+    """
+
+    async with engine_access.exclusive():
+        if shared_state is None:
+            yield
+            return
+        with timed_phase("io"):
+            await asyncio.to_thread(shared_state.begin_update, expert_system)
+        try:
+            yield
+        finally:
+            with timed_phase("io"):
+                await asyncio.to_thread(shared_state.end_update, expert_system)
+
+
+@app.middleware("http")
+async def guard_engine_access(request: Request, call_next):
+    """
+    Middleware для согласования доступа к expert_system.
+
+    Запросы, меняющие исходные факты и правила (ENGINE_UPDATES), выполняются
+    по одному через engine_update, остальные - одновременно с разделяемым
+    доступом. Обработчики загрузки баз знаний (ENGINE_LOADS) сами
+    выполняют загрузку через engine_update (см. apply_knowledge_base).
+    Запросы, не обращающиеся к expert_system (страницы, статические файлы,
+    /healthz и ENGINE_INDEPENDENT), выполняются без ожидания. При общем состоянии процессов (EXPERT_SYSTEM_SHARED_DIR) перед
+    обработкой читающего запроса подтягивается версия, опубликованная
+    другими процессами (в пуле потоков, без читающих обработчиков).
+
+    Args:
+        request (Request): Объект запроса FastAPI
+        call_next: Следующий обработчик в цепочке
+
+    Returns:
+        Response: Ответ обработчика
+    """
+
+    path = route_path(request)
+    if path is None or not path.startswith("/api/") or (request.method, path) in ENGINE_INDEPENDENT \
+            or (request.method, path) in ENGINE_LOADS:
+        return await call_next(request)
+    if (request.method, path) in ENGINE_UPDATES:
+        async with engine_update():
+            return await call_next(request)
+
+    if shared_state is not None and shared_state.stale():
+        async with engine_access.exclusive():
+            with timed_phase("io"):
+                await asyncio.to_thread(shared_state.sync, expert_system)
+    async with engine_access.shared():
+        return await call_next(request)
+
+
+@app.middleware("http")
+async def reload_changed_knowledge_base(request: Request, call_next):
+    """
+    Middleware для перезагрузки измененного файла загруженной базы знаний.
+
+    Не чаще одного раза в EXPERT_SYSTEM_RELOAD_INTERVAL секунд проверяет
+    время изменения файла последней загруженной базы знаний и при его
+    изменении перезагружает базу знаний по разнице (apply_knowledge_base).
+    Работает только при заданной переменной окружения EXPERT_SYSTEM_RELOAD_INTERVAL.
+
+    Args:
+        request (Request): Объект запроса FastAPI
+        call_next: Следующий обработчик в цепочке
+
+    Returns:
+        Response: Ответ обработчика
+    """
+
+    if knowledge_base_watcher is not None and knowledge_base_watcher.changed():
+        try:
+            filename = knowledge_base_watcher.path.name
+            key = (filename, False, None, True)
+            report, _ = await knowledge_base_loads.run(key, apply_knowledge_base, *key)
+            print(f"База знаний {knowledge_base_watcher.path.name} перезагружена: {report}")
+        except Exception as e:
+            print(f"Не удалось перезагрузить базу знаний {knowledge_base_watcher.path.name}: {e}")
+
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def record_http_metrics(request: Request, call_next):
+    """
+    Middleware для сбора HTTP-метрик и заголовка Server-Timing.
+
+    Учитывает задержку, размеры запроса и ответа по шаблону пути endpoint
+    и добавляет к ответу заголовок Server-Timing с разбивкой времени
+    на фазы parse, engine, serialize и io. Размер ответа считается
+    по отправленным частям тела, поэтому учитываются и потоковые ответы
+    без Content-Length; запрос учитывается после отправки тела ответа.
+
+    Args:
+        request (Request): Объект запроса FastAPI
+        call_next: Следующий обработчик в цепочке
+
+    Returns:
+        Response: Ответ обработчика с заголовком Server-Timing
+    """
+
+    timing = start_request_timing()
+    response = await call_next(request)
+    total = time.perf_counter() - timing.started
+
+    route = request.scope.get("route")
+    path = getattr(route, "path", "unmatched")
+    response.headers["Server-Timing"] = timing.header(total)
+
+    body_iterator = response.body_iterator
+
+    async def counted_body():
+        response_bytes = 0
+        try:
+            async for chunk in body_iterator:
+                response_bytes += len(chunk)
+                yield chunk
+        finally:
+            http_metrics.record(
+                method=request.method,
+                path=path,
+                status=response.status_code,
+                seconds=total,
+                request_bytes=int(request.headers.get("content-length") or 0),
+                response_bytes=response_bytes,
+                phases=timing.phases
+            )
+
+    response.body_iterator = counted_body()
+    return response
+
+
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request):
     """
@@ -157,6 +571,30 @@ async def read_root(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
 
 
+@app.get("/healthz")
+async def healthz():
+    """
+    Проверка готовности процесса (readiness probe).
+
+    Returns:
+        JSONResponse: Статус 200, если прогрев завершен без ошибок, иначе 503;
+            в теле - время прогрева по фазам в миллисекундах и предзагруженные базы знаний
+    """
+
+    ready = startup_report["ready"]
+    if startup_report["seconds"] is None:
+        status = "starting"
+    else:
+        status = "ready" if ready else "failed"
+    return json_response({
+        "status": status,
+        "startup_ms": round(startup_report["seconds"] * 1000, 1) if startup_report["seconds"] is not None else None,
+        "phases_ms": {phase: round(seconds * 1000, 1) for phase, seconds in startup_report["phases"].items()},
+        "knowledge_bases": startup_report["knowledge_bases"],
+        "errors": startup_report["errors"]
+    }, status_code=200 if ready else 503)
+
+
 @app.get("/api/knowledge-bases")
 async def get_knowledge_bases():
     """
@@ -167,39 +605,111 @@ async def get_knowledge_bases():
     """
 
     try:
-        files = list_knowledge_bases()
-        return JSONResponse(content={"success": True, "files": files})
+        with timed_phase("io"):
+            files = await asyncio.to_thread(list_knowledge_bases)
+        return json_response({"success": True, "files": files})
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @app.get("/api/knowledge-base/{filename}")
-async def load_knowledge_base_endpoint(filename: str):
+async def load_knowledge_base_endpoint(filename: str, analyze: bool = False, optimize: bool = False,
+                                       compact: bool = False, diff: bool = False):
     """
     API endpoint для загрузки базы знаний из файла в экспертную систему.
 
+    Чтение, разбор и загрузка выполняются в пуле потоков; одновременные
+    загрузки одного файла с одинаковыми параметрами объединяются в одну
+    (SingleFlight), ее результат получают все ожидающие.
+
     Args:
         filename (str): Имя файла базы знаний
+        analyze (bool): Выполнить статический анализ загруженной базы знаний
+        optimize (bool): Включить вывод по сокращенному набору правил
+        compact (bool): Вернуть только количество фактов и правил вместо полных списков
+        diff (bool): Перезагрузить по разнице с загруженной базой знаний
+            (применяются только изменения, затронутые выводы выводятся заново)
 
     Returns:
-        JSONResponse: Объект с данными базы знаний и текущим состоянием системы
+        JSONResponse: Объект с данными базы знаний, текущим состоянием системы,
+            отчетом анализа (если он запрошен) и отчетом о перезагрузке (при diff)
     """
 
     try:
-        data = load_knowledge_base(filename)
-        expert_system.load_from_dict(data)
-        return JSONResponse(content={
-            "success": True,
-            "facts": expert_system.facts,
-            "rules": expert_system.rules,
-            "filename": filename
-        })
+        key = (filename, analyze, optimize, diff)
+        reload_report, analysis = await knowledge_base_loads.run(key, apply_knowledge_base, *key)
+        async with engine_access.shared():
+            return knowledge_base_response(filename, compact, analysis, reload_report)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+async def apply_knowledge_base(filename: str, analyze: bool, optimize: Optional[bool],
+                               diff: bool) -> Tuple[Optional[Dict], Optional[Dict]]:
+    """
+    Прочитать файл базы знаний и загрузить его в expert_system (через engine_update).
+
+    Args:
+        filename (str): Имя файла базы знаний
+        analyze (bool): Выполнить статический анализ загруженной базы знаний
+        optimize (Optional[bool]): Включить вывод по сокращенному набору правил
+            (None - сохранить текущий режим)
+        diff (bool): Перезагрузить по разнице с загруженной базой знаний
+
+    Returns:
+        Tuple[Optional[Dict], Optional[Dict]]: Отчет о перезагрузке (при diff) и отчет анализа
+    """
+
+    with timed_phase("io"):
+        data = await knowledge_base_reads.run(filename, load_knowledge_base, filename)
+    async with engine_update():
+        if optimize is None:
+            optimize = expert_system.optimize_inference
+        with timed_phase("engine"):
+            if diff:
+                reload_report = await asyncio.to_thread(expert_system.reload_from_dict, data, analyze, optimize)
+                analysis = reload_report.pop("analysis", None)
+            else:
+                reload_report = None
+                analysis = await asyncio.to_thread(expert_system.load_from_dict, data, analyze, optimize)
+    if knowledge_base_watcher is not None:
+        knowledge_base_watcher.watch(knowledge_base_dir / filename)
+    return reload_report, analysis
+
+
+def knowledge_base_response(filename: str, compact: bool, analysis: Optional[Dict],
+                            reload_report: Optional[Dict]) -> JSONResponse:
+    """
+    Сформировать ответ о загрузке базы знаний.
+
+    Args:
+        filename (str): Имя файла базы знаний
+        compact (bool): Вернуть только количество фактов и правил вместо полных списков
+        analysis (Optional[Dict]): Отчет анализа
+        reload_report (Optional[Dict]): Отчет о перезагрузке
+
+    Returns:
+        JSONResponse: Данные базы знаний и отчеты
+    """
+
+    if compact:
+        content = {"success": True, "filename": filename, **state_summary()}
+    else:
+        content = {
+            "success": True,
+            "facts": state_payloads.facts(),
+            "rules": state_payloads.rules(),
+            "filename": filename
+        }
+    if analysis is not None:
+        content["analysis"] = analysis
+    if reload_report is not None:
+        content["reload"] = reload_report
+    return json_response(content)
+
+
 @app.post("/api/knowledge-base/{filename}")
 async def save_knowledge_base_endpoint(filename: str):
     """
@@ -213,9 +723,10 @@ async def save_knowledge_base_endpoint(filename: str):
     """
 
     try:
-        data = expert_system.to_dict()
-        save_knowledge_base(filename, data)
-        return JSONResponse(content={"success": True})
+        data = {"facts": dict(expert_system.facts), "rules": expert_system.rules_as_dicts()}
+        with timed_phase("io"):
+            await asyncio.to_thread(save_knowledge_base, filename, data)
+        return json_response({"success": True})
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -233,8 +744,10 @@ async def delete_knowledge_base_endpoint(filename: str):
     """
 
     try:
-        delete_knowledge_base(filename)
-        return JSONResponse(content={"success": True})
+        with timed_phase("io"):
+            await asyncio.to_thread(delete_knowledge_base, filename)
+            await asyncio.to_thread(compiled_knowledge_bases.evict, filename)
+        return json_response({"success": True})
     except HTTPException:
         raise
     except Exception as e:
@@ -242,34 +755,46 @@ async def delete_knowledge_base_endpoint(filename: str):
 
 
 @app.post("/api/fact")
-async def add_fact(fact_data: FactData):
+async def add_fact(fact_data: FactData, compact: bool = False):
     """
     API endpoint для добавления нового факта в экспертную систему.
 
     Args:
         fact_data (FactData): Данные факта (текст и коэффициент уверенности)
+        compact (bool): Вернуть только измененный факт и счетчики вместо полного списка
 
     Returns:
         JSONResponse: Объект с флагом успеха и обновленным списком фактов
     """
 
     try:
-        expert_system.add_fact(fact_data.fact, fact_data.cf)
-        return JSONResponse(content={
+        with timed_phase("engine"):
+            created = fact_data.fact not in expert_system.facts
+            expert_system.add_fact(fact_data.fact, fact_data.cf)
+        if compact:
+            return json_response({
+                "success": True,
+                "fact": fact_data.fact,
+                "cf": fact_data.cf,
+                "created": created,
+                **state_summary()
+            })
+        return json_response({
             "success": True,
-            "facts": expert_system.facts
+            "facts": state_payloads.facts()
         })
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.delete("/api/fact/{fact:path}")
-async def delete_fact(fact: str):
+async def delete_fact(fact: str, compact: bool = False):
     """
     API endpoint для удаления факта из экспертной системы.
 
     Args:
         fact (str): URL-кодированный текст факта для удаления
+        compact (bool): Вернуть только удаленный факт и счетчики вместо полного списка
 
     Returns:
         JSONResponse: Объект с флагом успеха и обновленным списком фактов
@@ -277,22 +802,26 @@ async def delete_fact(fact: str):
 
     try:
         decoded_fact = urllib.parse.unquote(fact)
-        expert_system.delete_fact(decoded_fact)
-        return JSONResponse(content={
+        with timed_phase("engine"):
+            expert_system.delete_fact(decoded_fact)
+        if compact:
+            return json_response({"success": True, "fact": decoded_fact, **state_summary()})
+        return json_response({
             "success": True,
-            "facts": expert_system.facts
+            "facts": state_payloads.facts()
         })
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/api/rule")
-async def add_rule(rule_data: RuleData):
+async def add_rule(rule_data: RuleData, compact: bool = False):
     """
     API endpoint для добавления нового правила в экспертную систему.
 
     Args:
         rule_data (RuleData): Данные правила (условия, заключение и коэффициент уверенности)
+        compact (bool): Вернуть только добавленное правило и счетчики вместо полного списка
 
     Returns:
         JSONResponse: Объект с флагом успеха и обновленным списком правил
@@ -305,58 +834,315 @@ async def add_rule(rule_data: RuleData):
         if not rule_data.conclusion.strip():
             raise HTTPException(status_code=400, detail="Заключение не может быть пустым")
 
-        expert_system.add_rule(rule_data.conditions, rule_data.conclusion, rule_data.cf)
-
-        return JSONResponse(content={
+        with timed_phase("engine"):
+            expert_system.add_rule(rule_data.conditions, rule_data.conclusion, rule_data.cf)
+
+        if compact:
+            index = len(expert_system.rules) - 1
+            return json_response({
+                "success": True,
+                "rule": {"index": index, **expert_system.rules[index].to_dict()},
+                **state_summary()
+            })
+        return json_response({
             "success": True,
-            "rules": expert_system.rules
+            "rules": state_payloads.rules()
         })
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.delete("/api/rule/{index}")
-async def delete_rule(index: int):
+async def delete_rule(index: int, compact: bool = False):
     """
     API endpoint для удаления правила по индексу.
 
     Args:
         index (int): Индекс правила в списке правил
+        compact (bool): Вернуть только индекс удаленного правила и счетчики вместо полного списка
 
     Returns:
         JSONResponse: Объект с флагом успеха и обновленным списком правил
     """
 
     try:
-        expert_system.delete_rule(index)
-        return JSONResponse(content={
+        with timed_phase("engine"):
+            expert_system.delete_rule(index)
+        if compact:
+            return json_response({"success": True, "index": index, **state_summary()})
+        return json_response({
             "success": True,
-            "rules": expert_system.rules
+            "rules": state_payloads.rules()
         })
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
 @app.post("/api/infer")
-async def make_inference():
+async def make_inference(inference_data: Optional[InferenceData] = None):
     """
     API endpoint для выполнения логического вывода в экспертной системе.
 
+    Args:
+        inference_data (Optional[InferenceData]): Необязательный бюджет вывода
+            (время, число срабатываний и проходов, минимальное приращение CF),
+            признак параллельного вывода и целевые выводы с порогами
+            (с целями вывод выполняется последовательно)
+
     Returns:
-        JSONResponse: Объект с результатами вывода и текущим состоянием фактов
+        JSONResponse: Объект с результатами вывода, признаком прерывания по бюджету,
+            числом шардов параллельного вывода, состоянием целей (если они заданы)
+            и текущим состоянием фактов
     """
 
     try:
-        inferred = expert_system.infer()
-        return JSONResponse(content={
+        budget = inference_data.budget() if inference_data else {}
+        parallel = inference_data.parallel if inference_data else False
+        with timed_phase("engine"):
+            if parallel and budget.get("targets") is None:
+                budget.pop("targets", None)
+                inferred = expert_system.infer_parallel(**budget)
+            else:
+                inferred = expert_system.infer(**budget)
+        summary = expert_system.last_inference
+        content = {
             "success": True,
             "inferred": inferred,
-            "all_facts": expert_system.facts
+            "truncated": summary["truncated"],
+            "reason": summary["reason"],
+            "passes": summary["passes"],
+            "firings": summary["firings"],
+            "shards": summary.get("shards", 1),
+            "all_facts": state_payloads.facts()
+        }
+        if "targets" in summary:
+            content["targets"] = summary["targets"]
+            content["relevant_rules"] = summary["relevant_rules"]
+        return json_response(content)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/what-if")
+async def what_if(what_if_data: WhatIfData):
+    """
+    API endpoint для оценки гипотетических изменений фактов без изменения базы знаний.
+
+    Args:
+        what_if_data (WhatIfData): Гипотетические CF фактов и необязательный запрос
+
+    Returns:
+        JSONResponse: Выведенные при гипотезе факты, отличия от текущих фактов
+            и результат запроса (если он передан)
+    """
+
+    try:
+        query = what_if_data.query.strip() if what_if_data.query else None
+        with timed_phase("engine"):
+            result = expert_system.what_if(what_if_data.changes, query or None, what_if_data.epsilon)
+        return json_response({"success": True, **result})
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/api/conclusions")
+async def get_conclusions(fact: Optional[List[str]] = Query(None)):
+    """
+    API endpoint для получения CF выводов после вывода без изменения фактов.
+
+    Выводы ациклической части базы знаний вычисляются в замкнутой форме
+    без проходов по правилам, остальные - обычным infer над копией фактов.
+
+    Args:
+        fact (Optional[List[str]]): Запрашиваемые факты (по умолчанию все выводы правил)
+
+    Returns:
+        JSONResponse: CF выводов и признак вычисления целиком в замкнутой форме
+    """
+
+    try:
+        with timed_phase("engine"):
+            evaluator = expert_system.closed_form()
+            conclusions = expert_system.evaluate_conclusions(fact)
+            closed_form = evaluator.complete if fact is None else not any(name in evaluator.uncovered for name in fact)
+        return json_response({"success": True, "conclusions": conclusions, "closed_form": closed_form})
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/evaluate")
+async def evaluate_case(evaluate_data: EvaluateData, request: Request):
+    """
+    API endpoint для вычисления случая по неизменяемой скомпилированной базе знаний.
+
+    Не использует и не меняет общий экземпляр expert_system. Результат
+    определяется версией базы знаний и входными фактами, поэтому ответ
+    снабжается заголовком ETag и повторный запрос с If-None-Match
+    получает ответ 304.
+
+    Args:
+        evaluate_data (EvaluateData): Имя базы знаний и входные факты случая
+        request (Request): Объект запроса FastAPI
+
+    Returns:
+        JSONResponse: Выводы с CF, отсортированные по убыванию, и версия базы знаний
+    """
+
+    try:
+        with timed_phase("io"):
+            compiled = await knowledge_base_reads.run(
+                ("compiled", evaluate_data.knowledge_base), compiled_knowledge_bases.get, evaluate_data.knowledge_base
+            )
+        with timed_phase("engine"):
+            result, cached = await asyncio.to_thread(compiled.evaluate, evaluate_data.facts)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Файл не найден")
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    etag = '"{}-{}"'.format(compiled.version, result["input_hash"])
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response = json_response({
+        "success": True,
+        "knowledge_base": compiled.name,
+        "version": compiled.version,
+        "cached": cached,
+        **result
+    })
+    response.headers["ETag"] = etag
+    return response
+
+
+@app.get("/api/explain/{fact:path}")
+async def explain_fact(fact: str, max_depth: int = Query(20, ge=1, le=100)):
+    """
+    API endpoint для объяснения CF факта по журналу происхождения.
+
+    Дерево строится по записям последних вызовов infer без повторного
+    вывода. Журнал ведется, если не задана переменная окружения
+    EXPERT_SYSTEM_PROVENANCE=0.
+
+    Args:
+        fact (str): Факт
+        max_depth (int): Максимальная глубина дерева объяснения
+
+    Returns:
+        JSONResponse: Дерево объяснения и размер журнала
+    """
+
+    fact = urllib.parse.unquote(fact)
+    try:
+        with timed_phase("engine"):
+            explanation = expert_system.explain(fact, max_depth)
+        return json_response({
+            "success": True,
+            "explanation": explanation,
+            "provenance": {"enabled": expert_system.provenance.enabled, **expert_system.provenance.stats()}
         })
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Факт не найден")
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.get("/api/analysis")
+async def get_analysis():
+    """
+    API endpoint для статического анализа текущей базы знаний.
+
+    Returns:
+        JSONResponse: Отчет о мертвых, дублирующихся, поглощенных правилах
+            и циклах зависимостей фактов
+    """
+
+    try:
+        with timed_phase("engine"):
+            report = expert_system.analyze()
+        return json_response({
+            "success": True,
+            "optimize_inference": expert_system.optimize_inference,
+            "analysis": report
+        })
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.post("/api/analysis/optimize")
+async def set_inference_optimization(enabled: bool = True):
+    """
+    API endpoint для включения или выключения вывода по сокращенному набору правил.
+
+    Args:
+        enabled (bool): Исключать ли из вывода мертвые, дублирующиеся и поглощенные правила
+
+    Returns:
+        JSONResponse: Объект с флагом успеха и текущим режимом вывода
+    """
+
+    expert_system.optimize_inference = enabled
+    return json_response({"success": True, "optimize_inference": enabled})
+
+
+@app.post("/api/infer/stream")
+async def make_inference_stream(inference_data: Optional[InferenceData] = None):
+    """
+    API endpoint для потокового логического вывода (Server-Sent Events).
+
+    Каждый новый или улучшенный вывод отправляется клиенту сразу после
+    получения событием "inferred", по завершении отправляется событие
+    "summary" с итогами вывода.
+
+    Вывод выполняется в пуле потоков и передает события в цикл событий
+    через очередь, поэтому проходы по правилам не блокируют цикл событий.
+    На время вывода остальные обработчики ждут (исключительный доступ
+    engine_access), так как вывод меняет факты expert_system. При
+    отключении клиента вывод останавливается на следующем событии.
+
+    Args:
+        inference_data (Optional[InferenceData]): Необязательный бюджет вывода
+
+    Returns:
+        StreamingResponse: Поток событий в формате text/event-stream
+    """
+
+    budget = inference_data.budget() if inference_data else {}
+
+    def produce(loop: asyncio.AbstractEventLoop, queue: asyncio.Queue, stop: threading.Event):
+        try:
+            for event in expert_system.iter_infer(**budget):
+                if stop.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+        except Exception as e:
+            loop.call_soon_threadsafe(queue.put_nowait, {"event": "error", "error": str(e)})
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, None)
+
+    async def event_stream():
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        async with engine_access.exclusive():
+            producer = asyncio.ensure_future(asyncio.to_thread(produce, asyncio.get_running_loop(), queue, stop))
+            try:
+                while True:
+                    event = await queue.get()
+                    if event is None:
+                        break
+                    payload = json.dumps(event, ensure_ascii=False)
+                    yield f"event: {event['event']}\ndata: {payload}\n\n"
+            finally:
+                stop.set()
+                await asyncio.shield(producer)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @app.post("/api/query")
 async def make_query(query_data: QueryData):
     """
@@ -381,7 +1167,8 @@ async def make_query(query_data: QueryData):
                 }
             )
 
-        result = expert_system.query(query)
+        with timed_phase("engine"):
+            result = expert_system.query(query)
 
         if "success" in result and not result["success"]:
             return JSONResponse(
@@ -392,7 +1179,7 @@ async def make_query(query_data: QueryData):
                 }
             )
 
-        return JSONResponse(content={
+        return json_response({
             "success": True,
             "result": result
         })
@@ -406,22 +1193,171 @@ async def make_query(query_data: QueryData):
         )
 
 
+@app.post("/api/query/batch")
+async def make_query_batch(batch_data: QueryBatchData):
+    """
+    API endpoint для выполнения пакета запросов с общей работой по сопоставлению.
+
+    Одинаковые запросы выполняются один раз, факты запросов сопоставляются
+    с базой знаний один раз на пакет. Размер пакета ограничен переменной
+    окружения EXPERT_SYSTEM_MAX_BATCH.
+
+    Args:
+        batch_data (QueryBatchData): Строки запросов
+
+    Returns:
+        JSONResponse: Результаты в порядке запросов (как result в /api/query;
+            для некорректного запроса - success=False и error) и число различных запросов
+    """
+
+    if len(batch_data.queries) > max_query_batch:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Слишком много запросов в пакете (максимум {max_query_batch})"
+        )
+
+    try:
+        with timed_phase("engine"):
+            batch = QueryBatch(expert_system)
+            results = batch.run(batch_data.queries)
+        return json_response({
+            "success": True,
+            "results": results,
+            "unique": batch.unique
+        })
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.get("/api/current-state")
-async def get_current_state():
+async def get_current_state(compact: bool = False):
     """
     API endpoint для получения текущего состояния экспертной системы.
 
+    Args:
+        compact (bool): Вернуть только количество фактов и правил вместо полных списков
+
     Returns:
         JSONResponse: Объект с текущими фактами и правилами системы
     """
 
-    return JSONResponse(content={
+    if compact:
+        return json_response({"success": True, **state_summary()})
+    return json_response({
+        "success": True,
+        "facts": state_payloads.facts(),
+        "rules": state_payloads.rules()
+    })
+
+
+@app.get("/api/facts")
+async def get_facts_page(offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000), search: str = ""):
+    """
+    API endpoint для постраничного получения фактов.
+
+    Args:
+        offset (int): Номер первого факта страницы
+        limit (int): Количество фактов на странице (не более 1000)
+        search (str): Подстрока для поиска по названию факта
+
+    Returns:
+        JSONResponse: Страница фактов, общее количество найденных фактов и счетчики базы знаний
+    """
+
+    with timed_phase("engine"):
+        page = listing.facts_page(offset, limit, search)
+    return json_response({"success": True, **page, **state_summary()})
+
+
+@app.get("/api/rules")
+async def get_rules_page(offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000), search: str = ""):
+    """
+    API endpoint для постраничного получения правил.
+
+    Args:
+        offset (int): Номер первого правила страницы (среди найденных)
+        limit (int): Количество правил на странице (не более 1000)
+        search (str): Подстрока для поиска по выводу и фактам условий
+
+    Returns:
+        JSONResponse: Страница правил с их индексами, общее количество найденных правил
+            и счетчики базы знаний
+    """
+
+    with timed_phase("engine"):
+        page = listing.rules_page(offset, limit, search)
+    return json_response({"success": True, **page, **state_summary()})
+
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """
+    API endpoint для получения метрик вывода в текстовом формате Prometheus.
+
+    Returns:
+        PlainTextResponse: Счетчики вызовов infer, проходов и срабатываний по правилам
+    """
+
+    return PlainTextResponse(
+        expert_system.profiler.render_prometheus() + http_metrics.render_prometheus(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/api/metrics/http")
+async def get_http_metrics():
+    """
+    API endpoint для получения HTTP-метрик по endpoint.
+
+    Returns:
+        JSONResponse: Задержки (гистограмма и квантили), размеры запросов и ответов,
+            коды статуса и время по фазам для каждого endpoint
+    """
+
+    return json_response({
         "success": True,
-        "facts": expert_system.facts,
-        "rules": expert_system.rules
+        "endpoints": http_metrics.report()
     })
 
 
+@app.get("/api/metrics/hot-rules")
+async def get_hot_rules(limit: int = 10):
+    """
+    API endpoint для получения отчета о самых "горячих" правилах.
+
+    Args:
+        limit (int): Максимальное количество правил в отчете
+
+    Returns:
+        JSONResponse: Сводка профилировщика и правила, потребляющие больше всего времени
+    """
+
+    return json_response({
+        "success": True,
+        "report": expert_system.profiler.report(limit)
+    })
+
+
+@app.post("/api/metrics/profiling")
+async def set_profiling(enabled: Optional[bool] = None, reset: bool = False):
+    """
+    API endpoint для включения или выключения профилирования вывода.
+
+    Args:
+        enabled (Optional[bool]): Включить ли сбор статистики (None - не менять состояние)
+        reset (bool): Сбросить накопленную статистику
+
+    Returns:
+        JSONResponse: Объект с флагом успеха и текущим состоянием профилировщика
+    """
+
+    if reset:
+        expert_system.profiler.reset()
+    if enabled is not None:
+        expert_system.profiler.enabled = enabled
+    return JSONResponse(content={"success": True, "enabled": expert_system.profiler.enabled})
+
+
 @app.post("/api/clear-all")
 async def clear_all():
     """
@@ -432,9 +1368,11 @@ async def clear_all():
     """
 
     try:
-        expert_system.facts = {}
-        expert_system.rules = []
-        return JSONResponse(content={
+        with timed_phase("engine"):
+            expert_system.clear()
+        if knowledge_base_watcher is not None:
+            knowledge_base_watcher.watch(None)
+        return json_response({
             "success": True,
             "message": "Все данные очищены"
         })
@@ -448,6 +1386,10 @@ if __name__ == "__main__":
     """
 
     port = int(os.getenv("PORT", 8000))
+    workers = int(os.getenv("EXPERT_SYSTEM_WORKERS", 1))
+
+    if workers > 1:
+        os.environ.setdefault("EXPERT_SYSTEM_SHARED_DIR", str(knowledge_base_dir / ".shared"))
 
     print(f"Сервер запущен: http://localhost:{port}")
 
@@ -455,6 +1397,7 @@ if __name__ == "__main__":
         "main:app",
         host="0.0.0.0",
         port=port,
-        reload=True,
+        reload=workers == 1,
+        workers=workers,
         log_level="info"
     )
\ No newline at end of file
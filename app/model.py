@@ -0,0 +1,213 @@
+import sys
+from typing import Dict, List, Tuple, Union
+
+
+class Condition:
+    """Компактное неизменяемое условие правила.
+
+    Одинаковые условия разных правил хранятся одним объектом
+    (см. ConditionPool), поэтому изменять атрибуты нельзя.
+    Для совместимости со старым словарным форматом поддерживает
+    condition["fact"] и condition.get("fact").
+
+    Attributes:
+        fact (Union[str, Tuple[str, ...]]): Факт или кортеж фактов группы
+        operator (str): Оператор условия ('AND', 'OR', 'NOT' или '')
+        is_group (bool): Является ли условие группой фактов
+    """
+
+    __slots__ = ("fact", "operator", "is_group")
+
+    def __init__(self, fact: Union[str, Tuple[str, ...]], operator: str = "", is_group: bool = False):
+        """
+        Конструктор условия.
+
+        Args:
+            fact (Union[str, Tuple[str, ...]]): Факт или кортеж фактов группы
+            operator (str): Оператор условия
+            is_group (bool): Является ли условие группой фактов
+        """
+
+        self.fact = fact
+        self.operator = operator
+        self.is_group = is_group
+
+    def get(self, key: str, default=None):
+        return getattr(self, key, default) if key in self.__slots__ else default
+
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Condition):
+            return NotImplemented
+        return (self.fact, self.operator, self.is_group) == (other.fact, other.operator, other.is_group)
+
+    def __hash__(self) -> int:
+        return hash((self.fact, self.operator, self.is_group))
+
+    def __repr__(self) -> str:
+        return f"Condition({self.fact!r}, {self.operator!r}, {self.is_group!r})"
+
+    def __reduce__(self):
+        return Condition, (self.fact, self.operator, self.is_group)
+
+    def to_dict(self) -> Dict:
+        """
+        Преобразовать условие в словарь формата JSON-файлов базы знаний.
+
+        Returns:
+            Dict: {'fact': факт или список фактов, 'operator': str, 'is_group': bool}
+        """
+
+        return {
+            "fact": list(self.fact) if isinstance(self.fact, tuple) else self.fact,
+            "operator": self.operator,
+            "is_group": self.is_group
+        }
+
+
+class Rule:
+    """Компактное правило экспертной системы.
+
+    Для совместимости со старым словарным форматом поддерживает
+    rule["if"], rule["then"] и rule["cf"].
+
+    Attributes:
+        conditions (Tuple[Condition, ...]): Условия правила
+        conclusion (str): Вывод правила
+        cf (float): Коэффициент уверенности правила
+    """
+
+    __slots__ = ("conditions", "conclusion", "cf")
+
+    _KEYS = {"if": "conditions", "then": "conclusion", "cf": "cf"}
+
+    def __init__(self, conditions: Tuple[Condition, ...], conclusion: str, cf: float):
+        """
+        Конструктор правила.
+
+        Args:
+            conditions (Tuple[Condition, ...]): Условия правила
+            conclusion (str): Вывод правила
+            cf (float): Коэффициент уверенности правила
+        """
+
+        self.conditions = conditions
+        self.conclusion = conclusion
+        self.cf = cf
+
+    def get(self, key: str, default=None):
+        attribute = self._KEYS.get(key)
+        return getattr(self, attribute) if attribute else default
+
+    def __getitem__(self, key: str):
+        attribute = self._KEYS.get(key)
+        if attribute is None:
+            raise KeyError(key)
+        return getattr(self, attribute)
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Rule):
+            return NotImplemented
+        return (self.conditions, self.conclusion, self.cf) == (other.conditions, other.conclusion, other.cf)
+
+    def __hash__(self) -> int:
+        return hash((self.conditions, self.conclusion, self.cf))
+
+    def __repr__(self) -> str:
+        return f"Rule({list(self.conditions)!r}, {self.conclusion!r}, {self.cf!r})"
+
+    def __reduce__(self):
+        return Rule, (self.conditions, self.conclusion, self.cf)
+
+    def to_dict(self) -> Dict:
+        """
+        Преобразовать правило в словарь формата JSON-файлов базы знаний.
+
+        Returns:
+            Dict: {'if': [условия], 'then': вывод, 'cf': CF}
+        """
+
+        return {
+            "if": [condition.to_dict() for condition in self.conditions],
+            "then": self.conclusion,
+            "cf": self.cf
+        }
+
+
+class ConditionPool:
+    """Таблица интернирования условий и списков условий.
+
+    Одинаковые условия (и одинаковые последовательности условий) всех
+    правил хранятся в одном экземпляре, а строки фактов интернируются.
+
+    Attributes:
+        conditions (Dict[Condition, Condition]): Интернированные условия
+        antecedents (Dict[Tuple[Condition, ...], Tuple[Condition, ...]]): Интернированные списки условий
+    """
+
+    def __init__(self):
+        """Конструктор таблицы интернирования."""
+
+        self.conditions: Dict[Condition, Condition] = {}
+        self.antecedents: Dict[Tuple[Condition, ...], Tuple[Condition, ...]] = {}
+
+    def condition(self, fact, operator: str = "", is_group: bool = False) -> Condition:
+        """
+        Получить интернированное условие.
+
+        Args:
+            fact: Факт (строка) или список фактов группы
+            operator (str): Оператор условия
+            is_group (bool): Является ли условие группой фактов
+
+        Returns:
+            Condition: Общий экземпляр условия
+        """
+
+        if isinstance(fact, list):
+            fact = tuple(_intern(member) for member in fact)
+        else:
+            fact = _intern(fact)
+        if isinstance(operator, str):
+            operator = sys.intern(operator)
+
+        condition = Condition(fact, operator, is_group)
+        try:
+            return self.conditions.setdefault(condition, condition)
+        except TypeError:
+            return condition
+
+    def antecedent(self, conditions: List[Condition]) -> Tuple[Condition, ...]:
+        """
+        Получить интернированный кортеж условий.
+
+        Args:
+            conditions (List[Condition]): Условия правила
+
+        Returns:
+            Tuple[Condition, ...]: Общий экземпляр кортежа условий
+        """
+
+        key = tuple(conditions)
+        try:
+            return self.antecedents.setdefault(key, key)
+        except TypeError:
+            return key
+
+
+def _intern(value):
+    """
+    Интернировать строку, оставив значения других типов без изменений.
+
+    Args:
+        value: Значение факта
+
+    Returns:
+        Интернированная строка или исходное значение
+    """
+
+    return sys.intern(value) if type(value) is str else value
@@ -0,0 +1,352 @@
+from typing import Dict, List, Optional, Tuple
+
+from app.fact_trie import FactTrie, wildcard_prefix, wildcard_value
+from app.model import Condition, Rule
+
+
+FACT = 0
+NOT = 1
+GROUP = 2
+AND = 3
+OR = 4
+CONST = 5
+WILDCARD = 6
+
+
+class ConditionNetwork:
+    """Сеть общих подвыражений условий правил (в духе Rete).
+
+    Одинаковые подвыражения условий разных правил - отдельные факты,
+    отрицания, группы и префиксы цепочек И/ИЛИ - объединяются в один узел
+    (hash-consing). Цепочка условий правила вычисляется слева направо,
+    как в ExpertSystem._evaluate_conditions, поэтому общий префикс цепочки
+    у нескольких правил превращается в общий узел.
+
+    Сеть зависит только от списка правил; значения узлов хранятся
+    в отдельном сеансе вычисления (NetworkSession). При замене списка
+    правил по разнице (rebind) новые правила докомпилируются в ту же сеть.
+
+    Attributes:
+        kinds (List[int]): Тип каждого узла
+        args (List): Аргументы узла: факт, кортеж дочерних узлов, пара (левый, правый), константа
+            или (префикс, отрицание, все) для шаблона
+        parents (List[List[int]]): Родительские узлы каждого узла
+        fact_nodes (Dict[str, List[int]]): Листовые узлы, читающие факт
+        wildcard_nodes (Dict[str, List[int]]): Узлы шаблонов по префиксу
+        wildcard_prefixes (FactTrie): Префиксы шаблонов (для поиска шаблонов, покрывающих факт)
+        rule_nodes (List[Optional[int]]): Корневой узел условий каждого правила
+            (None, если условия правила не удалось скомпилировать)
+        retired (int): Количество корней удаленных правил, оставшихся в сети после rebind
+    """
+
+    def __init__(self, rules: List[Rule]):
+        """
+        Конструктор сети: компилирует условия всех правил.
+
+        Args:
+            rules (List[Rule]): Правила экспертной системы
+        """
+
+        self.kinds: List[int] = []
+        self.args: List = []
+        self.parents: List[List[int]] = []
+        self.fact_nodes: Dict[str, List[int]] = {}
+        self.wildcard_nodes: Dict[str, List[int]] = {}
+        self.wildcard_prefixes = FactTrie()
+        self._index: Dict[Tuple, int] = {}
+        self.rule_nodes: List[Optional[int]] = []
+        self.retired = 0
+
+        for rule in rules:
+            self.rule_nodes.append(self._compile_rule(rule))
+
+    @property
+    def size(self) -> int:
+        """Количество узлов сети."""
+
+        return len(self.kinds)
+
+    def sharing_factor(self) -> float:
+        """
+        Оценить степень общности подвыражений.
+
+        Returns:
+            float: Отношение числа ссылок на узлы к числу узлов (1.0 - общих узлов нет)
+        """
+
+        references = sum(len(parents) for parents in self.parents)
+        references += sum(1 for node in self.rule_nodes if node is not None)
+        return references / self.size if self.size else 1.0
+
+    def rebind(self, rules: List[Rule], previous: List[Optional[int]]):
+        """
+        Перейти к новому списку правил, сохранив узлы переиспользуемых правил.
+
+        Узлы удаленных правил остаются в сети (их число учитывается в retired);
+        сеансы, созданные до вызова, становятся недействительными.
+
+        Args:
+            rules (List[Rule]): Новый список правил
+            previous (List[Optional[int]]): Прежний индекс каждого правила (None - новое правило)
+        """
+
+        old_nodes = self.rule_nodes
+        self.rule_nodes = [
+            old_nodes[index] if index is not None else self._compile_rule(rule)
+            for rule, index in zip(rules, previous)
+        ]
+        self.retired += len(old_nodes) - (len(previous) - previous.count(None))
+
+    def session(self) -> "NetworkSession":
+        """
+        Создать сеанс вычисления значений узлов.
+
+        Returns:
+            NetworkSession: Сеанс с пустым кэшем значений
+        """
+
+        return NetworkSession(self)
+
+    def _node(self, kind: int, arg) -> int:
+        """
+        Получить узел с заданным типом и аргументами, создав его при необходимости.
+
+        Args:
+            kind (int): Тип узла
+            arg: Аргументы узла
+
+        Returns:
+            int: Номер узла
+        """
+
+        key = (kind, arg)
+        node = self._index.get(key)
+        if node is not None:
+            return node
+
+        node = len(self.kinds)
+        self._index[key] = node
+        self.kinds.append(kind)
+        self.args.append(arg)
+        self.parents.append([])
+
+        if kind in (FACT, NOT):
+            self.fact_nodes.setdefault(arg, []).append(node)
+        elif kind == WILDCARD:
+            self.wildcard_nodes.setdefault(arg[0], []).append(node)
+            self.wildcard_prefixes.add(arg[0])
+        elif kind == GROUP:
+            for child in arg:
+                self.parents[child].append(node)
+        elif kind in (AND, OR):
+            self.parents[arg[0]].append(node)
+            if arg[1] != arg[0]:
+                self.parents[arg[1]].append(node)
+
+        return node
+
+    def _compile_rule(self, rule: Rule) -> Optional[int]:
+        """
+        Скомпилировать условия правила.
+
+        Args:
+            rule (Rule): Правило
+
+        Returns:
+            Optional[int]: Номер корневого узла или None, если условия не удалось скомпилировать
+        """
+
+        try:
+            return self._compile_conditions(rule.conditions)
+        except Exception:
+            return None
+
+    def _compile_condition(self, condition: Condition) -> int:
+        """
+        Скомпилировать одно условие (аналог ExpertSystem._evaluate_single_condition).
+
+        Args:
+            condition (Condition): Условие правила
+
+        Returns:
+            int: Номер узла условия
+        """
+
+        fact = condition.fact
+        negated = condition.operator.upper() == "NOT"
+
+        if condition.is_group and isinstance(fact, tuple):
+            members = tuple(self._leaf(member, negated) for member in fact)
+            if not members:
+                return self._node(CONST, 0.0)
+            if len(members) == 1:
+                return members[0]
+            return self._node(GROUP, members)
+
+        return self._leaf(fact, negated, bool(condition.is_group))
+
+    def _leaf(self, fact, negated: bool, every: bool = False) -> int:
+        """
+        Получить листовой узел факта или шаблона.
+
+        Args:
+            fact: Факт условия
+            negated (bool): Условие с НЕТ
+            every (bool): Шаблон агрегируется по всем фактам (минимум), а не по любому (максимум)
+
+        Returns:
+            int: Номер узла
+        """
+
+        prefix = wildcard_prefix(fact)
+        if prefix is not None:
+            return self._node(WILDCARD, (prefix, negated, every))
+
+        hash(fact)
+        return self._node(NOT if negated else FACT, fact)
+
+    def _compile_conditions(self, conditions: Tuple[Condition, ...]) -> int:
+        """
+        Скомпилировать цепочку условий (аналог ExpertSystem._evaluate_conditions).
+
+        Args:
+            conditions (Tuple[Condition, ...]): Условия правила
+
+        Returns:
+            int: Номер корневого узла условий
+        """
+
+        if not conditions:
+            return self._node(CONST, 0.0)
+
+        node = self._compile_condition(conditions[0])
+        current_operator = conditions[0].operator.upper() or "AND"
+
+        for condition in conditions[1:]:
+            right = self._compile_condition(condition)
+            node = self._node(OR if current_operator == "OR" else AND, (node, right))
+            current_operator = condition.operator.upper() or "AND"
+
+        return node
+
+
+class NetworkSession:
+    """Сеанс вычисления сети условий над словарем фактов.
+
+    Значение узла вычисляется один раз и хранится до изменения одного
+    из фактов, от которых узел зависит.
+
+    Attributes:
+        network (ConditionNetwork): Сеть условий
+        values (List[Optional[float]]): Кэш значений узлов (None - не вычислено)
+    """
+
+    def __init__(self, network: ConditionNetwork):
+        """
+        Конструктор сеанса.
+
+        Args:
+            network (ConditionNetwork): Сеть условий
+        """
+
+        self.network = network
+        self.values: List[Optional[float]] = [None] * network.size
+
+    def reset(self):
+        """Сбросить кэш значений всех узлов."""
+
+        self.values = [None] * self.network.size
+
+    def rule_value(self, index: int, facts: Dict[str, float]) -> float:
+        """
+        Получить CF условий правила.
+
+        Args:
+            index (int): Индекс правила
+            facts (Dict[str, float]): Текущие факты
+
+        Returns:
+            float: CF условий правила
+        """
+
+        return self.value(self.network.rule_nodes[index], facts)
+
+    def value(self, node: int, facts: Dict[str, float]) -> float:
+        """
+        Вычислить значение узла с использованием кэша.
+
+        Цепочки И/ИЛИ вычисляются итеративно по левому краю, поэтому
+        глубина рекурсии не зависит от числа условий в правиле.
+
+        Args:
+            node (int): Номер узла
+            facts (Dict[str, float]): Текущие факты
+
+        Returns:
+            float: CF узла
+        """
+
+        values = self.values
+        value = values[node]
+        if value is not None:
+            return value
+
+        kinds = self.network.kinds
+        args = self.network.args
+        spine = []
+
+        while True:
+            value = values[node]
+            if value is not None:
+                break
+
+            kind = kinds[node]
+            arg = args[node]
+            if kind == AND or kind == OR:
+                spine.append(node)
+                node = arg[0]
+                continue
+
+            if kind == FACT:
+                value = facts.get(arg, 0.0)
+            elif kind == NOT:
+                value = 1.0 - facts.get(arg, 0.0)
+            elif kind == GROUP:
+                value = min(self.value(child, facts) for child in arg)
+            elif kind == WILDCARD:
+                value = wildcard_value(facts, *arg)
+            else:
+                value = arg
+            values[node] = value
+            break
+
+        for node in reversed(spine):
+            right = self.value(args[node][1], facts)
+            value = max(value, right) if kinds[node] == OR else min(value, right)
+            values[node] = value
+
+        return value
+
+    def fact_changed(self, fact: str):
+        """
+        Сбросить кэш узлов, зависящих от изменившегося факта
+        (в том числе шаблонов, префиксу которых соответствует факт).
+
+        Args:
+            fact (str): Название изменившегося факта
+        """
+
+        values = self.values
+        network = self.network
+        parents = network.parents
+        pending = list(network.fact_nodes.get(fact, ()))
+        if network.wildcard_nodes:
+            for prefix in network.wildcard_prefixes.prefixes_of(fact):
+                pending.extend(network.wildcard_nodes[prefix])
+
+        while pending:
+            node = pending.pop()
+            if values[node] is None:
+                continue
+            values[node] = None
+            pending.extend(parents[node])
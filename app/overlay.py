@@ -0,0 +1,162 @@
+from collections.abc import MutableMapping
+from typing import Dict, Iterator, List, Mapping, Optional, Set, Tuple
+
+from app.fact_store import next_version
+from app.fact_trie import FactTrie, match_facts
+from app.fuzzy_index import TrigramIndex, merge_matches, similar_facts
+
+
+_MISSING = object()
+
+
+class FactOverlay(MutableMapping):
+    """Слой изменений фактов поверх базового словаря (copy-on-write).
+
+    Чтение проходит сначала по слою изменений, затем по базовым фактам;
+    запись и удаление затрагивают только слой, поэтому базовые факты
+    не копируются и не меняются. Базой может быть другой FactOverlay,
+    что позволяет строить цепочки гипотез.
+
+    Attributes:
+        base (Mapping[str, float]): Базовые факты (только для чтения)
+        delta (Dict[str, float]): Факты, записанные поверх базы
+        removed (Set[str]): Базовые факты, удаленные в слое
+        version (int): Версия последнего изменения слоя
+    """
+
+    def __init__(self, base: Mapping[str, float], changes: Optional[Dict[str, Optional[float]]] = None):
+        """
+        Конструктор слоя изменений.
+
+        Args:
+            base (Mapping[str, float]): Базовые факты
+            changes (Optional[Dict[str, Optional[float]]]): Начальные изменения
+                (None в качестве CF удаляет факт)
+        """
+
+        self.base = base
+        self.delta: Dict[str, float] = {}
+        self.removed: Set[str] = set()
+        self.version = next_version()
+        self._added: Optional[FactTrie] = None
+        self._added_fuzzy: Optional[TrigramIndex] = None
+
+        for fact, cf in (changes or {}).items():
+            if cf is None:
+                self.pop(fact, None)
+            else:
+                self[fact] = cf
+
+    def __getitem__(self, key: str) -> float:
+        value = self.delta.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if key in self.removed:
+            raise KeyError(key)
+        return self.base[key]
+
+    def get(self, key: str, default=None):
+        value = self.delta.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        if key in self.removed:
+            return default
+        return self.base.get(key, default)
+
+    def __contains__(self, key) -> bool:
+        if key in self.delta:
+            return True
+        return key not in self.removed and key in self.base
+
+    def __setitem__(self, key: str, value: float):
+        if key not in self.base:
+            if self._added is not None:
+                self._added.add(key)
+            if self._added_fuzzy is not None:
+                self._added_fuzzy.add(key)
+        self.delta[key] = value
+        self.removed.discard(key)
+        self.version = next_version()
+
+    def __delitem__(self, key: str):
+        if key not in self:
+            raise KeyError(key)
+        self.delta.pop(key, None)
+        if key in self.base:
+            self.removed.add(key)
+        else:
+            if self._added is not None:
+                self._added.discard(key)
+            if self._added_fuzzy is not None:
+                self._added_fuzzy.discard(key)
+        self.version = next_version()
+
+    def __iter__(self) -> Iterator[str]:
+        for key in self.base:
+            if key not in self.removed:
+                yield key
+        for key in self.delta:
+            if key not in self.base:
+                yield key
+
+    def __len__(self) -> int:
+        added = sum(1 for key in self.delta if key not in self.base)
+        return len(self.base) - len(self.removed) + added
+
+    def prefix_matches(self, prefix: str) -> List[str]:
+        """
+        Найти факты слоя, названия которых начинаются с префикса.
+
+        Базовые факты ищутся индексом базы (см. fact_trie.match_facts),
+        новые факты слоя - собственным префиксным деревом.
+
+        Args:
+            prefix (str): Префикс названия
+
+        Returns:
+            List[str]: Названия фактов с префиксом
+        """
+
+        matches = [key for key in match_facts(self.base, prefix) if key not in self.removed]
+        if self._added is None:
+            self._added = FactTrie(key for key in self.delta if key not in self.base)
+        matches.extend(self._added.matches(prefix))
+        return matches
+
+    def fuzzy_matches(self, name: str, threshold: float, limit: int) -> List[Tuple[str, float]]:
+        """
+        Найти факты слоя с названиями, похожими на заданное.
+
+        Args:
+            name (str): Название из запроса
+            threshold (float): Минимальное сходство
+            limit (int): Максимальное количество результатов
+
+        Returns:
+            List[Tuple[str, float]]: Пары (название факта, сходство) по убыванию сходства
+        """
+
+        if self._added_fuzzy is None:
+            self._added_fuzzy = TrigramIndex(key for key in self.delta if key not in self.base)
+        return merge_matches(
+            [similar_facts(self.base, name, threshold, limit + len(self.removed)),
+             self._added_fuzzy.search(name, threshold, limit)],
+            limit, self.removed
+        )
+
+    def changes(self) -> Dict[str, Optional[float]]:
+        """
+        Получить отличия слоя от базовых фактов.
+
+        Returns:
+            Dict[str, Optional[float]]: Измененные и новые факты с CF,
+                удаленные факты - со значением None
+        """
+
+        changes: Dict[str, Optional[float]] = {
+            key: value for key, value in self.delta.items()
+            if key not in self.base or self.base[key] != value
+        }
+        for key in self.removed:
+            changes[key] = None
+        return changes
@@ -0,0 +1,153 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from app.analyzer import rule_literals
+from app.fact_trie import match_facts, rule_wildcards
+from app.model import Rule
+
+
+class ShardedInference:
+    """Параллельный вывод по независимым частям базы знаний в пуле процессов.
+
+    Правила слабо связных компонент графа зависимостей фактов (см.
+    analyzer.rule_components) не имеют общих фактов, поэтому вывод по каждой
+    компоненте не зависит от остальных и дает те же факты, что и общий infer:
+    внутри компоненты правила оцениваются в прежнем порядке. Компоненты
+    распределяются по шардам с примерно равным числом правил, каждый шард
+    получает только свои правила и факты, результаты объединяются.
+
+    Пул процессов создается при первом параллельном выводе и переиспользуется.
+
+    Attributes:
+        workers (int): Количество процессов пула
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Конструктор.
+
+        Args:
+            workers (Optional[int]): Количество процессов (по умолчанию число ядер)
+        """
+
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def shards(self, components: List[List[int]], plan: List[int]) -> List[List[int]]:
+        """
+        Распределить компоненты по шардам.
+
+        Компоненты раскладываются от больших к меньшим в наименее
+        загруженный шард (жадная балансировка по числу правил).
+
+        Args:
+            components (List[List[int]]): Индексы правил компонент
+            plan (List[int]): Индексы правил, участвующих в выводе
+
+        Returns:
+            List[List[int]]: Непустые шарды с индексами правил по возрастанию
+        """
+
+        planned = set(plan)
+        parts = [[index for index in component if index in planned] for component in components]
+        parts.sort(key=len, reverse=True)
+
+        shards: List[List[int]] = [[] for _ in range(min(self.workers, len(parts)))]
+        for part in parts:
+            if part:
+                min(shards, key=len).extend(part)
+        return [sorted(shard) for shard in shards if shard]
+
+    def run(self, shards: List[List[int]], rules: List[Rule], facts: Dict[str, float],
+            max_passes: Optional[int] = None, epsilon: float = 0.0, provenance: bool = False) -> List[Dict]:
+        """
+        Выполнить вывод по шардам в пуле процессов.
+
+        Args:
+            shards (List[List[int]]): Индексы правил шардов
+            rules (List[Rule]): Все правила
+            facts (Dict[str, float]): Исходные факты
+            max_passes (Optional[int]): Максимальное число проходов по правилам шарда
+            epsilon (float): Минимальное приращение CF, считающееся улучшением вывода
+            provenance (bool): Вести ли журнал происхождения в шардах
+
+        Returns:
+            List[Dict]: Итоги вывода каждого шарда (как ExpertSystem.last_inference;
+                при provenance - с записями журнала шарда в ключе 'provenance')
+        """
+
+        executor = self._get_executor()
+        futures = []
+        for shard in shards:
+            shard_rules = [rules[index] for index in shard]
+            names = set()
+            for rule in shard_rules:
+                try:
+                    names.add(rule.conclusion)
+                    names.update(fact for fact, _ in rule_literals(rule))
+                    for prefix in rule_wildcards(rule):
+                        names.update(match_facts(facts, prefix))
+                except TypeError:
+                    continue
+            shard_facts = {name: facts[name] for name in names if name in facts}
+            futures.append(executor.submit(infer_shard, shard_facts, shard_rules, max_passes, epsilon, provenance))
+        return [future.result() for future in futures]
+
+    def shutdown(self):
+        """Остановить пул процессов."""
+
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """
+        Получить пул процессов, создав его при первом обращении.
+
+        Returns:
+            ProcessPoolExecutor: Пул процессов (процессы запускаются через spawn,
+                так как сервер многопоточный)
+        """
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+
+def infer_shard(facts: Dict[str, float], rules: List[Rule], max_passes: Optional[int] = None,
+                epsilon: float = 0.0, provenance: bool = False) -> Dict:
+    """
+    Выполнить вывод по одному шарду (в процессе пула).
+
+    Args:
+        facts (Dict[str, float]): Факты шарда
+        rules (List[Rule]): Правила шарда
+        max_passes (Optional[int]): Максимальное число проходов по правилам
+        epsilon (float): Минимальное приращение CF, считающееся улучшением вывода
+        provenance (bool): Вести ли журнал происхождения
+
+    Returns:
+        Dict: Итоги вывода шарда (inferred, passes, firings, truncated, reason
+            и при provenance - записи журнала)
+    """
+
+    from app.expert_system import ExpertSystem
+
+    engine = ExpertSystem()
+    engine.facts = facts
+    engine.rules = rules
+    engine.provenance.enabled = provenance
+    engine.infer(max_passes=max_passes, epsilon=epsilon)
+    summary = dict(engine.last_inference)
+    if provenance:
+        summary["provenance"] = engine.provenance.export()
+    return summary
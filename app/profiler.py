@@ -0,0 +1,223 @@
+from collections import deque
+from typing import Dict, List, Optional
+
+from app.model import Rule
+
+
+class InferenceProfiler:
+    """Профилировщик логического вывода с разбивкой по правилам.
+
+    Считает для каждого правила число оценок условий, срабатываний и
+    суммарное время оценки, а для каждого вызова infer - число проходов,
+    срабатываний и длительность. Выключенный профилировщик не вызывается
+    из цикла вывода вовсе, поэтому его стоимость - одна проверка на правило.
+
+    Attributes:
+        enabled (bool): Включен ли сбор статистики
+        evaluations (List[int]): Число оценок условий по индексам правил
+        firings (List[int]): Число срабатываний по индексам правил
+        time_ns (List[int]): Суммарное время оценки условий по индексам правил (нс)
+        runs (deque): Итоги последних вызовов infer
+    """
+
+    def __init__(self, enabled: bool = False, history: int = 100):
+        """
+        Конструктор профилировщика.
+
+        Args:
+            enabled (bool): Включить сбор статистики сразу
+            history (int): Количество хранимых итогов последних вызовов infer
+        """
+
+        self.enabled = enabled
+        self.runs = deque(maxlen=history)
+        self.reset()
+
+    def reset(self):
+        """Сбросить всю накопленную статистику."""
+
+        self.rules_version: Optional[int] = None
+        self.labels: List[str] = []
+        self.evaluations: List[int] = []
+        self.firings: List[int] = []
+        self.time_ns: List[int] = []
+        self.infer_calls = 0
+        self.passes_total = 0
+        self.firings_total = 0
+        self.seconds_total = 0.0
+        self.truncated_total = 0
+        self.runs.clear()
+
+    def begin_inference(self, rules_version: int, rules: List[Rule]):
+        """
+        Подготовить счетчики к вызову infer.
+
+        Если набор правил изменился с прошлого вызова, статистика по правилам
+        сбрасывается, так как индексы правил больше не соответствуют прежним.
+
+        Args:
+            rules_version (int): Версия списка правил
+            rules (List[Rule]): Правила, участвующие в выводе
+        """
+
+        if rules_version != self.rules_version:
+            self.rules_version = rules_version
+            self.labels = [str(rule.conclusion) for rule in rules]
+            self.evaluations = [0] * len(rules)
+            self.firings = [0] * len(rules)
+            self.time_ns = [0] * len(rules)
+
+    def record_evaluation(self, index: int, elapsed_ns: int):
+        """
+        Учесть оценку условий правила.
+
+        Args:
+            index (int): Индекс правила
+            elapsed_ns (int): Время оценки в наносекундах
+        """
+
+        self.evaluations[index] += 1
+        self.time_ns[index] += elapsed_ns
+
+    def record_firing(self, index: int):
+        """
+        Учесть срабатывание правила.
+
+        Args:
+            index (int): Индекс правила
+        """
+
+        self.firings[index] += 1
+
+    def end_inference(self, passes: int, firings: int, seconds: float, truncated: bool):
+        """
+        Учесть итоги вызова infer.
+
+        Args:
+            passes (int): Число проходов по правилам
+            firings (int): Число срабатываний правил
+            seconds (float): Длительность вывода в секундах
+            truncated (bool): Был ли вывод прерван по бюджету
+        """
+
+        self.infer_calls += 1
+        self.passes_total += passes
+        self.firings_total += firings
+        self.seconds_total += seconds
+        self.truncated_total += int(truncated)
+        self.runs.append({
+            "passes": passes,
+            "firings": firings,
+            "seconds": seconds,
+            "truncated": truncated
+        })
+
+    def hot_rules(self, limit: int = 10) -> List[Dict]:
+        """
+        Получить правила, потребляющие больше всего времени вывода.
+
+        Args:
+            limit (int): Максимальное количество правил в отчете
+
+        Returns:
+            List[Dict]: Правила, отсортированные по убыванию суммарного времени
+        """
+
+        total_ns = sum(self.time_ns) or 1
+        order = sorted(range(len(self.time_ns)), key=lambda i: self.time_ns[i], reverse=True)
+
+        return [
+            {
+                "rule": index,
+                "conclusion": self.labels[index],
+                "evaluations": self.evaluations[index],
+                "firings": self.firings[index],
+                "seconds": self.time_ns[index] / 1e9,
+                "share": self.time_ns[index] / total_ns
+            }
+            for index in order[:limit]
+            if self.evaluations[index]
+        ]
+
+    def report(self, limit: int = 10) -> Dict:
+        """
+        Сформировать JSON-отчет профилировщика.
+
+        Args:
+            limit (int): Максимальное количество правил в отчете
+
+        Returns:
+            Dict: Сводка по вызовам infer, последние вызовы и самые "горячие" правила
+        """
+
+        return {
+            "enabled": self.enabled,
+            "infer_calls": self.infer_calls,
+            "passes_total": self.passes_total,
+            "firings_total": self.firings_total,
+            "seconds_total": self.seconds_total,
+            "truncated_total": self.truncated_total,
+            "recent_runs": list(self.runs),
+            "hot_rules": self.hot_rules(limit)
+        }
+
+    def render_prometheus(self) -> str:
+        """
+        Сформировать метрики в текстовом формате Prometheus.
+
+        Returns:
+            str: Метрики в формате text/plain; version=0.0.4
+        """
+
+        lines = [
+            "# HELP expert_system_infer_calls_total Number of infer() calls.",
+            "# TYPE expert_system_infer_calls_total counter",
+            f"expert_system_infer_calls_total {self.infer_calls}",
+            "# HELP expert_system_infer_passes_total Rule passes made by infer().",
+            "# TYPE expert_system_infer_passes_total counter",
+            f"expert_system_infer_passes_total {self.passes_total}",
+            "# HELP expert_system_infer_firings_total Rule firings made by infer().",
+            "# TYPE expert_system_infer_firings_total counter",
+            f"expert_system_infer_firings_total {self.firings_total}",
+            "# HELP expert_system_infer_seconds_total Time spent in infer().",
+            "# TYPE expert_system_infer_seconds_total counter",
+            f"expert_system_infer_seconds_total {self.seconds_total:.9f}",
+            "# HELP expert_system_infer_truncated_total infer() calls cut off by a budget.",
+            "# TYPE expert_system_infer_truncated_total counter",
+            f"expert_system_infer_truncated_total {self.truncated_total}",
+            "# HELP expert_system_infer_last_passes Passes made by the last infer() call.",
+            "# TYPE expert_system_infer_last_passes gauge",
+            f"expert_system_infer_last_passes {self.runs[-1]['passes'] if self.runs else 0}",
+        ]
+
+        per_rule = [
+            ("expert_system_rule_evaluations_total", "Condition evaluations per rule.", self.evaluations, "{}"),
+            ("expert_system_rule_firings_total", "Firings per rule.", self.firings, "{}"),
+            ("expert_system_rule_seconds_total", "Condition evaluation time per rule.",
+             [ns / 1e9 for ns in self.time_ns], "{:.9f}"),
+        ]
+
+        for name, description, values, value_format in per_rule:
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} counter")
+            for index, value in enumerate(values):
+                if not self.evaluations[index]:
+                    continue
+                label = _escape_label(self.labels[index])
+                lines.append(f'{name}{{rule="{index}",conclusion="{label}"}} {value_format.format(value)}')
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    """
+    Экранировать значение метки Prometheus.
+
+    Args:
+        value (str): Исходное значение
+
+    Returns:
+        str: Значение с экранированными обратной косой чертой, кавычками и переводами строк
+    """
+
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
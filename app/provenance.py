@@ -0,0 +1,470 @@
+from array import array
+from bisect import bisect_left
+from typing import Callable, Dict, List, Mapping, Optional, Set, Tuple
+
+from app.analyzer import rule_literals
+from app.fact_trie import rule_wildcards, wildcard_prefix, wildcard_value
+from app.model import Rule
+
+
+class ProvenanceLog:
+    """Компактный журнал происхождения выведенных фактов.
+
+    Каждое срабатывание правила в infer записывается как кортеж
+    (факт, правило, CF, CF входных фактов) в массивы array с запасом емкости:
+    имя выведенного факта заменяется целочисленным идентификатором, CF входов
+    хранятся подряд в общем массиве со смещениями в порядке фактов условий
+    правила (сами имена входов берутся из правила при объяснении). Запись -
+    несколько присваиваний в массивы, поэтому журнал можно держать
+    включенным постоянно. Дерево объяснения строится по журналу при запросе
+    без повторного вывода.
+
+    Индексы правил в журнале действительны, пока не изменился список
+    правил, поэтому при смене версии правил журнал очищается; при перезагрузке
+    базы знаний по разнице записи переносятся на новые индексы (rebase).
+    Перед каждым выводом журнал сжимается (compact): остаются только записи,
+    которыми получены текущие CF фактов, и записи их входов, поэтому размер
+    журнала не растет от повторных изменений фактов и выводов.
+    Для шаблонного условия записывается CF шаблона по всем подходящим фактам.
+
+    Attributes:
+        enabled (bool): Включена ли запись
+        rules_version (Optional[int]): Версия правил, к которой относятся записи
+        size (int): Количество записей
+    """
+
+    def __init__(self, enabled: bool = False, capacity: int = 1024):
+        """
+        Конструктор журнала.
+
+        Args:
+            enabled (bool): Включить запись сразу
+            capacity (int): Начальная емкость массивов записей
+        """
+
+        self.enabled = enabled
+        self._initial_capacity = max(1, capacity)
+        self.reset()
+
+    def reset(self):
+        """Очистить журнал."""
+
+        self.rules_version: Optional[int] = None
+        self.size = 0
+        self._capacity = self._initial_capacity
+        self._fact_ids: Dict[str, int] = {}
+        self._fact_names: List[str] = []
+        self._facts = array("l", [0]) * self._capacity
+        self._rules = array("l", [0]) * self._capacity
+        self._cfs = array("d", [0.0]) * self._capacity
+        self._offsets = array("l", [0]) * (self._capacity + 1)
+        self._input_cfs = array("d")
+        self._rules_list: List[Rule] = []
+        self._wildcard_rules: Set[int] = set()
+        self._history: Optional[Dict[int, List[int]]] = None
+
+    def begin(self, rules_version: int, rules: List[Rule], facts: Optional[Mapping[str, float]] = None):
+        """
+        Подготовить журнал к вызову infer.
+
+        Args:
+            rules_version (int): Версия списка правил
+            rules (List[Rule]): Правила экспертной системы
+            facts (Optional[Mapping[str, float]]): Факты перед выводом (для сжатия журнала)
+        """
+
+        if rules_version != self.rules_version:
+            self.reset()
+            self.rules_version = rules_version
+            self._wildcard_rules = {index for index, rule in enumerate(rules) if rule_wildcards(rule)}
+        self._rules_list = rules
+        if facts is not None:
+            self.compact(facts)
+
+    def compact(self, facts: Mapping[str, float]):
+        """
+        Удалить записи, не участвующие в объяснении текущих фактов.
+
+        Для каждого факта остается последняя запись о нем, если CF факта
+        не изменился после нее, и (рекурсивно) записи, которыми объясняются
+        ее входы. Записи удаленных и перезаписанных фактов отбрасываются,
+        порядок оставшихся записей сохраняется.
+
+        Args:
+            facts (Mapping[str, float]): Текущие факты
+        """
+
+        size = self.size
+        if size == 0:
+            return
+
+        live = set()
+        for fact in self._fact_ids:
+            record = self._latest(fact, size)
+            if record is not None and facts.get(fact) == self._cfs[record]:
+                live.add(record)
+
+        pending = list(live)
+        while pending:
+            record = pending.pop()
+            names = self._input_names(self._rules_list[self._rules[record]])
+            inputs = self._input_cfs[self._offsets[record]:self._offsets[record + 1]]
+            for name, input_cf in zip(names, inputs):
+                source = self._latest(name, record)
+                if source is not None and source not in live and self._cfs[source] == input_cf:
+                    live.add(source)
+                    pending.append(source)
+
+        if len(live) < size:
+            self._retain(sorted(live))
+
+    def rebase(self, rules_version: int, rules: List[Rule], rule_map: List[Optional[int]], dropped: Set[str]):
+        """
+        Перенести записи на измененный список правил (при перезагрузке по разнице).
+
+        Записи удаленных правил и записи о фактах, которые будут выведены
+        заново, отбрасываются; индексы остальных правил заменяются новыми.
+
+        Args:
+            rules_version (int): Версия нового списка правил
+            rules (List[Rule]): Новый список правил
+            rule_map (List[Optional[int]]): Новый индекс каждого прежнего правила (None - удалено)
+            dropped (Set[str]): Факты, записи о которых отбрасываются
+        """
+
+        self._wildcard_rules = {index for index, rule in enumerate(rules) if rule_wildcards(rule)}
+        if self.rules_version is None or self.size == 0:
+            self.rules_version = rules_version
+            self._rules_list = rules
+            return
+
+        dropped_ids = {self._fact_ids[fact] for fact in dropped if fact in self._fact_ids}
+        self._retain(
+            [
+                position for position in range(self.size)
+                if rule_map[self._rules[position]] is not None and self._facts[position] not in dropped_ids
+            ],
+            rule_map
+        )
+        self.rules_version = rules_version
+        self._rules_list = rules
+
+    def _retain(self, positions: List[int], rule_map: Optional[List[Optional[int]]] = None):
+        """
+        Оставить в журнале только заданные записи.
+
+        Args:
+            positions (List[int]): Номера оставляемых записей по возрастанию
+            rule_map (Optional[List[Optional[int]]]): Новый индекс каждого прежнего правила
+                (None - индексы правил не меняются)
+        """
+
+        old_facts, old_rules, old_cfs = self._facts, self._rules, self._cfs
+        old_offsets, old_inputs = self._offsets, self._input_cfs
+
+        self._facts = array("l", [0]) * self._capacity
+        self._rules = array("l", [0]) * self._capacity
+        self._cfs = array("d", [0.0]) * self._capacity
+        self._offsets = array("l", [0]) * (self._capacity + 1)
+        self._input_cfs = array("d")
+
+        for kept, position in enumerate(positions):
+            rule_index = old_rules[position]
+            self._facts[kept] = old_facts[position]
+            self._rules[kept] = rule_map[rule_index] if rule_map is not None else rule_index
+            self._cfs[kept] = old_cfs[position]
+            self._input_cfs.extend(old_inputs[old_offsets[position]:old_offsets[position + 1]])
+            self._offsets[kept + 1] = len(self._input_cfs)
+
+        self.size = len(positions)
+        self._history = None
+
+    def record(self, fact: str, rule_index: int, cf: float, facts: Mapping[str, float]):
+        """
+        Записать срабатывание правила.
+
+        Args:
+            fact (str): Выведенный факт
+            rule_index (int): Индекс сработавшего правила
+            cf (float): Записанный CF факта
+            facts (Mapping[str, float]): Факты на момент срабатывания (для CF входов)
+        """
+
+        position = self.size
+        if position == self._capacity:
+            self._grow()
+
+        fact_id = self._fact_ids.get(fact)
+        self._facts[position] = fact_id if fact_id is not None else self._fact_id(fact)
+        self._rules[position] = rule_index
+        self._cfs[position] = cf
+        append = self._input_cfs.append
+        get = facts.get
+        if rule_index in self._wildcard_rules:
+            get = self._wildcard_getter(rule_index, facts)
+        for condition in self._rules_list[rule_index].conditions:
+            name = condition.fact
+            if condition.is_group and isinstance(name, tuple):
+                for member in name:
+                    append(get(member, 0.0))
+            else:
+                append(get(name, 0.0))
+        self._offsets[position + 1] = len(self._input_cfs)
+        self.size = position + 1
+        self._history = None
+
+    def _wildcard_getter(self, rule_index: int, facts: Mapping[str, float]) -> Callable:
+        """
+        Получить функцию чтения CF входов правила с шаблонными условиями.
+
+        CF шаблона записывается как CF одного факта, отрицание которого
+        дает значение условия (как для обычных входов с НЕТ).
+
+        Args:
+            rule_index (int): Индекс правила
+            facts (Mapping[str, float]): Факты на момент срабатывания
+
+        Returns:
+            Callable: Аналог facts.get, вычисляющий CF шаблонов
+        """
+
+        patterns = {}
+        for condition in self._rules_list[rule_index].conditions:
+            name = condition.fact
+            negated = condition.operator.upper() == "NOT"
+            grouped = condition.is_group and isinstance(name, tuple)
+            for member in name if grouped else (name,):
+                prefix = wildcard_prefix(member)
+                if prefix is not None:
+                    every = bool(condition.is_group) and not grouped
+                    patterns[member] = wildcard_value(facts, prefix, False, every != negated)
+
+        def get(name, default: float = 0.0) -> float:
+            if name in patterns:
+                return patterns[name]
+            return facts.get(name, default)
+
+        return get
+
+    def export(self) -> Tuple:
+        """
+        Получить записи журнала в компактном виде (для передачи между процессами).
+
+        Returns:
+            Tuple: (имена фактов, факты, правила, CF, смещения, CF входов)
+        """
+
+        size = self.size
+        return (
+            list(self._fact_names),
+            self._facts[:size],
+            self._rules[:size],
+            self._cfs[:size],
+            self._offsets[:size + 1],
+            array("d", self._input_cfs)
+        )
+
+    def merge(self, exported: Tuple, rule_map: List[int]):
+        """
+        Добавить записи другого журнала (например, шарда параллельного вывода).
+
+        Args:
+            exported (Tuple): Результат export другого журнала
+            rule_map (List[int]): Индекс правила в этом журнале для каждого правила другого журнала
+        """
+
+        names, facts, rules, cfs, offsets, input_cfs = exported
+        ids = [self._fact_id(name) for name in names]
+        base = len(self._input_cfs)
+
+        for position in range(len(facts)):
+            if self.size == self._capacity:
+                self._grow()
+            self._facts[self.size] = ids[facts[position]]
+            self._rules[self.size] = rule_map[rules[position]]
+            self._cfs[self.size] = cfs[position]
+            self._offsets[self.size + 1] = base + offsets[position + 1]
+            self.size += 1
+
+        self._input_cfs.extend(input_cfs)
+        self._history = None
+
+    def stats(self) -> Dict:
+        """
+        Получить размер журнала.
+
+        Returns:
+            Dict: {'records': int, 'facts': int, 'inputs': int, 'bytes': int}
+        """
+
+        arrays = (self._facts, self._rules, self._cfs, self._offsets, self._input_cfs)
+        return {
+            "records": self.size,
+            "facts": len(self._fact_names),
+            "inputs": len(self._input_cfs),
+            "bytes": sum(len(values) * values.itemsize for values in arrays)
+        }
+
+    def explain(self, fact: str, facts: Mapping[str, float], rules: List[Rule], max_depth: int = 20,
+                describe: Optional[Callable[[Rule], List[str]]] = None) -> Dict:
+        """
+        Построить дерево объяснения CF факта.
+
+        Для выведенного факта берется последняя запись о нем, ее входы
+        объясняются записями, сделанными раньше нее; повторно встреченная
+        запись не раскрывается.
+
+        Args:
+            fact (str): Факт
+            facts (Mapping[str, float]): Текущие факты
+            rules (List[Rule]): Правила экспертной системы
+            max_depth (int): Максимальная глубина дерева
+            describe (Optional[Callable]): Форматирование условий правила
+
+        Returns:
+            Dict: Узел вида
+                {
+                    'fact': str, 'cf': float,
+                    'source': 'rule' | 'fact' | 'wildcard' | 'unknown',
+                    'rule': int, 'rule_cf': float, 'conditions': List[str],
+                    'inputs': [{'fact', 'cf', 'operator', 'source', ...}, ...]
+                }
+                (поля правила и входов - только для source='rule')
+        """
+
+        current = facts.get(fact)
+        record = self._latest(fact, self.size)
+        if record is not None and (current is None or self._cfs[record] != current):
+            record = None
+        return self._node(fact, current, record, rules, max_depth, describe, set())
+
+    def _node(self, fact: str, cf: Optional[float], record: Optional[int], rules: List[Rule], depth: int,
+              describe: Optional[Callable[[Rule], List[str]]], expanded: set) -> Dict:
+        """
+        Построить узел дерева объяснения.
+
+        Args:
+            fact (str): Факт
+            cf (Optional[float]): CF факта в точке объяснения
+            record (Optional[int]): Запись, которой получен CF (None - факт не выведен)
+            rules (List[Rule]): Правила экспертной системы
+            depth (int): Оставшаяся глубина
+            describe (Optional[Callable]): Форматирование условий правила
+            expanded (set): Уже раскрытые записи
+
+        Returns:
+            Dict: Узел дерева объяснения
+        """
+
+        if record is None:
+            return {"fact": fact, "cf": cf if cf is not None else 0.0, "source": "fact" if cf is not None else "unknown"}
+
+        rule_index = self._rules[record]
+        rule = rules[rule_index]
+        node = {
+            "fact": fact,
+            "cf": self._cfs[record],
+            "source": "rule",
+            "rule": rule_index,
+            "rule_cf": rule.cf
+        }
+        if describe is not None:
+            node["conditions"] = describe(rule)
+
+        if record in expanded:
+            node["repeated"] = True
+            return node
+        if depth <= 0:
+            node["truncated"] = True
+            return node
+        expanded.add(record)
+
+        names = self._input_names(rule)
+        recorded = dict(zip(names, self._input_cfs[self._offsets[record]:self._offsets[record + 1]]))
+        inputs = []
+        for name, negated in dict.fromkeys(rule_literals(rule)):
+            input_cf = recorded.get(name, 0.0)
+            source = self._latest(name, record)
+            if source is not None and self._cfs[source] != input_cf:
+                source = None
+            child = self._node(name, input_cf if name in recorded else None, source, rules, depth - 1,
+                               describe, expanded)
+            if wildcard_prefix(name) is not None:
+                child["source"] = "wildcard"
+            child["operator"] = "NOT" if negated else ""
+            inputs.append(child)
+
+        node["inputs"] = inputs
+        return node
+
+    @staticmethod
+    def _input_names(rule: Rule) -> List[str]:
+        """
+        Получить имена входов правила в порядке записи их CF.
+
+        Args:
+            rule (Rule): Правило
+
+        Returns:
+            List[str]: Факты и шаблоны условий (члены групп - по отдельности)
+        """
+
+        names = []
+        for condition in rule.conditions:
+            name = condition.fact
+            names.extend(name if condition.is_group and isinstance(name, tuple) else (name,))
+        return names
+
+    def _latest(self, fact: str, before: int) -> Optional[int]:
+        """
+        Найти последнюю запись о факте до заданной записи.
+
+        Args:
+            fact (str): Факт
+            before (int): Номер записи (ищутся записи с меньшим номером)
+
+        Returns:
+            Optional[int]: Номер записи или None
+        """
+
+        fact_id = self._fact_ids.get(fact)
+        if fact_id is None:
+            return None
+
+        if self._history is None:
+            history: Dict[int, List[int]] = {}
+            for position in range(self.size):
+                history.setdefault(self._facts[position], []).append(position)
+            self._history = history
+
+        records = self._history.get(fact_id, [])
+        position = bisect_left(records, before)
+        return records[position - 1] if position else None
+
+    def _fact_id(self, fact: str) -> int:
+        """
+        Получить идентификатор факта, назначив его при первом обращении.
+
+        Args:
+            fact (str): Факт
+
+        Returns:
+            int: Идентификатор факта
+        """
+
+        fact_id = self._fact_ids.get(fact)
+        if fact_id is None:
+            fact_id = len(self._fact_names)
+            self._fact_ids[fact] = fact_id
+            self._fact_names.append(fact)
+        return fact_id
+
+    def _grow(self):
+        """Удвоить емкость массивов записей."""
+
+        extra = self._capacity
+        self._facts.extend(array("l", [0]) * extra)
+        self._rules.extend(array("l", [0]) * extra)
+        self._cfs.extend(array("d", [0.0]) * extra)
+        self._offsets.extend(array("l", [0]) * extra)
+        self._capacity += extra
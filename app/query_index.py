@@ -0,0 +1,294 @@
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional, Tuple
+
+from app.model import Rule
+
+if TYPE_CHECKING:
+    from app.expert_system import ExpertSystem
+
+
+def normalize_fact_name(name: str) -> str:
+    """
+    Нормализовать имя факта так же, как ExpertSystem._match_fact.
+
+    Args:
+        name (str): Имя факта
+
+    Returns:
+        str: Имя в нижнем регистре с пробелами вместо подчеркиваний
+            и без повторяющихся пробелов
+    """
+
+    return ' '.join(name.lower().replace('_', ' ').split())
+
+
+class RuleStructureIndex:
+    """Индексы правил для сопоставления запросов.
+
+    Правило подходит под запрос (ExpertSystem._check_rule_structure_match),
+    только если совпадает структура условий: факты (группы - как множества)
+    и операторы по порядку. Поэтому правила группируются по сигнатуре
+    структуры, и для запроса проверяются лишь правила с той же сигнатурой.
+    Для частичных совпадений правила индексируются по нормализованным
+    именам фактов условий.
+
+    Индекс зависит только от списка правил.
+
+    Attributes:
+        structures (Dict[Tuple, List[int]]): Сигнатура структуры -> индексы правил
+        fact_rules (Dict[str, List[int]]): Нормализованное имя факта -> индексы правил
+        unindexed (List[int]): Правила с некорректными условиями (проверяются всегда)
+    """
+
+    def __init__(self, rules: List[Rule]):
+        """
+        Конструктор индекса.
+
+        Args:
+            rules (List[Rule]): Правила экспертной системы
+        """
+
+        self.structures: Dict[Tuple, List[int]] = {}
+        self.fact_rules: Dict[str, List[int]] = {}
+        self.unindexed: List[int] = []
+
+        for index, rule in enumerate(rules):
+            try:
+                signature = tuple(
+                    (frozenset(condition.fact) if isinstance(condition.fact, tuple) else condition.fact,
+                     _operator_key(condition.operator))
+                    for condition in rule.conditions
+                )
+                names = []
+                for condition in rule.conditions:
+                    fact = condition.fact
+                    for member in fact if condition.is_group and isinstance(fact, tuple) else (fact,):
+                        names.append(normalize_fact_name(member))
+                self.structures.setdefault(signature, []).append(index)
+            except (TypeError, AttributeError):
+                self.unindexed.append(index)
+                continue
+
+            for name in dict.fromkeys(names):
+                self.fact_rules.setdefault(name, []).append(index)
+
+    def structure_candidates(self, query_conditions: List[Dict]) -> List[int]:
+        """
+        Найти правила со структурой условий запроса.
+
+        Args:
+            query_conditions (List[Dict]): Разобранные условия запроса
+
+        Returns:
+            List[int]: Индексы правил по возрастанию
+        """
+
+        signature = tuple(
+            (frozenset(condition.get("fact", "")) if isinstance(condition.get("fact", ""), list)
+             else condition.get("fact", ""),
+             _operator_key(condition.get("operator", "")))
+            for condition in query_conditions
+        )
+        candidates = self.structures.get(signature, [])
+        if self.unindexed:
+            return sorted(candidates + self.unindexed)
+        return candidates
+
+    def fact_candidates(self, names: List[str]) -> List[int]:
+        """
+        Найти правила, в условиях которых есть хотя бы один из фактов.
+
+        Args:
+            names (List[str]): Нормализованные имена фактов
+
+        Returns:
+            List[int]: Индексы правил по возрастанию
+        """
+
+        candidates = set(self.unindexed)
+        for name in names:
+            candidates.update(self.fact_rules.get(name, ()))
+        return sorted(candidates)
+
+
+class QueryBatch:
+    """Пакетное выполнение запросов с общей работой по сопоставлению.
+
+    Одинаковые строки запросов выполняются один раз, каждая строка
+    разбирается один раз, каждый факт запроса (с оператором) сопоставляется
+    с фактами базы знаний один раз по индексу нормализованных имен вместо
+    перебора всех фактов, а правила-кандидаты берутся из RuleStructureIndex.
+    Результаты совпадают с ExpertSystem.query для каждой строки.
+
+    Attributes:
+        engine (ExpertSystem): Экспертная система
+        facts (Mapping[str, float]): Факты для сопоставления
+        unique (int): Количество различных выполненных запросов
+    """
+
+    def __init__(self, engine: "ExpertSystem", facts: Optional[Mapping[str, float]] = None):
+        """
+        Конструктор пакета.
+
+        Args:
+            engine (ExpertSystem): Экспертная система
+            facts (Optional[Mapping[str, float]]): Факты для сопоставления
+                (по умолчанию engine.facts)
+        """
+
+        self.engine = engine
+        self.facts = engine.facts if facts is None else facts
+        self.unique = 0
+        self._index = engine.query_index()
+        self._fact_names: Optional[Dict[str, str]] = None
+        self._normalized: Dict[str, str] = {}
+        self._matches: Dict[Tuple[str, str], Dict] = {}
+        self._results: Dict[str, Dict] = {}
+
+    def run(self, queries: List[str]) -> List[Dict]:
+        """
+        Выполнить запросы.
+
+        Args:
+            queries (List[str]): Строки запросов
+
+        Returns:
+            List[Dict]: Результаты в порядке запросов (как ExpertSystem.query;
+                для пустой строки - {'success': False, 'error': str})
+        """
+
+        results = []
+        for text in queries:
+            key = text.strip()
+            result = self._results.get(key)
+            if result is None:
+                result = self.query(key)
+                self._results[key] = result
+                self.unique += 1
+            results.append(result)
+        return results
+
+    def query(self, symptoms_input: str) -> Dict:
+        """
+        Выполнить один запрос с использованием общих кэшей пакета.
+
+        Args:
+            symptoms_input (str): Строка запроса
+
+        Returns:
+            Dict: Результат в формате ExpertSystem.query
+        """
+
+        if not symptoms_input:
+            return {"success": False, "error": "Введите данные для анализа"}
+
+        engine = self.engine
+        parsed_conditions = engine.parse_conditions_string(symptoms_input)
+        if not parsed_conditions:
+            return {"success": False, "error": "Введите корректные данные"}
+
+        matched_items = []
+        for condition in parsed_conditions:
+            fact_name = condition.get("fact", "")
+            operator = condition.get("operator", "").upper()
+            for fact in fact_name if isinstance(fact_name, list) else [fact_name]:
+                matched_items.append(dict(self._match(fact, operator)))
+
+        resolved_conditions = engine._resolve_conditions(parsed_conditions, matched_items)
+        conclusions = engine._collect_conclusions(
+            self._index.structure_candidates(resolved_conditions), resolved_conditions, matched_items
+        )
+
+        partial_matches = None
+        if not conclusions:
+            positive = {}
+            for item in matched_items:
+                if item["matched_fact"] is not None:
+                    positive.setdefault(self._normalize(item["matched_fact"]), item["cf"] > 0)
+            candidates = self._index.fact_candidates([name for name, found in positive.items() if found])
+            partial_rules = engine._find_partial_matches(matched_items, resolved_conditions, candidates)
+            if partial_rules:
+                partial_matches = {
+                    "message": "Точных выводов не найдено, но есть близкие правила",
+                    "partial_rules": partial_rules
+                }
+
+        return {
+            "success": True,
+            "query": symptoms_input,
+            "parsed_conditions": parsed_conditions,
+            "conclusions": conclusions,
+            "matched_items": matched_items,
+            "partial_matches": partial_matches
+        }
+
+    def _normalize(self, name: str) -> str:
+        """
+        Нормализовать имя факта с кэшированием.
+
+        Args:
+            name (str): Имя факта
+
+        Returns:
+            str: Нормализованное имя
+        """
+
+        normalized = self._normalized.get(name)
+        if normalized is None:
+            normalized = normalize_fact_name(name)
+            self._normalized[name] = normalized
+        return normalized
+
+    def _match(self, fact_name: str, operator: str) -> Dict:
+        """
+        Сопоставить факт запроса с фактами базы знаний (аналог ExpertSystem._match_fact;
+        при приближенном сопоставлении - ExpertSystem._fuzzy_match).
+
+        Args:
+            fact_name (str): Факт из запроса
+            operator (str): Логический оператор
+
+        Returns:
+            Dict: Сопоставление {'input', 'matched_fact', 'cf', 'operator'}
+        """
+
+        key = (fact_name, operator)
+        item = self._matches.get(key)
+        if item is not None:
+            return item
+
+        if self.engine.fuzzy_threshold is not None:
+            item = self.engine._fuzzy_match(fact_name, operator, self.facts)
+            self._matches[key] = item
+            return item
+
+        if self._fact_names is None:
+            self._fact_names = {}
+            for stored_fact in self.facts.keys():
+                self._fact_names.setdefault(self._normalize(stored_fact), stored_fact)
+
+        stored_fact = self._fact_names.get(self._normalize(fact_name))
+        if stored_fact is None:
+            item = {"input": fact_name, "matched_fact": None, "cf": 0.0, "operator": operator}
+        else:
+            cf = self.facts[stored_fact]
+            if operator == "NOT":
+                cf = 1.0 - cf
+            item = {"input": fact_name, "matched_fact": stored_fact, "cf": cf, "operator": operator}
+
+        self._matches[key] = item
+        return item
+
+
+def _operator_key(operator: str) -> str:
+    """
+    Привести оператор условия к виду, в котором сравнивается структура правила и запроса.
+
+    Args:
+        operator (str): Оператор условия
+
+    Returns:
+        str: 'AND' для пустого оператора и И, иначе оператор в верхнем регистре
+    """
+
+    operator = operator.upper()
+    return "AND" if operator in ["", "AND"] else operator
@@ -0,0 +1,318 @@
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Optional, Tuple
+
+from app.analyzer import fact_dependents
+from app.model import Rule
+
+
+class KnowledgeBaseDiff:
+    """Разница между загруженной базой знаний и ее новой версией.
+
+    Факты сравниваются по именам и CF. Правила сопоставляются как мультимножества
+    по значению (условия, вывод, CF): правило новой версии, равное еще
+    не сопоставленному загруженному, переиспользует его объект Rule, остальные
+    создаются заново. Порядок правил берется из новой версии, так что
+    результат совпадает с полной загрузкой.
+
+    Attributes:
+        facts (Dict[str, float]): Исходные факты новой версии
+        added_facts (List[str]): Добавленные факты
+        removed_facts (List[str]): Удаленные факты
+        changed_facts (List[str]): Факты с измененным CF
+        rules (List[Rule]): Правила новой версии
+        keys (List[Optional[Tuple]]): Ключи rule_key правил новой версии
+        previous (List[Optional[int]]): Индекс загруженного правила для каждого правила
+            новой версии (None - новое правило)
+        added_rules (List[int]): Индексы новых правил в новой версии
+        removed_rules (List[int]): Индексы удаленных правил в загруженной версии
+    """
+
+    def __init__(self, facts: Mapping[str, float], rules: List[Rule], data: Dict,
+                 make_rule: Callable[..., Rule], keys: Optional[List[Optional[Tuple]]] = None):
+        """
+        Конструктор разницы.
+
+        Args:
+            facts (Mapping[str, float]): Исходные факты загруженной версии
+            rules (List[Rule]): Правила загруженной версии
+            data (Dict): Новая версия {'facts': {...}, 'rules': [...]}
+            make_rule (Callable): Создание правила из условий, вывода и CF
+                (ExpertSystem._make_rule)
+            keys (Optional[List[Optional[Tuple]]]): Ключи rule_key загруженных правил,
+                если они уже известны (атрибут keys разницы предыдущей перезагрузки)
+
+        Raises:
+            ValueError: Если CF нового правила вне диапазона от 0 до 1
+        """
+
+        self.facts: Dict[str, float] = dict(data.get("facts", {}))
+        self.added_facts = [fact for fact in self.facts if fact not in facts]
+        self.removed_facts = [fact for fact in facts if fact not in self.facts]
+        self.changed_facts = [fact for fact, cf in self.facts.items() if fact in facts and facts[fact] != cf]
+
+        if keys is None:
+            keys = [rule_key(rule) for rule in rules]
+        available: Dict[Tuple, List[int]] = {}
+        for index in range(len(rules) - 1, -1, -1):
+            try:
+                available.setdefault(keys[index], []).append(index)
+            except TypeError:
+                continue
+
+        self.rules: List[Rule] = []
+        self.keys: List[Optional[Tuple]] = []
+        self.previous: List[Optional[int]] = []
+        self.added_rules: List[int] = []
+
+        for raw in data.get("rules", []):
+            index = self._take(available, raw_rule_key(raw))
+            if index is None:
+                if not 0 <= raw["cf"] <= 1:
+                    raise ValueError("Коэффициент уверенности должен быть от 0 до 1")
+                rule = make_rule(raw["if"], raw["then"], raw["cf"])
+                index = self._take(available, rule_key(rule))
+                if index is None:
+                    self.added_rules.append(len(self.rules))
+                    self.rules.append(rule)
+                    self.keys.append(rule_key(rule))
+                    self.previous.append(None)
+                    continue
+
+            self.rules.append(rules[index])
+            self.keys.append(keys[index])
+            self.previous.append(index)
+
+        self.removed_rules = sorted(index for indices in available.values() for index in indices)
+
+    @property
+    def empty(self) -> bool:
+        """Совпадают ли версии (включая порядок правил)."""
+
+        return not (self.added_facts or self.removed_facts or self.changed_facts) and not self.rules_changed
+
+    @property
+    def rules_changed(self) -> bool:
+        """Изменился ли список правил (состав или порядок)."""
+
+        if self.added_rules or self.removed_rules:
+            return True
+        return any(previous != index for index, previous in enumerate(self.previous))
+
+    def rule_map(self, count: int) -> List[Optional[int]]:
+        """
+        Получить новые индексы загруженных правил.
+
+        Args:
+            count (int): Количество правил загруженной версии
+
+        Returns:
+            List[Optional[int]]: Новый индекс для каждого загруженного правила (None - удалено)
+        """
+
+        mapping: List[Optional[int]] = [None] * count
+        for index, previous in enumerate(self.previous):
+            if previous is not None:
+                mapping[previous] = index
+        return mapping
+
+    def summary(self) -> Dict:
+        """
+        Получить количество изменений.
+
+        Returns:
+            Dict: {'facts': {'added', 'removed', 'changed'}, 'rules': {'added', 'removed', 'unchanged'}}
+        """
+
+        return {
+            "facts": {
+                "added": len(self.added_facts),
+                "removed": len(self.removed_facts),
+                "changed": len(self.changed_facts)
+            },
+            "rules": {
+                "added": len(self.added_rules),
+                "removed": len(self.removed_rules),
+                "unchanged": len(self.rules) - len(self.added_rules)
+            }
+        }
+
+    @staticmethod
+    def _take(available: Dict[Tuple, List[int]], key: Optional[Tuple]) -> Optional[int]:
+        """
+        Занять первое несопоставленное загруженное правило с данным ключом.
+
+        Args:
+            available (Dict[Tuple, List[int]]): Ключ -> индексы по убыванию
+            key (Optional[Tuple]): Ключ правила
+
+        Returns:
+            Optional[int]: Индекс загруженного правила или None
+        """
+
+        if key is None:
+            return None
+        try:
+            indices = available.get(key)
+        except TypeError:
+            return None
+        return indices.pop() if indices else None
+
+
+class KnowledgeBaseWatcher:
+    """Отслеживание изменений файла загруженной базы знаний по времени изменения.
+
+    Файл проверяется не чаще одного раза в interval секунд; признак
+    изменения - новая пара (st_mtime_ns, st_size).
+
+    Attributes:
+        interval (float): Минимальный интервал между проверками в секундах
+        path (Optional[Path]): Отслеживаемый файл
+    """
+
+    def __init__(self, interval: float):
+        """
+        Конструктор.
+
+        Args:
+            interval (float): Минимальный интервал между проверками в секундах
+        """
+
+        self.interval = interval
+        self.path: Optional[Path] = None
+        self._signature: Optional[Tuple[int, int]] = None
+        self._checked = 0.0
+
+    def watch(self, path: Optional[Path]):
+        """
+        Начать отслеживание файла (вызывается после его загрузки).
+
+        Args:
+            path (Optional[Path]): Файл базы знаний (None - прекратить отслеживание)
+        """
+
+        self.path = path
+        self._signature = self._stat() if path is not None else None
+        self._checked = time.monotonic()
+
+    def changed(self) -> bool:
+        """
+        Проверить, изменился ли файл с момента загрузки или прошлой проверки.
+
+        Returns:
+            bool: True, если файл изменился (отсутствующий файл изменением не считается)
+        """
+
+        if self.path is None or time.monotonic() - self._checked < self.interval:
+            return False
+
+        self._checked = time.monotonic()
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        self._signature = signature
+        return True
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        """
+        Получить сигнатуру файла.
+
+        Returns:
+            Optional[Tuple[int, int]]: (st_mtime_ns, st_size) или None, если файла нет
+        """
+
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+
+def rule_key(rule: Rule) -> Tuple:
+    """
+    Получить ключ сравнения правила по значению.
+
+    Args:
+        rule (Rule): Правило
+
+    Returns:
+        Tuple: (условия как кортежи (факт, оператор, группа), вывод, CF)
+    """
+
+    return (
+        tuple([(condition.fact, condition.operator, condition.is_group) for condition in rule.conditions]),
+        rule.conclusion,
+        rule.cf
+    )
+
+
+def raw_rule_key(raw: Dict) -> Optional[Tuple]:
+    """
+    Получить ключ правила из JSON без создания Rule (как rule_key для ExpertSystem._make_rule).
+
+    Args:
+        raw (Dict): Правило {'if': [...], 'then': str, 'cf': float}
+
+    Returns:
+        Optional[Tuple]: Ключ или None, если условия заданы строкой
+            или в нестандартном виде
+    """
+
+    conditions = raw["if"]
+    if not isinstance(conditions, list):
+        return None
+
+    try:
+        return tuple([
+            (tuple(condition["fact"]) if isinstance(condition["fact"], list) else condition["fact"],
+             condition["operator"], condition["is_group"])
+            for condition in conditions
+        ]), raw["then"], raw["cf"]
+    except (KeyError, TypeError):
+        pass
+
+    last = len(conditions) - 1
+    key = []
+    for index, condition in enumerate(conditions):
+        if isinstance(condition, dict):
+            fact = condition.get("fact", "")
+            key.append((
+                tuple(fact) if isinstance(fact, list) else fact,
+                condition.get("operator", ""),
+                condition.get("is_group", False)
+            ))
+        elif isinstance(condition, str):
+            key.append((condition, "AND" if index < last else "", False))
+        else:
+            return None
+    return tuple(key), raw["then"], raw["cf"]
+
+
+def remap_dependents(dependents: Dict[str, List[int]], rule_map: List[Optional[int]],
+                     rules: List[Rule], added: List[int]) -> Dict[str, List[int]]:
+    """
+    Перенести индекс зависимостей (analyzer.fact_dependents) на новый список правил.
+
+    Args:
+        dependents (Dict[str, List[int]]): Индекс для загруженных правил
+        rule_map (List[Optional[int]]): Новый индекс каждого загруженного правила
+        rules (List[Rule]): Новый список правил
+        added (List[int]): Индексы новых правил
+
+    Returns:
+        Dict[str, List[int]]: Индекс для нового списка правил (как fact_dependents(rules))
+    """
+
+    result: Dict[str, List[int]] = {}
+    for fact, indices in dependents.items():
+        remapped = [rule_map[index] for index in indices if rule_map[index] is not None]
+        if remapped:
+            result[fact] = remapped
+
+    for index in added:
+        for fact in fact_dependents([rules[index]]):
+            result.setdefault(fact, []).append(index)
+
+    for indices in result.values():
+        indices.sort()
+    return result
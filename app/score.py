@@ -0,0 +1,280 @@
+import argparse
+import csv
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+from app.compiled_kb import CompiledKnowledgeBase
+
+_knowledge_base: Optional[CompiledKnowledgeBase] = None
+
+
+def init_worker(path: str):
+    """
+    Загрузить и скомпилировать базу знаний в процессе (один раз на процесс).
+
+    Args:
+        path (str): Путь к файлу базы знаний
+    """
+
+    global _knowledge_base
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    _knowledge_base = CompiledKnowledgeBase(data, name=Path(path).name)
+
+
+def score_chunk(chunk: Tuple[int, str, Optional[List[str]], List]) -> Tuple[str, int]:
+    """
+    Вычислить выводы для пачки случаев.
+
+    Args:
+        chunk (Tuple): (номер первого случая, формат 'jsonl' | 'csv',
+            заголовок CSV или None, строки JSONL или строки CSV)
+
+    Returns:
+        Tuple[str, int]: Строки JSONL с результатами (по одной на случай) и количество ошибок
+    """
+
+    first, kind, header, records = chunk
+    lines = []
+    errors = 0
+    for offset, record in enumerate(records):
+        result = {"case": first + offset}
+        try:
+            case_id, facts = parse_case(kind, header, record)
+            if case_id is not None:
+                result["id"] = case_id
+            evaluation, _ = _knowledge_base.evaluate(facts)
+            result["conclusions"] = evaluation["conclusions"]
+        except Exception as e:
+            result["error"] = str(e)
+            errors += 1
+        lines.append(json.dumps(result, ensure_ascii=False))
+    return "\n".join(lines) + "\n", errors
+
+
+def parse_case(kind: str, header: Optional[List[str]], record) -> Tuple[Optional[str], Dict[str, float]]:
+    """
+    Разобрать случай.
+
+    Строка JSONL - объект {'id': ..., 'facts': {факт: CF}} или плоский объект
+    {факт: CF} с необязательным полем 'id'. Строка CSV - значения CF по
+    столбцам-фактам заголовка; столбец 'id' задает идентификатор,
+    пустые ячейки пропускаются.
+
+    Args:
+        kind (str): Формат 'jsonl' или 'csv'
+        header (Optional[List[str]]): Заголовок CSV
+        record: Строка JSONL или список значений строки CSV
+
+    Returns:
+        Tuple[Optional[str], Dict[str, float]]: Идентификатор случая и входные факты
+
+    Raises:
+        ValueError: Если случай не удалось разобрать
+    """
+
+    if kind == "csv":
+        if len(record) > len(header):
+            raise ValueError("Количество значений больше количества столбцов")
+        case_id = None
+        facts = {}
+        for column, value in zip(header, record):
+            if column == "id":
+                case_id = value
+            elif value.strip():
+                facts[column] = float(value)
+        return case_id, facts
+
+    case = json.loads(record)
+    if not isinstance(case, dict):
+        raise ValueError("Случай должен быть объектом JSON")
+    case_id = case.get("id")
+    facts = case["facts"] if isinstance(case.get("facts"), dict) else {
+        fact: cf for fact, cf in case.items() if fact != "id"
+    }
+    return case_id, {str(fact): float(cf) for fact, cf in facts.items()}
+
+
+def read_chunks(stream: TextIO, kind: str, chunk_size: int) -> Iterator[Tuple[int, str, Optional[List[str]], List]]:
+    """
+    Читать случаи пачками (без чтения всего входа в память).
+
+    Args:
+        stream (TextIO): Входной поток
+        kind (str): Формат 'jsonl' или 'csv'
+        chunk_size (int): Количество случаев в пачке
+
+    Yields:
+        Tuple: Пачка для score_chunk
+    """
+
+    header = None
+    if kind == "csv":
+        records = csv.reader(stream)
+        header = [column.strip() for column in next(records, [])]
+        records = (row for row in records if row)
+    else:
+        records = (line for line in stream if line.strip())
+
+    first = 1
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield first, kind, header, chunk
+            first += len(chunk)
+            chunk = []
+    if chunk:
+        yield first, kind, header, chunk
+
+
+def score(knowledge_base: str, source: TextIO, target: TextIO, kind: str = "jsonl", workers: int = 1,
+          chunk_size: int = 256, window: Optional[int] = None, progress: float = 10.0,
+          log: TextIO = sys.stderr) -> Dict:
+    """
+    Вычислить выводы для потока случаев и записать результаты в исходном порядке.
+
+    Пачки случаев вычисляются в пуле процессов, каждый из которых загружает
+    базу знаний один раз. Одновременно в обработке находится не больше
+    window пачек, поэтому память ограничена независимо от размера входа.
+
+    Args:
+        knowledge_base (str): Путь к файлу базы знаний
+        source (TextIO): Входной поток случаев
+        target (TextIO): Выходной поток JSONL
+        kind (str): Формат входа 'jsonl' или 'csv'
+        workers (int): Количество процессов (1 - вычисление в текущем процессе)
+        chunk_size (int): Количество случаев в пачке
+        window (Optional[int]): Максимальное количество пачек в обработке (по умолчанию 4 на процесс)
+        progress (float): Интервал вывода промежуточной производительности в секундах (0 - не выводить)
+        log (TextIO): Поток для вывода производительности
+
+    Returns:
+        Dict: {'cases': int, 'errors': int, 'seconds': float, 'cases_per_second': float}
+    """
+
+    started = time.perf_counter()
+    reported = started
+    totals = {"cases": 0, "errors": 0}
+
+    def write(chunk: Tuple, output: Tuple[str, int]):
+        nonlocal reported
+        target.write(output[0])
+        totals["cases"] += len(chunk[3])
+        totals["errors"] += output[1]
+        now = time.perf_counter()
+        if progress and now - reported >= progress:
+            reported = now
+            print(f"обработано {totals['cases']} случаев, {totals['cases'] / (now - started):.0f} случаев/с",
+                  file=log)
+
+    chunks = read_chunks(source, kind, chunk_size)
+    if workers <= 1:
+        init_worker(knowledge_base)
+        for chunk in chunks:
+            write(chunk, score_chunk(chunk))
+    else:
+        window = window or workers * 4
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            initargs=(knowledge_base,)
+        )
+        pending = deque()
+        try:
+            for chunk in chunks:
+                pending.append((chunk, executor.submit(score_chunk, chunk)))
+                if len(pending) >= window:
+                    chunk, future = pending.popleft()
+                    write(chunk, future.result())
+            while pending:
+                chunk, future = pending.popleft()
+                write(chunk, future.result())
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    target.flush()
+    seconds = time.perf_counter() - started
+    summary = {
+        "cases": totals["cases"],
+        "errors": totals["errors"],
+        "seconds": seconds,
+        "cases_per_second": totals["cases"] / seconds if seconds > 0 else 0.0
+    }
+    print(
+        f"обработано {summary['cases']} случаев (ошибок: {summary['errors']}) за {seconds:.2f}s, "
+        f"{summary['cases_per_second']:.0f} случаев/с",
+        file=log
+    )
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа: python -m app.score база_знаний.json [--input случаи.jsonl] [--output результаты.jsonl]
+
+    Args:
+        argv (Optional[List[str]]): Аргументы командной строки
+
+    Returns:
+        int: Код возврата (1, если базу знаний не удалось загрузить)
+    """
+
+    parser = argparse.ArgumentParser(description="Пакетное вычисление выводов для случаев без HTTP-сервера")
+    parser.add_argument("knowledge_base", help="Файл базы знаний (JSON)")
+    parser.add_argument("--input", default="-", help="Файл случаев JSONL или CSV (по умолчанию stdin)")
+    parser.add_argument("--output", default="-", help="Файл результатов JSONL (по умолчанию stdout)")
+    parser.add_argument("--format", choices=["jsonl", "csv"],
+                        help="Формат входа (по умолчанию по расширению файла, для stdin - jsonl)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Количество процессов (1 - без пула процессов)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Количество случаев в пачке")
+    parser.add_argument("--window", type=int, help="Максимальное количество пачек в обработке")
+    parser.add_argument("--progress", type=float, default=10.0,
+                        help="Интервал вывода производительности в stderr в секундах (0 - только итог)")
+    args = parser.parse_args(argv)
+
+    if args.chunk_size < 1 or (args.window is not None and args.window < 1):
+        parser.error("Размер пачки и окна должны быть положительными")
+
+    try:
+        with open(args.knowledge_base, "r", encoding="utf-8") as f:
+            json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Не удалось загрузить базу знаний: {e}", file=sys.stderr)
+        return 1
+
+    kind = args.format or ("csv" if args.input.lower().endswith(".csv") else "jsonl")
+    source = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="") if args.input == "-" \
+        else open(args.input, "r", encoding="utf-8", newline="")
+    target = io.TextIOWrapper(sys.stdout.buffer, encoding="utf-8") if args.output == "-" \
+        else open(args.output, "w", encoding="utf-8")
+
+    try:
+        score(args.knowledge_base, source, target, kind, args.workers, args.chunk_size, args.window, args.progress)
+    except BrokenProcessPool:
+        print("Процесс вычисления завершился аварийно", file=sys.stderr)
+        return 1
+    except BrokenPipeError:
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    finally:
+        source.close()
+        target.flush()
+        if args.output != "-":
+            target.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
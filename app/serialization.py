@@ -0,0 +1,111 @@
+import json
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi.responses import JSONResponse
+
+from app.expert_system import ExpertSystem
+from app.http_metrics import timed_phase
+from app.model import Rule
+
+
+def encode_json(value: Any) -> bytes:
+    """
+    Закодировать значение в JSON так же, как JSONResponse.
+
+    Args:
+        value (Any): Значение
+
+    Returns:
+        bytes: JSON в кодировке UTF-8
+    """
+
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+class EncodedJSON(bytes):
+    """Готовое JSON-представление значения для вставки в ответ без повторного кодирования."""
+
+
+class PreEncodedJSONResponse(JSONResponse):
+    """JSON-ответ, вставляющий значения EncodedJSON верхнего уровня содержимого как есть.
+
+    Остальные значения кодируются так же, как в JSONResponse, поэтому
+    тело ответа не отличается от кодирования исходных данных целиком.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if not isinstance(content, dict) or not any(isinstance(value, EncodedJSON) for value in content.values()):
+            return super().render(content)
+
+        parts = []
+        for key, value in content.items():
+            parts.append(encode_json(str(key)) + b":" + (value if isinstance(value, EncodedJSON) else encode_json(value)))
+        return b"{" + b",".join(parts) + b"}"
+
+
+class StatePayloads:
+    """Кэш JSON-представлений фактов и правил экспертной системы.
+
+    Факты кодируются заново только при изменении их версии, список
+    правил - при изменении rules_version, причем собирается из
+    закодированных ранее объектов правил (по идентичности объекта)
+    без повторного кодирования: после добавления или удаления правила
+    кодируются только новые правила.
+
+    Attributes:
+        engine (ExpertSystem): Экспертная система, данные которой кодируются
+    """
+
+    def __init__(self, engine: ExpertSystem):
+        """
+        Конструктор кэша.
+
+        Args:
+            engine (ExpertSystem): Экспертная система
+        """
+
+        self.engine = engine
+        self._facts_cache: Tuple[Optional[int], Optional[EncodedJSON]] = (None, None)
+        self._rules_cache: Tuple[Optional[int], Optional[EncodedJSON]] = (None, None)
+        self._rule_fragments: Dict[int, Tuple[Rule, bytes]] = {}
+
+    def facts(self) -> EncodedJSON:
+        """
+        Получить факты в виде JSON.
+
+        Returns:
+            EncodedJSON: Объект {факт: CF}
+        """
+
+        facts = self.engine.facts
+        version, encoded = self._facts_cache
+        if version != facts.version:
+            with timed_phase("serialize"):
+                encoded = EncodedJSON(encode_json(facts))
+            self._facts_cache = (facts.version, encoded)
+        return encoded
+
+    def rules(self) -> EncodedJSON:
+        """
+        Получить правила в виде JSON (как ExpertSystem.rules_as_dicts).
+
+        Returns:
+            EncodedJSON: Список правил {'if': [...], 'then': вывод, 'cf': CF}
+        """
+
+        version, encoded = self._rules_cache
+        if version != self.engine.rules_version:
+            with timed_phase("serialize"):
+                previous = self._rule_fragments
+                fragments = {}
+                parts = []
+                for rule in self.engine.rules:
+                    entry = previous.get(id(rule))
+                    if entry is None or entry[0] is not rule:
+                        entry = (rule, encode_json(rule.to_dict()))
+                    fragments[id(rule)] = entry
+                    parts.append(entry[1])
+                self._rule_fragments = fragments
+                encoded = EncodedJSON(b"[" + b",".join(parts) + b"]")
+            self._rules_cache = (self.engine.rules_version, encoded)
+        return encoded
@@ -0,0 +1,195 @@
+import json
+import mmap
+import os
+import struct
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from app.expert_system import ExpertSystem
+
+
+class SharedKnowledgeBase:
+    """Общее состояние базы знаний для нескольких процессов uvicorn.
+
+    Каждый процесс держит свою копию ExpertSystem (разделить объекты Python
+    между процессами без копирования нельзя), а согласованность
+    обеспечивается через каталог с файлом-снимком исходных фактов и правил
+    и счетчиком версий, отображенным в память (mmap). Проверка
+    актуальности копии стоит одного чтения 8 байт; снимок перечитывается,
+    только если другой процесс опубликовал новую версию.
+
+    Изменение базы знаний выполняется между begin_update и end_update
+    под межпроцессной блокировкой: процесс сначала подтягивает последнюю
+    опубликованную версию, поэтому изменения разных процессов не
+    конфликтуют. Публикуются только исходные факты и правила (base_version),
+    результаты вывода каждый процесс получает сам.
+
+    Attributes:
+        directory (Path): Каталог общего состояния
+        seen_version (int): Последняя общая версия, известная процессу
+    """
+
+    VERSION_FORMAT = "<Q"
+
+    def __init__(self, directory: str):
+        """
+        Конструктор общего состояния.
+
+        Args:
+            directory (str): Каталог для снимка, счетчика версий и файла блокировки
+        """
+
+        if fcntl is None:
+            raise RuntimeError("Общее состояние поддерживается только на POSIX-системах")
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self.snapshot_path = self.directory / "snapshot.json"
+        self.version_path = self.directory / "version"
+        self.lock_path = self.directory / "lock"
+
+        with self._locked():
+            fd = os.open(self.version_path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                size = struct.calcsize(self.VERSION_FORMAT)
+                if os.fstat(fd).st_size < size:
+                    os.ftruncate(fd, size)
+                self._version_map = mmap.mmap(fd, size)
+            finally:
+                os.close(fd)
+
+        self.seen_version = 0
+        self._local_version = None
+        self._update_lock = None
+
+    @contextmanager
+    def _locked(self):
+        """Эксклюзивная межпроцессная блокировка каталога состояния."""
+
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @property
+    def shared_version(self) -> int:
+        """Текущая опубликованная версия базы знаний."""
+
+        return struct.unpack_from(self.VERSION_FORMAT, self._version_map, 0)[0]
+
+    def stale(self) -> bool:
+        """Опубликовал ли другой процесс версию, которой нет у этого процесса."""
+
+        return self.shared_version > self.seen_version
+
+    def sync(self, engine: ExpertSystem) -> bool:
+        """Подтягивает опубликованное состояние, если оно новее локального.
+
+        Args:
+            engine (ExpertSystem): Экземпляр экспертной системы процесса
+
+        Returns:
+            bool: True, если состояние было перезагружено из снимка
+        """
+
+        if not self.stale():
+            if self._local_version is None:
+                self._local_version = engine.base_version
+            return False
+
+        with self._locked():
+            return self._reload(engine)
+
+    def begin_update(self, engine: ExpertSystem):
+        """Начинает изменение базы знаний процессом.
+
+        Захватывает межпроцессную блокировку (до end_update) и подтягивает
+        последнюю опубликованную версию, чтобы изменение применялось к ней.
+
+        Args:
+            engine (ExpertSystem): Экземпляр экспертной системы процесса
+        """
+
+        lock_file = open(self.lock_path, "a")
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        self._update_lock = lock_file
+        try:
+            self._reload(engine)
+        except BaseException:
+            self._release()
+            raise
+        if self._local_version is None:
+            self._local_version = engine.base_version
+
+    def end_update(self, engine: ExpertSystem) -> bool:
+        """Завершает изменение: публикует его, если исходные факты или правила изменились.
+
+        Снимок записывается атомарно (через временный файл и os.replace),
+        после чего увеличивается общий счетчик версий и снимается
+        межпроцессная блокировка.
+
+        Args:
+            engine (ExpertSystem): Экземпляр экспертной системы процесса
+
+        Returns:
+            bool: True, если опубликована новая версия
+        """
+
+        try:
+            version = engine.base_version
+            if version == self._local_version:
+                return False
+
+            tmp_path = self.snapshot_path.with_suffix(f".{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"facts": engine.base_facts, "rules": engine.rules_as_dicts()}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.snapshot_path)
+
+            shared_version = self.shared_version + 1
+            struct.pack_into(self.VERSION_FORMAT, self._version_map, 0, shared_version)
+            self._version_map.flush()
+            self.seen_version = shared_version
+            self._local_version = version
+            return True
+        finally:
+            self._release()
+
+    def _release(self):
+        """Снимает блокировку, захваченную begin_update."""
+
+        lock_file, self._update_lock = self._update_lock, None
+        if lock_file is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+            lock_file.close()
+
+    def _reload(self, engine: ExpertSystem) -> bool:
+        """Перезагружает копию процесса из снимка (под межпроцессной блокировкой).
+
+        Args:
+            engine (ExpertSystem): Экземпляр экспертной системы процесса
+
+        Returns:
+            bool: True, если состояние было перезагружено из снимка
+        """
+
+        version = self.shared_version
+        if version <= self.seen_version:
+            return False
+        if not self.snapshot_path.exists():
+            self.seen_version = version
+            return False
+
+        with open(self.snapshot_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        engine.load_from_dict(data, optimize=engine.optimize_inference)
+        self.seen_version = version
+        self._local_version = engine.base_version
+        return True
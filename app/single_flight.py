@@ -0,0 +1,62 @@
+import asyncio
+from typing import Any, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Объединение одновременных одинаковых блокирующих операций.
+
+    Блокирующая операция выполняется в пуле потоков (asyncio.to_thread),
+    не блокируя цикл событий, корутинная функция - отдельной задачей. Пока операция с данным ключом выполняется, повторные
+    вызовы с тем же ключом не запускают ее снова, а ждут результата
+    (или исключения) уже запущенной. Отмена одного из ожидающих не
+    прерывает операцию для остальных.
+
+    Attributes:
+        calls (int): Количество запущенных операций
+        coalesced (int): Количество вызовов, присоединившихся к уже выполняющейся операции
+    """
+
+    def __init__(self):
+        """Конструктор."""
+
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, func: Callable[..., Any], *args) -> Any:
+        """
+        Выполнить операцию или дождаться уже выполняющейся операции с тем же ключом.
+
+        Args:
+            key (Hashable): Ключ операции (например, имя файла)
+            func (Callable): Блокирующая или корутинная функция
+            *args: Аргументы функции
+
+        Returns:
+            Any: Результат функции (общий для всех ожидающих)
+        """
+
+        flight = self._flights.get(key)
+        if flight is None:
+            call = func(*args) if asyncio.iscoroutinefunction(func) else asyncio.to_thread(func, *args)
+            flight = asyncio.ensure_future(call)
+            self._flights[key] = flight
+            flight.add_done_callback(lambda done: self._finish(key, done))
+            self.calls += 1
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(flight)
+
+    def _finish(self, key: Hashable, flight: asyncio.Future):
+        """
+        Завершить операцию: освободить ключ и пометить исключение как полученное.
+
+        Args:
+            key (Hashable): Ключ операции
+            flight (asyncio.Future): Завершившаяся операция
+        """
+
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            flight.exception()
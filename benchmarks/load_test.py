@@ -0,0 +1,509 @@
+import argparse
+import asyncio
+import json
+import math
+import random
+import sys
+import time
+import urllib.parse
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import httpx
+from starlette.routing import Match
+
+from benchmarks.synthetic import SyntheticKnowledgeBase, render_conditions
+
+
+DEFAULT_MIX = "query=60,infer=10,fact=15,rule=5,load=5,evaluate=5"
+OPERATIONS = ("query", "infer", "fact", "rule", "load", "evaluate")
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """
+    Разобрать состав нагрузки вида 'query=60,infer=10'.
+
+    Args:
+        spec (str): Операции с весами через запятую
+
+    Returns:
+        Dict[str, float]: Веса операций
+
+    Raises:
+        ValueError: Если операция неизвестна или вес некорректен
+    """
+
+    weights = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        operation, _, weight = part.partition("=")
+        operation = operation.strip()
+        if operation not in OPERATIONS:
+            raise ValueError(f"Неизвестная операция: {operation} (доступны: {', '.join(OPERATIONS)})")
+        weights[operation] = float(weight) if weight.strip() else 1.0
+        if weights[operation] < 0:
+            raise ValueError(f"Вес операции {operation} не может быть отрицательным")
+    if not any(weights.values()):
+        raise ValueError("Состав нагрузки не содержит операций")
+    return weights
+
+
+class RequestMix:
+    """Генератор запросов смешанной нагрузки по базе знаний.
+
+    Запросы строятся по фактам и условиям правил базы знаний: запросы
+    /api/query повторяют условия правил полностью или частично, изменения
+    фактов задают или удаляют базовые факты, новые правила копируют
+    условия существующих с новым заключением.
+    """
+
+    def __init__(self, knowledge_base: Dict, filename: str, weights: Dict[str, float], seed: int):
+        """
+        Конструктор генератора.
+
+        Args:
+            knowledge_base (Dict): Данные базы знаний {'facts': {...}, 'rules': [...]}
+            filename (str): Имя файла базы знаний в директории knowledge_base
+            weights (Dict[str, float]): Веса операций
+            seed (int): Начальное значение генератора
+        """
+
+        self.filename = filename
+        self._rng = random.Random(seed)
+        self._facts = sorted(knowledge_base.get("facts", {}))
+        self._conditions = [rule["if"] for rule in knowledge_base.get("rules", []) if rule.get("if")]
+        self._queries = SyntheticKnowledgeBase(seed=seed).generate_queries(knowledge_base, 200) \
+            if self._conditions else []
+        self._operations = [operation for operation in weights if weights[operation] > 0]
+        self._weights = [weights[operation] for operation in self._operations]
+        self._added_rules = 0
+
+    def __iter__(self) -> Iterator[Dict]:
+        while True:
+            yield self.next()
+
+    def next(self) -> Dict:
+        """
+        Сгенерировать очередной запрос.
+
+        Returns:
+            Dict: Запрос {'method': str, 'path': str, 'body': Optional[Dict]}
+        """
+
+        operation = self._rng.choices(self._operations, self._weights)[0]
+        return getattr(self, f"_{operation}")()
+
+    def _query(self) -> Dict:
+        query = self._rng.choice(self._queries) if self._queries else "нет_фактов"
+        return {"method": "POST", "path": "/api/query", "body": {"query": query}}
+
+    def _infer(self) -> Dict:
+        return {"method": "POST", "path": "/api/infer", "body": {}}
+
+    def _fact(self) -> Dict:
+        fact = self._rng.choice(self._facts) if self._facts else "факт_нагрузки"
+        if self._rng.random() < 0.2:
+            return {"method": "DELETE", "path": f"/api/fact/{urllib.parse.quote(fact)}?compact=true", "body": None}
+        return {"method": "POST", "path": "/api/fact?compact=true",
+                "body": {"fact": fact, "cf": round(self._rng.random(), 2)}}
+
+    def _rule(self) -> Dict:
+        self._added_rules += 1
+        conditions = render_conditions(self._rng.choice(self._conditions)) if self._conditions else "факт_нагрузки"
+        return {"method": "POST", "path": "/api/rule?compact=true",
+                "body": {"conditions": conditions, "conclusion": f"вывод_нагрузки_{self._added_rules}",
+                         "cf": round(self._rng.uniform(0.5, 1.0), 2)}}
+
+    def _load(self) -> Dict:
+        return {"method": "GET", "path": f"/api/knowledge-base/{urllib.parse.quote(self.filename)}?compact=true",
+                "body": None}
+
+    def _evaluate(self) -> Dict:
+        facts = self._rng.sample(self._facts, min(5, len(self._facts)))
+        return {"method": "POST", "path": "/api/evaluate",
+                "body": {"knowledge_base": self.filename,
+                         "facts": {fact: round(self._rng.random(), 2) for fact in facts}}}
+
+
+def read_replay(path: str) -> List[Dict]:
+    """
+    Прочитать журнал запросов для воспроизведения.
+
+    Каждая строка JSONL - объект {'method': 'POST', 'path': '/api/query',
+    'body': {...}}; 'method' по умолчанию GET (POST, если есть 'body'),
+    строка запроса передается в составе 'path'.
+
+    Args:
+        path (str): Путь к файлу JSONL
+
+    Returns:
+        List[Dict]: Запросы в порядке журнала
+
+    Raises:
+        ValueError: Если строка журнала некорректна
+    """
+
+    requests = []
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict) or not str(record.get("path", "")).startswith("/"):
+                raise ValueError(f"Строка {number}: ожидается объект с полем 'path'")
+            body = record.get("body")
+            requests.append({
+                "method": str(record.get("method") or ("POST" if body is not None else "GET")).upper(),
+                "path": record["path"],
+                "body": body
+            })
+    return requests
+
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    """
+    Вычислить перцентиль по ближайшему рангу.
+
+    Args:
+        values (List[float]): Значения, отсортированные по возрастанию
+        q (float): Уровень от 0 до 1
+
+    Returns:
+        Optional[float]: Перцентиль или None для пустого списка
+    """
+
+    if not values:
+        return None
+    rank = max(1, math.ceil(q * len(values) - 1e-9))
+    return values[min(rank, len(values)) - 1]
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """
+    Разобрать заголовок Server-Timing вида 'engine;dur=1.52, total;dur=5.78'.
+
+    Args:
+        header (str): Значение заголовка
+
+    Returns:
+        Dict[str, float]: Длительность фаз в миллисекундах
+    """
+
+    phases = {}
+    for entry in header.split(","):
+        name, _, params = entry.strip().partition(";")
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "dur" and name:
+                try:
+                    phases[name] = float(value)
+                except ValueError:
+                    pass
+    return phases
+
+
+class RouteLabels:
+    """Сопоставление путей запросов шаблонам путей endpoint приложения."""
+
+    def __init__(self, routes: List):
+        """
+        Конструктор.
+
+        Args:
+            routes (List): Маршруты приложения (app.routes)
+        """
+
+        self._routes = routes
+        self._labels: Dict[Tuple[str, str], str] = {}
+
+    def label(self, method: str, path: str) -> str:
+        """
+        Получить метку endpoint запроса.
+
+        Args:
+            method (str): HTTP-метод
+            path (str): Путь запроса (со строкой запроса)
+
+        Returns:
+            str: Метка вида 'POST /api/query' или 'GET unmatched'
+        """
+
+        path = urllib.parse.unquote(path.split("?", 1)[0])
+        label = self._labels.get((method, path))
+        if label is None:
+            label = f"{method} unmatched"
+            scope = {"type": "http", "path": path, "method": method}
+            for route in self._routes:
+                match, _ = route.matches(scope)
+                if match == Match.FULL:
+                    label = f"{method} {route.path}"
+                    break
+            self._labels[(method, path)] = label
+        return label
+
+
+async def monitor_loop_lag(interval: float, lags: List[float], stop: asyncio.Event):
+    """
+    Измерять задержку цикла событий: насколько позже срока просыпается sleep.
+
+    Args:
+        interval (float): Интервал измерений в секундах
+        lags (List[float]): Список для задержек в секундах
+        stop (asyncio.Event): Событие завершения
+    """
+
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - started - interval))
+
+
+async def drive(application, requests: Iterator[Dict], concurrency: int, duration: Optional[float],
+                limit: Optional[int]) -> Dict:
+    """
+    Выполнить запросы к приложению через ASGI с заданной параллельностью.
+
+    Каждый из concurrency обработчиков отправляет следующий запрос сразу
+    после ответа на предыдущий (замкнутая нагрузка), пока не закончатся
+    запросы, время или лимит количества.
+
+    Args:
+        application: ASGI-приложение
+        requests (Iterator[Dict]): Запросы {'method', 'path', 'body'}
+        concurrency (int): Количество одновременных запросов
+        duration (Optional[float]): Ограничение времени в секундах
+        limit (Optional[int]): Ограничение количества запросов
+
+    Returns:
+        Dict: {'seconds': float, 'samples': {метка: [(секунды, статус, фазы), ...]}, 'loop_lag': [секунды]}
+    """
+
+    labels = RouteLabels(application.routes)
+    samples: Dict[str, List[Tuple[float, int, Dict[str, float]]]] = {}
+    lags: List[float] = []
+    stop = asyncio.Event()
+    issued = 0
+    deadline = None
+
+    transport = httpx.ASGITransport(app=application)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+
+        async def worker():
+            nonlocal issued
+            while deadline is None or time.perf_counter() < deadline:
+                if limit is not None and issued >= limit:
+                    return
+                request = next(requests, None)
+                if request is None:
+                    return
+                issued += 1
+
+                started = time.perf_counter()
+                try:
+                    response = await client.request(request["method"], request["path"], json=request["body"])
+                    status = response.status_code
+                    phases = parse_server_timing(response.headers.get("server-timing", ""))
+                except Exception:
+                    status, phases = 0, {}
+                seconds = time.perf_counter() - started
+                samples.setdefault(labels.label(request["method"], request["path"]), []).append(
+                    (seconds, status, phases)
+                )
+
+        monitor = asyncio.ensure_future(monitor_loop_lag(0.005, lags, stop))
+        started = time.perf_counter()
+        if duration is not None:
+            deadline = started + duration
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await monitor
+
+    return {"seconds": elapsed, "samples": samples, "loop_lag": lags}
+
+
+def summarize(run: Dict) -> Dict:
+    """
+    Свести результаты нагрузки по endpoint.
+
+    Args:
+        run (Dict): Результат drive
+
+    Returns:
+        Dict: Общая производительность и задержки, задержка цикла событий
+            и статистика по каждому endpoint (миллисекунды)
+    """
+
+    def latency(values: List[float]) -> Dict:
+        values = sorted(values)
+        return {
+            "p50": percentile(values, 0.5) * 1000,
+            "p95": percentile(values, 0.95) * 1000,
+            "p99": percentile(values, 0.99) * 1000,
+            "max": values[-1] * 1000
+        }
+
+    seconds = run["seconds"]
+    endpoints = {}
+    everything = []
+    errors = 0
+    for label, samples in sorted(run["samples"].items()):
+        durations = [sample[0] for sample in samples]
+        failed = sum(1 for sample in samples if not 200 <= sample[1] < 400)
+        phases: Dict[str, float] = {}
+        for _, _, sample_phases in samples:
+            for phase, value in sample_phases.items():
+                phases[phase] = phases.get(phase, 0.0) + value
+        endpoints[label] = {
+            "requests": len(samples),
+            "errors": failed,
+            "throughput": len(samples) / seconds if seconds > 0 else 0.0,
+            "latency_ms": latency(durations),
+            "phases_ms": {phase: total / len(samples) for phase, total in phases.items() if phase != "total"}
+        }
+        everything.extend(durations)
+        errors += failed
+
+    lags = sorted(run["loop_lag"])
+    return {
+        "seconds": seconds,
+        "requests": len(everything),
+        "errors": errors,
+        "throughput": len(everything) / seconds if seconds > 0 else 0.0,
+        "latency_ms": latency(everything) if everything else None,
+        "loop_lag_ms": {
+            "p50": percentile(lags, 0.5) * 1000,
+            "p99": percentile(lags, 0.99) * 1000,
+            "max": lags[-1] * 1000
+        } if lags else None,
+        "endpoints": endpoints
+    }
+
+
+def print_report(summary: Dict):
+    """
+    Вывести сводку нагрузки таблицей.
+
+    Args:
+        summary (Dict): Результат summarize
+    """
+
+    print(f"{'endpoint':<42} {'запросов':>8} {'ошибок':>7} {'в сек':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    rows = list(summary["endpoints"].items())
+    if summary["latency_ms"] is not None:
+        rows.append(("всего", summary))
+    for label, data in rows:
+        latency = data["latency_ms"]
+        print(
+            f"{label:<42} {data['requests']:>8} {data['errors']:>7} {data['throughput']:>8.1f} "
+            f"{latency['p50']:>8.2f} {latency['p95']:>8.2f} {latency['p99']:>8.2f} {latency['max']:>8.2f}"
+        )
+    for label, data in summary["endpoints"].items():
+        if data["phases_ms"]:
+            print(f"{label}: " + ", ".join(f"{phase} {value:.2f}ms" for phase, value in data["phases_ms"].items()))
+    if summary["loop_lag_ms"] is not None:
+        lag = summary["loop_lag_ms"]
+        print(f"Задержка цикла событий: p50 {lag['p50']:.2f}ms, p99 {lag['p99']:.2f}ms, max {lag['max']:.2f}ms")
+
+
+async def run_load_test(args: argparse.Namespace) -> Dict:
+    """
+    Запустить приложение в процессе (включая прогрев lifespan) и выполнить нагрузку.
+
+    Args:
+        args (argparse.Namespace): Аргументы командной строки
+
+    Returns:
+        Dict: Сводка (summarize) с временем запуска приложения
+    """
+
+    import app.main as server
+
+    application = server.app
+    generated = None
+    started = time.perf_counter()
+    async with application.router.lifespan_context(application):
+        startup = time.perf_counter() - started
+
+        if args.replay:
+            requests = iter(read_replay(args.replay))
+        else:
+            if args.knowledge_base:
+                filename = args.knowledge_base if args.knowledge_base.endswith(".json") else args.knowledge_base + ".json"
+                with open(server.knowledge_base_dir / filename, "r", encoding="utf-8") as f:
+                    knowledge_base = json.load(f)
+            else:
+                filename = "load_test.json"
+                knowledge_base = SyntheticKnowledgeBase(seed=args.seed, facts=args.facts, rules=args.rules).generate()
+                generated = server.knowledge_base_dir / filename
+                with open(generated, "w", encoding="utf-8") as f:
+                    json.dump(knowledge_base, f, ensure_ascii=False)
+            requests = iter(RequestMix(knowledge_base, filename, parse_mix(args.mix), args.seed))
+
+        try:
+            if not args.replay:
+                transport = httpx.ASGITransport(app=application)
+                async with httpx.AsyncClient(transport=transport, base_url="http://load-test") as client:
+                    response = await client.get(f"/api/knowledge-base/{urllib.parse.quote(filename)}?compact=true")
+                    response.raise_for_status()
+            run = await drive(application, requests, args.concurrency, args.duration, args.requests)
+        finally:
+            if generated is not None:
+                generated.unlink(missing_ok=True)
+                snapshot_dir = server.compiled_knowledge_bases.snapshot_dir
+                if snapshot_dir is not None:
+                    for snapshot in snapshot_dir.glob(f"{generated.name}.*.pickle"):
+                        snapshot.unlink(missing_ok=True)
+
+    summary = summarize(run)
+    summary["startup_ms"] = startup * 1000
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа нагрузочного теста: python -m benchmarks.load_test
+
+    Args:
+        argv (Optional[List[str]]): Аргументы командной строки
+
+    Returns:
+        int: Код возврата (1, если есть ответы с ошибкой)
+    """
+
+    parser = argparse.ArgumentParser(description="Нагрузочный тест FastAPI-приложения в процессе (через ASGI)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Состав нагрузки: операция=вес через запятую "
+                                                            f"({', '.join(OPERATIONS)})")
+    parser.add_argument("--replay", help="Воспроизвести журнал запросов JSONL вместо синтетической нагрузки")
+    parser.add_argument("--concurrency", type=int, default=16, help="Количество одновременных запросов")
+    parser.add_argument("--requests", type=int, help="Количество запросов (по умолчанию 2000 без --duration)")
+    parser.add_argument("--duration", type=float, help="Длительность нагрузки в секундах")
+    parser.add_argument("--knowledge-base", help="Файл базы знаний из knowledge_base (по умолчанию синтетическая)")
+    parser.add_argument("--facts", type=int, default=2000, help="Количество фактов синтетической базы знаний")
+    parser.add_argument("--rules", type=int, default=5000, help="Количество правил синтетической базы знаний")
+    parser.add_argument("--seed", type=int, default=42, help="Начальное значение генератора")
+    parser.add_argument("--output", help="Файл для сохранения сводки в JSON")
+    args = parser.parse_args(argv)
+
+    if args.concurrency < 1:
+        parser.error("Параллельность должна быть положительной")
+    if args.requests is None and args.duration is None and not args.replay:
+        args.requests = 2000
+    try:
+        parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    summary = asyncio.run(run_load_test(args))
+    print(f"Запуск приложения: {summary['startup_ms']:.1f}ms; "
+          f"{summary['requests']} запросов за {summary['seconds']:.2f}s ({summary['throughput']:.1f} в сек)")
+    print_report(summary)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,226 @@
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from app.expert_system import ExpertSystem
+from benchmarks.synthetic import SyntheticKnowledgeBase, render_conditions
+
+
+SIZES = {
+    "small": {"facts": 200, "rules": 500},
+    "medium": {"facts": 2000, "rules": 5000},
+    "large": {"facts": 10000, "rules": 30000},
+}
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+
+def measure(operation: Callable[[], None], repeat: int, setup: Optional[Callable[[], None]] = None) -> Dict:
+    """
+    Измерить время выполнения операции.
+
+    Args:
+        operation (Callable): Измеряемая операция
+        repeat (int): Количество повторов
+        setup (Optional[Callable]): Подготовка перед каждым повтором (не входит в замер)
+
+    Returns:
+        Dict: Минимальное и медианное время в секундах и число повторов
+    """
+
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        operation()
+        timings.append(time.perf_counter() - start)
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "repeat": repeat
+    }
+
+
+def run_size(name: str, params: Dict, repeat: int, seed: int) -> Dict:
+    """
+    Выполнить набор бенчмарков для базы знаний одного размера.
+
+    Args:
+        name (str): Название размера
+        params (Dict): Параметры генератора синтетической базы знаний
+        repeat (int): Количество повторов каждого замера
+        seed (int): Начальное значение генератора
+
+    Returns:
+        Dict: Результаты замеров по операциям
+    """
+
+    generator = SyntheticKnowledgeBase(seed=seed, **params)
+    knowledge_base = generator.generate()
+    condition_strings = [render_conditions(rule["if"]) for rule in knowledge_base["rules"]]
+    queries = generator.generate_queries(knowledge_base, 200)
+
+    engine = ExpertSystem()
+    engine.load_from_dict(knowledge_base)
+    results = {}
+
+    def parse():
+        for conditions in condition_strings:
+            engine.parse_conditions_string(conditions)
+
+    def reload():
+        engine.load_from_dict(knowledge_base)
+
+    def run_queries():
+        for query in queries:
+            engine.query(query)
+
+    matched = []
+    for query in queries:
+        result = engine.query(query)
+        matched.append((result["matched_items"], result["parsed_conditions"]))
+
+    def partial():
+        for matched_items, parsed_conditions in matched:
+            engine._find_partial_matches(matched_items, parsed_conditions)
+
+    results["parse"] = measure(parse, repeat)
+    results["load"] = measure(reload, repeat)
+    results["save"] = measure(lambda: json.dumps(engine.to_dict(), ensure_ascii=False), repeat)
+    results["infer"] = measure(engine.infer, repeat, setup=reload)
+    engine.infer_parallel()
+    results["infer_parallel"] = measure(engine.infer_parallel, repeat, setup=reload)
+    engine.load_from_dict(knowledge_base)
+    engine.evaluate_conclusions()
+    results["closed_form"] = measure(engine.evaluate_conclusions, repeat)
+    results["query"] = measure(run_queries, repeat)
+    results["partial_match"] = measure(partial, repeat)
+
+    print(f"{name}: " + ", ".join(f"{op}={data['median'] * 1000:.1f}ms" for op, data in results.items()))
+    return results
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    Сравнить результаты с сохраненным эталоном.
+
+    Args:
+        results (Dict): Текущие результаты
+        baseline (Dict): Эталонные результаты
+        tolerance (float): Допустимое относительное замедление (0.2 = 20%)
+
+    Returns:
+        List[str]: Описания обнаруженных регрессий
+    """
+
+    regressions = []
+    for size, operations in results["results"].items():
+        for operation, data in operations.items():
+            reference = baseline.get("results", {}).get(size, {}).get(operation)
+            if not reference or reference["median"] <= 0:
+                continue
+
+            ratio = data["median"] / reference["median"]
+            if ratio > 1 + tolerance:
+                regressions.append(
+                    f"{size}/{operation}: {reference['median'] * 1000:.2f}ms -> "
+                    f"{data['median'] * 1000:.2f}ms (x{ratio:.2f})"
+                )
+
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа бенчмарков: python -m benchmarks.run
+
+    Args:
+        argv (Optional[List[str]]): Аргументы командной строки
+
+    Returns:
+        int: Код возврата (1 при обнаружении регрессий)
+    """
+
+    parser = argparse.ArgumentParser(description="Бенчмарки механизма вывода экспертной системы")
+    parser.add_argument("--sizes", default="small,medium", help="Размеры через запятую: " + ", ".join(SIZES))
+    parser.add_argument("--repeat", type=int, default=3, help="Количество повторов каждого замера")
+    parser.add_argument("--seed", type=int, default=42, help="Начальное значение генератора")
+    parser.add_argument("--width", type=int, help="Количество условий в правиле")
+    parser.add_argument("--depth", type=int, help="Глубина цепочек вывода")
+    parser.add_argument("--or-ratio", type=float, help="Доля связок ИЛИ")
+    parser.add_argument("--not-ratio", type=float, help="Доля отрицаемых условий")
+    parser.add_argument("--group-ratio", type=float, help="Доля условий-групп")
+    parser.add_argument("--cycle-ratio", type=float, help="Доля правил, замыкающих цикл")
+    parser.add_argument("--domains", type=int, help="Количество независимых предметных областей")
+    parser.add_argument("--output", help="Файл для сохранения результатов в JSON")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="Файл эталонных результатов")
+    parser.add_argument("--save-baseline", action="store_true", help="Сохранить результаты как эталон")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Допустимое замедление относительно эталона")
+    args = parser.parse_args(argv)
+
+    overrides = {
+        key: value for key, value in {
+            "width": args.width,
+            "depth": args.depth,
+            "or_ratio": args.or_ratio,
+            "not_ratio": args.not_ratio,
+            "group_ratio": args.group_ratio,
+            "cycle_ratio": args.cycle_ratio,
+            "domains": args.domains,
+        }.items() if value is not None
+    }
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "overrides": overrides
+        },
+        "results": {}
+    }
+
+    for size in args.sizes.split(","):
+        size = size.strip()
+        if size not in SIZES:
+            parser.error(f"Неизвестный размер: {size}")
+        results["results"][size] = run_size(size, {**SIZES[size], **overrides}, args.repeat, args.seed)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"Эталон сохранен: {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        print("Эталон не найден, сравнение пропущено")
+        return 0
+
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"Регрессия: {regression}")
+    if not regressions:
+        print("Регрессий относительно эталона не обнаружено")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
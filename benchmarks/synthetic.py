@@ -0,0 +1,221 @@
+import random
+from typing import Dict, List, Optional
+
+
+class SyntheticKnowledgeBase:
+    """Генератор синтетических баз знаний для бенчмарков.
+
+    Строит воспроизводимую (по seed) базу знаний в формате JSON-файлов
+    приложения: базовые факты и слои выводимых фактов, связанные правилами.
+    Правило слоя d берет условия из фактов предыдущих слоев и делает вывод
+    в слой d; часть правил может замыкать циклы, делая вывод в более ранний слой.
+
+    Attributes:
+        facts (int): Количество базовых фактов
+        rules (int): Количество правил
+        width (int): Количество условий в правиле
+        depth (int): Глубина цепочек вывода (число слоев выводимых фактов)
+        or_ratio (float): Доля связок ИЛИ среди связок между условиями
+        not_ratio (float): Доля отрицаемых условий
+        group_ratio (float): Доля условий-групп
+        cycle_ratio (float): Доля правил, замыкающих цикл
+        domains (int): Количество независимых предметных областей без общих фактов
+        wildcard_ratio (float): Доля условий-шаблонов по префиксу имени факта
+        seed (int): Начальное значение генератора случайных чисел
+    """
+
+    def __init__(self, facts: int = 200, rules: int = 500, width: int = 3, depth: int = 4,
+                 or_ratio: float = 0.2, not_ratio: float = 0.1, group_ratio: float = 0.1,
+                 cycle_ratio: float = 0.0, domains: int = 1, wildcard_ratio: float = 0.0, seed: int = 42):
+        """
+        Конструктор генератора.
+
+        Args:
+            facts (int): Количество базовых фактов
+            rules (int): Количество правил
+            width (int): Количество условий в правиле
+            depth (int): Глубина цепочек вывода
+            or_ratio (float): Доля связок ИЛИ
+            not_ratio (float): Доля отрицаемых условий
+            group_ratio (float): Доля условий-групп
+            cycle_ratio (float): Доля правил, замыкающих цикл
+            domains (int): Количество независимых предметных областей (факты и правила
+                делятся между ними поровну, имена фактов получают префикс области)
+            wildcard_ratio (float): Доля условий-шаблонов ('факт_1*' - любой факт с префиксом)
+            seed (int): Начальное значение генератора случайных чисел
+        """
+
+        if facts < 1 or rules < 1 or width < 1 or depth < 1 or domains < 1:
+            raise ValueError("Размеры базы знаний должны быть положительными")
+
+        self.facts = facts
+        self.rules = rules
+        self.width = width
+        self.depth = depth
+        self.or_ratio = or_ratio
+        self.not_ratio = not_ratio
+        self.group_ratio = group_ratio
+        self.cycle_ratio = cycle_ratio
+        self.domains = domains
+        self.wildcard_ratio = wildcard_ratio
+        self.seed = seed
+
+    def generate(self) -> Dict:
+        """
+        Сгенерировать базу знаний.
+
+        Returns:
+            Dict: База знаний вида {'facts': {...}, 'rules': [...]}
+        """
+
+        rng = random.Random(self.seed)
+        if self.domains == 1:
+            return self._generate_domain(rng, "", self.facts, self.rules)
+
+        facts, rules = {}, []
+        for domain in range(self.domains):
+            part = self._generate_domain(
+                rng, f"д{domain}_",
+                max(1, self.facts // self.domains),
+                max(1, self.rules // self.domains)
+            )
+            facts.update(part["facts"])
+            rules.extend(part["rules"])
+        return {"facts": facts, "rules": rules}
+
+    def _generate_domain(self, rng: random.Random, prefix: str, fact_count: int, rule_count: int) -> Dict:
+        """
+        Сгенерировать факты и правила одной предметной области.
+
+        Args:
+            rng (random.Random): Генератор случайных чисел
+            prefix (str): Префикс имен фактов области
+            fact_count (int): Количество базовых фактов
+            rule_count (int): Количество правил
+
+        Returns:
+            Dict: База знаний области вида {'facts': {...}, 'rules': [...]}
+        """
+
+        layers = [[f"{prefix}факт_{i}" for i in range(fact_count)]]
+        conclusions_per_layer = max(1, rule_count // (self.depth * 2))
+        for d in range(1, self.depth + 1):
+            layers.append([f"{prefix}вывод_{d}_{j}" for j in range(conclusions_per_layer)])
+
+        facts = {name: round(rng.uniform(0.1, 1.0), 2) for name in layers[0]}
+
+        rules = []
+        for i in range(rule_count):
+            layer = 1 + i % self.depth
+            sources = [name for level in layers[:layer] for name in level] \
+                if layer > 1 and rng.random() < 0.3 else layers[layer - 1]
+
+            if self.cycle_ratio and layer > 1 and rng.random() < self.cycle_ratio:
+                sources = layers[layer]
+                conclusion = rng.choice(layers[rng.randrange(1, layer)])
+            else:
+                conclusion = rng.choice(layers[layer])
+
+            rules.append({
+                "if": self._generate_conditions(rng, sources),
+                "then": conclusion,
+                "cf": round(rng.uniform(0.5, 1.0), 2)
+            })
+
+        return {"facts": facts, "rules": rules}
+
+    def _generate_conditions(self, rng: random.Random, sources: List[str]) -> List[Dict]:
+        """
+        Сгенерировать условия одного правила.
+
+        Args:
+            rng (random.Random): Генератор случайных чисел
+            sources (List[str]): Факты, из которых выбираются условия
+
+        Returns:
+            List[Dict]: Условия в формате ExpertSystem
+        """
+
+        conditions = []
+        for i in range(self.width):
+            if rng.random() < self.group_ratio and len(sources) > 1:
+                condition = {
+                    "fact": rng.sample(sources, min(len(sources), rng.randint(2, 3))),
+                    "operator": "",
+                    "is_group": True
+                }
+            else:
+                fact = rng.choice(sources)
+                if self.wildcard_ratio and rng.random() < self.wildcard_ratio:
+                    fact = fact[:rng.randrange(fact.rfind("_") + 1, len(fact) + 1)] + "*"
+                condition = {
+                    "fact": fact,
+                    "operator": "",
+                    "is_group": False
+                }
+
+            if i < self.width - 1:
+                condition["operator"] = "OR" if rng.random() < self.or_ratio else "AND"
+            elif not condition["is_group"] and rng.random() < self.not_ratio:
+                condition["operator"] = "NOT"
+
+            conditions.append(condition)
+
+        return conditions
+
+    def generate_queries(self, knowledge_base: Dict, count: int, seed: Optional[int] = None) -> List[str]:
+        """
+        Сгенерировать строки запросов по условиям правил базы знаний.
+
+        Половина запросов повторяет условия правил целиком (полное совпадение),
+        остальные содержат лишь часть условий (частичное совпадение).
+
+        Args:
+            knowledge_base (Dict): Сгенерированная база знаний
+            count (int): Количество запросов
+            seed (Optional[int]): Начальное значение генератора, по умолчанию self.seed
+
+        Returns:
+            List[str]: Строки запросов на естественном языке
+        """
+
+        rng = random.Random(self.seed if seed is None else seed)
+        rules = knowledge_base["rules"]
+        queries = []
+
+        for i in range(count):
+            conditions = rng.choice(rules)["if"]
+            if i % 2 and len(conditions) > 1:
+                conditions = conditions[:-1]
+            queries.append(render_conditions(conditions))
+
+        return queries
+
+
+def render_conditions(conditions: List[Dict]) -> str:
+    """
+    Преобразовать условия правила в строку для parse_conditions_string.
+
+    Args:
+        conditions (List[Dict]): Условия в формате ExpertSystem
+
+    Returns:
+        str: Строка условий на естественном языке
+    """
+
+    parts = []
+    for i, condition in enumerate(conditions):
+        fact = condition["fact"]
+        operator = condition.get("operator", "").upper()
+
+        if condition.get("is_group") and isinstance(fact, list):
+            parts.append(f"({', '.join(fact)})")
+        elif operator == "NOT":
+            parts.append(f"НЕТ {fact}")
+        else:
+            parts.append(fact)
+
+        if i < len(conditions) - 1:
+            parts.append("ИЛИ" if operator == "OR" else "И")
+
+    return " ".join(parts)
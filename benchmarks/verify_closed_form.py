@@ -0,0 +1,133 @@
+import argparse
+import random
+import sys
+import time
+from typing import Dict, List, Optional
+
+from app.expert_system import ExpertSystem
+from app.overlay import FactOverlay
+from benchmarks.synthetic import SyntheticKnowledgeBase
+
+
+CONFIGS = {
+    "acyclic": {"not_ratio": 0.0, "cycle_ratio": 0.0},
+    "negation": {"cycle_ratio": 0.0},
+    "cyclic": {"not_ratio": 0.0, "cycle_ratio": 0.05},
+}
+
+
+def reference(engine: ExpertSystem, facts: Dict[str, float]) -> Dict[str, float]:
+    """
+    Получить CF выводов обычным infer над копией фактов.
+
+    Args:
+        engine (ExpertSystem): Экспертная система с загруженной базой знаний
+        facts (Dict[str, float]): Исходные факты
+
+    Returns:
+        Dict[str, float]: CF всех выводов правил после infer
+    """
+
+    overlay = FactOverlay(facts)
+    engine.infer(facts=overlay)
+    conclusions = dict.fromkeys(rule.conclusion for rule in engine.rules)
+    return {fact: overlay[fact] for fact in conclusions if fact in overlay}
+
+
+def verify(config: str, params: Dict, seed: int, cases: int, samples: int) -> List[str]:
+    """
+    Сравнить вычисление в замкнутой форме с infer на одной синтетической базе знаний.
+
+    Args:
+        config (str): Название набора параметров генератора
+        params (Dict): Параметры генератора синтетической базы знаний
+        seed (int): Начальное значение генератора
+        cases (int): Количество случайных наборов исходных фактов
+        samples (int): Количество выводов, проверяемых по отдельности
+
+    Returns:
+        List[str]: Описания расхождений
+    """
+
+    knowledge_base = SyntheticKnowledgeBase(seed=seed, **params).generate()
+    engine = ExpertSystem()
+    engine.load_from_dict(knowledge_base)
+    evaluator = engine.closed_form()
+    rng = random.Random(seed)
+    base = dict(knowledge_base["facts"])
+    mismatches = []
+
+    started = time.perf_counter()
+    evaluator.evaluate(base)
+    compile_time = time.perf_counter() - started
+    infer_time = closed_time = 0.0
+
+    for case in range(cases):
+        facts = dict(base)
+        for fact in rng.sample(sorted(facts), len(facts) // 4):
+            if rng.random() < 0.2:
+                del facts[fact]
+            else:
+                facts[fact] = round(rng.random(), 2)
+
+        started = time.perf_counter()
+        expected = reference(engine, facts)
+        infer_time += time.perf_counter() - started
+
+        started = time.perf_counter()
+        actual = engine.evaluate_conclusions(facts=facts)
+        closed_time += time.perf_counter() - started
+
+        if actual != expected:
+            differing = sorted(fact for fact in set(actual) | set(expected) if actual.get(fact) != expected.get(fact))
+            mismatches.append(f"{config}/{seed}/{case}: {len(differing)} выводов отличаются, например {differing[:3]}")
+
+        covered = evaluator.covered
+        for fact in rng.sample(covered, min(samples, len(covered))):
+            value = evaluator.conclusion(fact, facts)
+            if value != expected.get(fact):
+                mismatches.append(f"{config}/{seed}/{case}: {fact} = {value}, infer дает {expected.get(fact)}")
+
+    conclusions = len(evaluator.covered) + len(evaluator.uncovered)
+    print(
+        f"{config} seed={seed}: замкнутая форма для {len(evaluator.covered)}/{conclusions} выводов, "
+        f"компиляция {compile_time * 1000:.1f}ms, infer {infer_time / cases * 1000:.2f}ms, "
+        f"evaluate_conclusions {closed_time / cases * 1000:.2f}ms на случай"
+    )
+    return mismatches
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа проверки: python -m benchmarks.verify_closed_form
+
+    Args:
+        argv (Optional[List[str]]): Аргументы командной строки
+
+    Returns:
+        int: Код возврата (1 при обнаружении расхождений)
+    """
+
+    parser = argparse.ArgumentParser(description="Проверка эквивалентности вычисления выводов в замкнутой форме и infer")
+    parser.add_argument("--seeds", type=int, default=5, help="Количество синтетических баз знаний на набор параметров")
+    parser.add_argument("--facts", type=int, default=300, help="Количество базовых фактов")
+    parser.add_argument("--rules", type=int, default=1000, help="Количество правил")
+    parser.add_argument("--cases", type=int, default=5, help="Количество наборов исходных фактов на базу знаний")
+    parser.add_argument("--samples", type=int, default=20, help="Количество выводов, проверяемых по отдельности")
+    args = parser.parse_args(argv)
+
+    mismatches = []
+    for config, overrides in CONFIGS.items():
+        params = {"facts": args.facts, "rules": args.rules, **overrides}
+        for seed in range(args.seeds):
+            mismatches.extend(verify(config, params, seed, args.cases, args.samples))
+
+    for mismatch in mismatches:
+        print(f"Расхождение: {mismatch}")
+    if not mismatches:
+        print("Расхождений с infer не обнаружено")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+import argparse
+import random
+import sys
+import time
+from typing import Dict, List, Optional
+
+from app.expert_system import ExpertSystem
+from app.overlay import FactOverlay
+from benchmarks.synthetic import SyntheticKnowledgeBase
+
+
+CONFIGS = {
+    "acyclic": {"not_ratio": 0.0, "cycle_ratio": 0.0},
+    "negation": {"cycle_ratio": 0.0},
+    "cyclic": {"cycle_ratio": 0.05},
+    "wildcards": {"wildcard_ratio": 0.2, "cycle_ratio": 0.0},
+    "domains": {"domains": 8, "cycle_ratio": 0.0},
+}
+
+
+def verify(config: str, params: Dict, seed: int, cases: int) -> List[str]:
+    """
+    Сравнить вывод с целями с полным выводом на одной синтетической базе знаний.
+
+    Для решенных целей признак достижения порога должен совпадать с полным
+    выводом, а для целей, не достигших порога, совпадает и CF.
+
+    Args:
+        config (str): Название набора параметров генератора
+        params (Dict): Параметры генератора синтетической базы знаний
+        seed (int): Начальное значение генератора
+        cases (int): Количество случайных наборов целей
+
+    Returns:
+        List[str]: Описания расхождений
+    """
+
+    knowledge_base = SyntheticKnowledgeBase(seed=seed, **params).generate()
+    engine = ExpertSystem()
+    engine.load_from_dict(knowledge_base)
+    rng = random.Random(seed)
+    conclusions = sorted(dict.fromkeys(rule.conclusion for rule in engine.rules))
+
+    full = FactOverlay(engine.facts)
+    engine.infer(facts=full)
+
+    mismatches = []
+    for case in range(cases):
+        targets = {
+            fact: rng.choice([0.0, 0.1, 0.3, 0.5, 0.8, 1.0])
+            for fact in rng.sample(conclusions, min(rng.randint(1, 3), len(conclusions)))
+        }
+        overlay = FactOverlay(engine.facts)
+        summary = list(engine.iter_infer(facts=overlay, targets=targets))[-1]
+        for target, report in summary["targets"].items():
+            expected = full.get(target, 0.0)
+            label = f"{config}/seed={seed}/{case}: {target}"
+            if not report["decided"]:
+                mismatches.append(f"{label} не решена без ограничения бюджета")
+            elif report["reached"] != (expected >= targets[target]):
+                mismatches.append(f"{label} достигнута={report['reached']}, полный вывод дает {expected}")
+            elif not report["reached"] and report["cf"] != expected:
+                mismatches.append(f"{label} CF {report['cf']} вместо {expected}")
+    return mismatches
+
+
+def benchmark(params: Dict, seed: int, cases: int):
+    """
+    Сравнить время проверки одной цели с полным выводом.
+
+    Args:
+        params (Dict): Параметры генератора синтетической базы знаний
+        seed (int): Начальное значение генератора
+        cases (int): Количество проверяемых целей
+    """
+
+    knowledge_base = SyntheticKnowledgeBase(seed=seed, **params).generate()
+    engine = ExpertSystem()
+    engine.load_from_dict(knowledge_base)
+    rng = random.Random(seed)
+    conclusions = sorted(dict.fromkeys(rule.conclusion for rule in engine.rules))
+    targets = [{fact: 0.5} for fact in rng.sample(conclusions, min(cases, len(conclusions)))]
+
+    started = time.perf_counter()
+    engine.infer(facts=FactOverlay(engine.facts))
+    full_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    relevant = 0
+    for target in targets:
+        summary = list(engine.iter_infer(facts=FactOverlay(engine.facts), targets=target))[-1]
+        relevant += summary["relevant_rules"]
+    goal_time = (time.perf_counter() - started) / len(targets)
+
+    print(
+        f"{params['rules']} правил: полный вывод {full_time * 1000:.1f}ms, "
+        f"вывод с одной целью {goal_time * 1000:.1f}ms "
+        f"(в среднем {relevant / len(targets):.0f} правил конуса)"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа проверки: python -m benchmarks.verify_goals
+
+    Args:
+        argv (Optional[List[str]]): Аргументы командной строки
+
+    Returns:
+        int: Код возврата (1 при обнаружении расхождений)
+    """
+
+    parser = argparse.ArgumentParser(description="Проверка вывода с целевыми выводами и досрочной остановкой")
+    parser.add_argument("--seeds", type=int, default=5, help="Количество синтетических баз знаний на набор")
+    parser.add_argument("--facts", type=int, default=300, help="Количество базовых фактов")
+    parser.add_argument("--rules", type=int, default=1000, help="Количество правил")
+    parser.add_argument("--cases", type=int, default=50, help="Количество наборов целей на базу знаний")
+    parser.add_argument("--benchmark-rules", type=int, default=20000,
+                        help="Количество правил для замера (0 - без замера)")
+    args = parser.parse_args(argv)
+
+    mismatches = []
+    for config, overrides in CONFIGS.items():
+        for seed in range(args.seeds):
+            params = {"facts": args.facts, "rules": args.rules, **overrides}
+            mismatches.extend(verify(config, params, seed, args.cases))
+
+    if args.benchmark_rules:
+        benchmark({"facts": args.benchmark_rules // 3, "rules": args.benchmark_rules, "domains": 20}, 0, 20)
+
+    for mismatch in mismatches:
+        print(f"Расхождение: {mismatch}")
+    if not mismatches:
+        print("Расхождений не обнаружено")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+import argparse
+import copy
+import random
+import sys
+import time
+from typing import Dict, List, Optional
+
+from app.expert_system import ExpertSystem
+from benchmarks.synthetic import SyntheticKnowledgeBase
+
+
+def mutate(knowledge_base: Dict, rng: random.Random, changes: int) -> Dict:
+    """
+    Получить новую версию базы знаний со случайными изменениями фактов и правил.
+
+    Args:
+        knowledge_base (Dict): Исходная база знаний
+        rng (random.Random): Генератор случайных чисел
+        changes (int): Количество изменений
+
+    Returns:
+        Dict: Измененная копия базы знаний
+    """
+
+    knowledge_base = copy.deepcopy(knowledge_base)
+    facts = knowledge_base["facts"]
+    rules = knowledge_base["rules"]
+
+    for _ in range(changes):
+        change = rng.randrange(6)
+        if change == 0 and facts:
+            del facts[rng.choice(sorted(facts))]
+        elif change == 1 and facts:
+            facts[rng.choice(sorted(facts))] = round(rng.random(), 2)
+        elif change == 2:
+            facts[f"новый_факт_{rng.randrange(1000)}"] = round(rng.random(), 2)
+        elif change == 3 and rules:
+            rules.pop(rng.randrange(len(rules)))
+        elif change == 4 and rules:
+            rule = dict(rng.choice(rules), cf=round(rng.random(), 2))
+            rules.insert(rng.randrange(len(rules) + 1), rule)
+        elif change == 5 and rules:
+            index = rng.randrange(len(rules))
+            rules[index] = dict(rules[index], then=rng.choice(rules)["then"])
+    return knowledge_base
+
+
+def verify(params: Dict, seed: int, versions: int, infer: bool) -> List[str]:
+    """
+    Сравнить перезагрузку по разнице с полной загрузкой на цепочке версий одной базы знаний.
+
+    Args:
+        params (Dict): Параметры генератора синтетической базы знаний
+        seed (int): Начальное значение генератора
+        versions (int): Количество последовательных версий
+        infer (bool): Выполнять ли infer после загрузки
+
+    Returns:
+        List[str]: Описания расхождений
+    """
+
+    rng = random.Random(seed)
+    knowledge_base = SyntheticKnowledgeBase(seed=seed, **params).generate()
+    engine = ExpertSystem()
+    engine.provenance.enabled = True
+    engine.load_from_dict(knowledge_base)
+    if infer:
+        engine.infer()
+
+    mismatches = []
+    reload_time = full_time = 0.0
+    for version in range(versions):
+        knowledge_base = mutate(knowledge_base, rng, rng.choice([1, 5, 50]))
+
+        started = time.perf_counter()
+        engine.reload_from_dict(knowledge_base)
+        reload_time += time.perf_counter() - started
+
+        started = time.perf_counter()
+        expected = ExpertSystem()
+        expected.load_from_dict(knowledge_base)
+        if infer:
+            expected.infer()
+        full_time += time.perf_counter() - started
+
+        label = f"seed={seed}/infer={infer}/{version}"
+        if engine.rules != expected.rules:
+            mismatches.append(f"{label}: правила отличаются")
+        differing = sorted(fact for fact in set(engine.facts) | set(expected.facts)
+                           if engine.facts.get(fact) != expected.facts.get(fact))
+        if differing:
+            mismatches.append(f"{label}: {len(differing)} фактов отличаются, например {differing[:3]}")
+        if infer:
+            for fact in engine.facts:
+                if engine.explain(fact, max_depth=1)["cf"] != engine.facts[fact]:
+                    mismatches.append(f"{label}: объяснение {fact} не соответствует CF")
+
+    print(
+        f"seed={seed} infer={infer}: перезагрузка по разнице {reload_time / versions * 1000:.2f}ms, "
+        f"полная загрузка {full_time / versions * 1000:.2f}ms на версию"
+    )
+    return mismatches
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа проверки: python -m benchmarks.verify_reload
+
+    Проверяются базы знаний без NOT над выводимыми фактами, для которых
+    перезагрузка по разнице совпадает с полной загрузкой и infer.
+
+    Args:
+        argv (Optional[List[str]]): Аргументы командной строки
+
+    Returns:
+        int: Код возврата (1 при обнаружении расхождений)
+    """
+
+    parser = argparse.ArgumentParser(description="Проверка эквивалентности перезагрузки по разнице и полной загрузки")
+    parser.add_argument("--seeds", type=int, default=5, help="Количество синтетических баз знаний")
+    parser.add_argument("--facts", type=int, default=300, help="Количество базовых фактов")
+    parser.add_argument("--rules", type=int, default=1000, help="Количество правил")
+    parser.add_argument("--versions", type=int, default=5, help="Количество последовательных версий базы знаний")
+    args = parser.parse_args(argv)
+
+    mismatches = []
+    for seed in range(args.seeds):
+        params = {"facts": args.facts, "rules": args.rules, "not_ratio": 0.0, "cycle_ratio": 0.05 if seed % 2 else 0.0}
+        for infer in (True, False):
+            mismatches.extend(verify(params, seed, args.versions, infer))
+
+    for mismatch in mismatches:
+        print(f"Расхождение: {mismatch}")
+    if not mismatches:
+        print("Расхождений с полной загрузкой не обнаружено")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
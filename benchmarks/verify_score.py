@@ -0,0 +1,123 @@
+import argparse
+import json
+import random
+import sys
+from typing import Dict, List, Optional
+
+import app.score as score
+from app.compiled_kb import CompiledKnowledgeBase
+from app.expert_system import ExpertSystem
+from benchmarks.synthetic import SyntheticKnowledgeBase
+
+
+CONFIGS = {
+    "closed_form": {"not_ratio": 0.0, "cycle_ratio": 0.0},
+    "acyclic": {"cycle_ratio": 0.0},
+    "cyclic": {"cycle_ratio": 0.05},
+    "wildcards": {"wildcard_ratio": 0.2, "cycle_ratio": 0.0},
+}
+
+
+def expected_conclusions(knowledge_base: Dict, inputs: Dict[str, float], conclusions: List[str]) -> List[Dict]:
+    """
+    Получить выводы случая полной загрузкой и выводом заново.
+
+    Args:
+        knowledge_base (Dict): База знаний
+        inputs (Dict[str, float]): Входные факты случая
+        conclusions (List[str]): Выводы правил базы знаний
+
+    Returns:
+        List[Dict]: Выводы с CF в формате CompiledKnowledgeBase.evaluate
+    """
+
+    engine = ExpertSystem()
+    engine.load_from_dict({"facts": {**knowledge_base["facts"], **inputs}, "rules": knowledge_base["rules"]})
+    engine.infer()
+    result = [
+        {"fact": fact, "cf": engine.facts[fact]}
+        for fact in conclusions if engine.facts.get(fact, 0.0) > 0
+    ]
+    result.sort(key=lambda item: item["cf"], reverse=True)
+    return result
+
+
+def verify(config: str, params: Dict, seed: int, cases: int) -> List[str]:
+    """
+    Сравнить пакетное вычисление случаев (score_chunk) с выводом заново на каждый случай.
+
+    Случаи вычисляются дважды, чтобы проверить и кэш результатов.
+
+    Args:
+        config (str): Название набора параметров генератора
+        params (Dict): Параметры генератора синтетической базы знаний
+        seed (int): Начальное значение генератора
+        cases (int): Количество случайных случаев
+
+    Returns:
+        List[str]: Описания расхождений
+    """
+
+    knowledge_base = SyntheticKnowledgeBase(seed=seed, **params).generate()
+    compiled = CompiledKnowledgeBase(knowledge_base, name=config)
+    score._knowledge_base = compiled
+    rng = random.Random(seed)
+    facts = sorted(knowledge_base["facts"])
+    conclusions = sorted(compiled.conclusions)
+
+    records = []
+    for _ in range(cases):
+        inputs = {fact: round(rng.random(), 2) for fact in rng.sample(facts, rng.randint(0, min(20, len(facts))))}
+        inputs.update({fact: round(rng.random() * 0.3, 2) for fact in rng.sample(conclusions, rng.randint(0, 2))})
+        records.append(json.dumps({"facts": inputs}, ensure_ascii=False))
+
+    mismatches = []
+    for attempt in range(2):
+        output, errors = score.score_chunk((1, "jsonl", None, records))
+        if errors:
+            mismatches.append(f"{config}/seed={seed}: {errors} случаев завершились ошибкой")
+        for record, line in zip(records, output.splitlines()):
+            result = json.loads(line)
+            inputs = json.loads(record)["facts"]
+            expected = expected_conclusions(knowledge_base, inputs, compiled.conclusions)
+            if result.get("conclusions") != expected:
+                mismatches.append(f"{config}/seed={seed}/{result['case']} (проход {attempt + 1}): "
+                                  f"выводы отличаются от вывода заново")
+    if compiled.facts != knowledge_base["facts"]:
+        mismatches.append(f"{config}/seed={seed}: вычисление случаев изменило факты базы знаний")
+    return mismatches
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа проверки: python -m benchmarks.verify_score
+
+    Args:
+        argv (Optional[List[str]]): Аргументы командной строки
+
+    Returns:
+        int: Код возврата (1 при обнаружении расхождений)
+    """
+
+    parser = argparse.ArgumentParser(description="Проверка пакетного вычисления случаев")
+    parser.add_argument("--seeds", type=int, default=3, help="Количество синтетических баз знаний на набор")
+    parser.add_argument("--facts", type=int, default=200, help="Количество базовых фактов")
+    parser.add_argument("--rules", type=int, default=600, help="Количество правил")
+    parser.add_argument("--cases", type=int, default=30, help="Количество случаев на базу знаний")
+    args = parser.parse_args(argv)
+
+    mismatches = []
+    for config, overrides in CONFIGS.items():
+        for seed in range(args.seeds):
+            params = {"facts": args.facts, "rules": args.rules, **overrides}
+            mismatches.extend(verify(config, params, seed, args.cases))
+
+    for mismatch in mismatches:
+        print(f"Расхождение: {mismatch}")
+    if not mismatches:
+        print("Расхождений не обнаружено")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+import argparse
+import random
+import sys
+import time
+from typing import Dict, List, Optional
+
+from app.expert_system import ExpertSystem
+from benchmarks.synthetic import SyntheticKnowledgeBase
+
+
+CONFIGS = {
+    "acyclic": {"not_ratio": 0.0, "cycle_ratio": 0.0},
+    "cyclic": {"not_ratio": 0.0, "cycle_ratio": 0.05},
+    "wildcards": {"not_ratio": 0.0, "wildcard_ratio": 0.2, "cycle_ratio": 0.0},
+}
+
+
+def hypothesis(knowledge_base: Dict, conclusions: List[str], rng: random.Random, changes: int) -> Dict:
+    """
+    Получить случайную гипотезу: повышение, понижение и удаление фактов.
+
+    Args:
+        knowledge_base (Dict): База знаний
+        conclusions (List[str]): Выводы правил
+        rng (random.Random): Генератор случайных чисел
+        changes (int): Количество изменяемых фактов
+
+    Returns:
+        Dict: Гипотетические CF фактов (None - факт неизвестен)
+    """
+
+    facts = sorted(knowledge_base["facts"])
+    result = {}
+    for _ in range(changes):
+        change = rng.randrange(5)
+        if change == 0:
+            result[rng.choice(facts)] = None
+        elif change == 1:
+            result[rng.choice(facts)] = round(rng.random() * 0.3, 2)
+        elif change == 2:
+            result[rng.choice(facts)] = round(rng.random(), 2)
+        elif change == 3:
+            result[rng.choice(conclusions)] = round(rng.random(), 2)
+        else:
+            result[rng.choice(conclusions)] = None
+    return result
+
+
+def expected_facts(knowledge_base: Dict, changes: Dict) -> Dict[str, float]:
+    """
+    Получить факты полного вывода заново с примененной гипотезой.
+
+    Args:
+        knowledge_base (Dict): База знаний
+        changes (Dict): Гипотетические CF фактов
+
+    Returns:
+        Dict[str, float]: Факты после load_from_dict и infer
+    """
+
+    facts = dict(knowledge_base["facts"])
+    for fact, cf in changes.items():
+        if cf is None:
+            facts.pop(fact, None)
+        else:
+            facts[fact] = cf
+    engine = ExpertSystem()
+    engine.load_from_dict({"facts": facts, "rules": knowledge_base["rules"]})
+    engine.infer()
+    return dict(engine.facts)
+
+
+def verify(config: str, params: Dict, seed: int, cases: int) -> List[str]:
+    """
+    Сравнить what_if с полным выводом заново на одной синтетической базе знаний.
+
+    Args:
+        config (str): Название набора параметров генератора
+        params (Dict): Параметры генератора синтетической базы знаний
+        seed (int): Начальное значение генератора
+        cases (int): Количество случайных гипотез
+
+    Returns:
+        List[str]: Описания расхождений
+    """
+
+    knowledge_base = SyntheticKnowledgeBase(seed=seed, **params).generate()
+    engine = ExpertSystem()
+    engine.load_from_dict(knowledge_base)
+    engine.infer()
+    inferred = dict(engine.facts)
+    rng = random.Random(seed)
+    conclusions = sorted(dict.fromkeys(rule.conclusion for rule in engine.rules))
+
+    mismatches = []
+    for case in range(cases):
+        changes = hypothesis(knowledge_base, conclusions, rng, rng.randint(1, 5))
+        delta = engine.what_if(changes)["delta"]
+        actual = dict(inferred)
+        for fact, cf in delta.items():
+            if cf is None:
+                actual.pop(fact, None)
+            else:
+                actual[fact] = cf
+        expected = expected_facts(knowledge_base, changes)
+        if actual != expected:
+            differing = sorted(fact for fact in set(actual) | set(expected) if actual.get(fact) != expected.get(fact))
+            mismatches.append(f"{config}/seed={seed}/{case}: {changes} расходится по {differing[:5]}")
+    if dict(engine.facts) != inferred:
+        mismatches.append(f"{config}/seed={seed}: what_if изменил факты базы знаний")
+    return mismatches
+
+
+def benchmark(params: Dict, seed: int, cases: int):
+    """
+    Сравнить время what_if с полным выводом заново.
+
+    Args:
+        params (Dict): Параметры генератора синтетической базы знаний
+        seed (int): Начальное значение генератора
+        cases (int): Количество гипотез
+    """
+
+    knowledge_base = SyntheticKnowledgeBase(seed=seed, **params).generate()
+    engine = ExpertSystem()
+    engine.load_from_dict(knowledge_base)
+    engine.infer()
+    rng = random.Random(seed)
+    facts = sorted(knowledge_base["facts"])
+    hypotheses = [{rng.choice(facts): round(rng.random(), 2)} for _ in range(cases)]
+
+    started = time.perf_counter()
+    for changes in hypotheses:
+        engine.what_if(changes)
+    what_if_time = (time.perf_counter() - started) / cases
+
+    started = time.perf_counter()
+    expected_facts(knowledge_base, hypotheses[0])
+    full_time = time.perf_counter() - started
+
+    print(
+        f"{params['rules']} правил: what_if {what_if_time * 1000:.1f}ms, "
+        f"полный вывод заново {full_time * 1000:.1f}ms"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа проверки: python -m benchmarks.verify_what_if
+
+    Args:
+        argv (Optional[List[str]]): Аргументы командной строки
+
+    Returns:
+        int: Код возврата (1 при обнаружении расхождений)
+    """
+
+    parser = argparse.ArgumentParser(description="Проверка гипотетических изменений фактов (what_if)")
+    parser.add_argument("--seeds", type=int, default=5, help="Количество синтетических баз знаний на набор")
+    parser.add_argument("--facts", type=int, default=300, help="Количество базовых фактов")
+    parser.add_argument("--rules", type=int, default=1000, help="Количество правил")
+    parser.add_argument("--cases", type=int, default=30, help="Количество гипотез на базу знаний")
+    parser.add_argument("--benchmark-rules", type=int, default=20000,
+                        help="Количество правил для замера (0 - без замера)")
+    args = parser.parse_args(argv)
+
+    mismatches = []
+    for config, overrides in CONFIGS.items():
+        for seed in range(args.seeds):
+            params = {"facts": args.facts, "rules": args.rules, **overrides}
+            mismatches.extend(verify(config, params, seed, args.cases))
+
+    if args.benchmark_rules:
+        benchmark({"facts": args.benchmark_rules // 3, "rules": args.benchmark_rules, "domains": 20}, 0, 20)
+
+    for mismatch in mismatches:
+        print(f"Расхождение: {mismatch}")
+    if not mismatches:
+        print("Расхождений не обнаружено")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,206 @@
+import argparse
+import random
+import sys
+import time
+from typing import Dict, List, Optional
+
+from app.analyzer import rule_components
+from app.expert_system import ExpertSystem
+from app.fact_store import FactStore
+from app.fact_trie import match_facts, rule_wildcards
+from app.overlay import FactOverlay
+from benchmarks.synthetic import SyntheticKnowledgeBase
+
+
+def scan(facts, prefix: str) -> List[str]:
+    """
+    Найти факты с префиксом перебором (эталон для префиксного дерева).
+
+    Args:
+        facts: Факты
+        prefix (str): Префикс
+
+    Returns:
+        List[str]: Имена фактов с префиксом по возрастанию
+    """
+
+    return sorted(fact for fact in facts if fact.startswith(prefix))
+
+
+def verify_trie(seed: int, operations: int) -> List[str]:
+    """
+    Сравнить поиск по префиксу в FactStore и FactOverlay с перебором при случайных изменениях.
+
+    Args:
+        seed (int): Начальное значение генератора
+        operations (int): Количество изменений
+
+    Returns:
+        List[str]: Описания расхождений
+    """
+
+    rng = random.Random(seed)
+    names = [f"симптом_{a}_{b}" for a in ("кашель", "кожа", "жар") for b in range(30)]
+    store = FactStore({name: 0.5 for name in rng.sample(names, 40)})
+    overlay = FactOverlay(FactStore({name: 0.5 for name in rng.sample(names, 40)}))
+    prefixes = ["", "симптом_", "симптом_к", "симптом_кашель_", "симптом_кашель_1", "симптом_жар_29", "нет_"]
+
+    mismatches = []
+    for step in range(operations):
+        target = rng.choice([store, overlay])
+        name = rng.choice(names)
+        action = rng.randrange(4)
+        if action == 0:
+            target[name] = rng.random()
+        elif action == 1:
+            target.pop(name, None)
+        elif action == 2 and target is store:
+            store.update({rng.choice(names): 1.0 for _ in range(3)})
+        elif target:
+            target.popitem()
+
+        prefix = rng.choice(prefixes)
+        for label, facts in (("FactStore", store), ("FactOverlay", overlay)):
+            if sorted(match_facts(facts, prefix)) != scan(facts, prefix):
+                mismatches.append(f"seed={seed}/{step}: {label} '{prefix}' не совпадает с перебором")
+    return mismatches
+
+
+def verify_inference(params: Dict, seed: int, changes: int) -> List[str]:
+    """
+    Сравнить вывод по шаблонным условиям разными способами вычисления.
+
+    Сеть условий и прямая оценка условий сравниваются на базе знаний
+    с шаблонами "все" и НЕТ; распространение изменений (what_if),
+    сокращенный план вывода и разбиение на компоненты - на базе
+    только с монотонными шаблонами "любой".
+
+    Args:
+        params (Dict): Параметры генератора синтетической базы знаний
+        seed (int): Начальное значение генератора
+        changes (int): Количество изменяемых фактов в what_if
+
+    Returns:
+        List[str]: Описания расхождений
+    """
+
+    rng = random.Random(seed)
+    mismatches = []
+
+    knowledge_base = SyntheticKnowledgeBase(seed=seed, **params).generate()
+    for rule in knowledge_base["rules"]:
+        for condition in rule["if"]:
+            if isinstance(condition["fact"], str) and condition["fact"].endswith("*") and rng.random() < 0.5:
+                condition["is_group"] = True
+    engines = []
+    for use_network in (True, False):
+        engine = ExpertSystem()
+        engine.use_network = use_network
+        engine.load_from_dict(knowledge_base)
+        engine.infer()
+        engines.append(engine)
+    if engines[0].facts != engines[1].facts:
+        mismatches.append(f"seed={seed}: вывод через сеть условий отличается от прямой оценки")
+
+    monotone = SyntheticKnowledgeBase(seed=seed, **dict(params, not_ratio=0.0)).generate()
+    engine = ExpertSystem()
+    engine.load_from_dict(monotone)
+    engine.infer()
+
+    facts = sorted(monotone["facts"])
+    hypothesis = {fact: round(rng.random(), 2) for fact in rng.sample(facts, min(changes, len(facts)))}
+    expected = ExpertSystem()
+    expected.load_from_dict(monotone)
+    expected.infer()
+    expected.facts.update(hypothesis)
+    expected.infer()
+    overlay = FactOverlay(engine.facts, hypothesis)
+    engine._propagate(overlay, list(hypothesis))
+    if dict(overlay) != dict(expected.facts):
+        mismatches.append(f"seed={seed}: распространение изменений отличается от infer")
+
+    optimized = ExpertSystem()
+    optimized.load_from_dict(monotone, optimize=True)
+    optimized.infer()
+    if optimized.facts != engine.facts:
+        mismatches.append(f"seed={seed}: сокращенный план вывода отличается от полного")
+
+    rules = engine.rules
+    component_of = {index: number for number, component in enumerate(rule_components(rules)) for index in component}
+    for index, rule in enumerate(rules):
+        for prefix in rule_wildcards(rule):
+            for other, writer in enumerate(rules):
+                if writer.conclusion.startswith(prefix) and component_of[other] != component_of[index]:
+                    mismatches.append(f"seed={seed}: правило {other} не в компоненте шаблона правила {index}")
+
+    return mismatches
+
+
+def benchmark(facts: int, lookups: int):
+    """
+    Сравнить время поиска по префиксу в дереве и перебором.
+
+    Args:
+        facts (int): Количество фактов
+        lookups (int): Количество поисков
+    """
+
+    store = FactStore({f"симптом_{i % 100}_{i}": 0.5 for i in range(facts)})
+    prefixes = [f"симптом_{i % 100}_{i}" for i in range(lookups)]
+    store.prefix_matches("")
+
+    started = time.perf_counter()
+    for prefix in prefixes:
+        store.prefix_matches(prefix)
+    trie_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for prefix in prefixes:
+        [fact for fact in store if fact.startswith(prefix)]
+    scan_time = time.perf_counter() - started
+
+    print(
+        f"{facts} фактов: префиксное дерево {trie_time / lookups * 1e6:.1f}us, "
+        f"перебор {scan_time / lookups * 1e6:.1f}us на поиск"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Точка входа проверки: python -m benchmarks.verify_wildcards
+
+    Args:
+        argv (Optional[List[str]]): Аргументы командной строки
+
+    Returns:
+        int: Код возврата (1 при обнаружении расхождений)
+    """
+
+    parser = argparse.ArgumentParser(description="Проверка шаблонных условий и префиксного индекса фактов")
+    parser.add_argument("--seeds", type=int, default=5, help="Количество синтетических баз знаний")
+    parser.add_argument("--facts", type=int, default=300, help="Количество базовых фактов")
+    parser.add_argument("--rules", type=int, default=1000, help="Количество правил")
+    parser.add_argument("--wildcard-ratio", type=float, default=0.2, help="Доля условий-шаблонов")
+    parser.add_argument("--benchmark-facts", type=int, default=100000,
+                        help="Количество фактов для замера поиска по префиксу (0 - без замера)")
+    args = parser.parse_args(argv)
+
+    mismatches = []
+    for seed in range(args.seeds):
+        params = {"facts": args.facts, "rules": args.rules, "wildcard_ratio": args.wildcard_ratio,
+                  "cycle_ratio": 0.05 if seed % 2 else 0.0}
+        mismatches.extend(verify_trie(seed, 500))
+        mismatches.extend(verify_inference(params, seed, 10))
+
+    if args.benchmark_facts:
+        benchmark(args.benchmark_facts, 1000)
+
+    for mismatch in mismatches:
+        print(f"Расхождение: {mismatch}")
+    if not mismatches:
+        print("Расхождений не обнаружено")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,18 +1,277 @@
 // static/js/frontend.js
-let currentFacts = {};
-let currentRules = [];
+let factCount = 0;
+let ruleCount = 0;
 let selectedFact = null;
 let selectedRule = null;
 let currentFilename = null;
+let factsView = null;
+let rulesView = null;
+
+const FACT_ROW_HEIGHT = 60;
+const RULE_ROW_HEIGHT = 104;
+const LIST_PAGE_SIZE = 200;
 
 document.addEventListener('DOMContentLoaded', function() {
     console.log('Универсальная экспертная система загружена');
+    factsView = new VirtualList(document.getElementById('factsList'), {
+        rowHeight: FACT_ROW_HEIGHT,
+        className: 'fact-item',
+        emptyMessage: 'Факты отсутствуют',
+        fetchPage: (offset, limit) => fetchPage('/api/facts', offset, limit, 'factSearch'),
+        renderRow: renderFactRow,
+        onSelect: (item, index, element) => selectFact(item, index, element)
+    });
+    rulesView = new VirtualList(document.getElementById('rulesList'), {
+        rowHeight: RULE_ROW_HEIGHT,
+        className: 'rule-item',
+        emptyMessage: 'Правила отсутствуют',
+        fetchPage: (offset, limit) => fetchPage('/api/rules', offset, limit, 'ruleSearch'),
+        renderRow: renderRuleRow,
+        onSelect: (item, index, element) => selectRule(item, index, element)
+    });
     loadKnowledgeBases();
     loadCurrentState();
-    updateCounters();
     showTab('facts');
 });
 
+// Список с виртуальной прокруткой: в DOM находятся только видимые строки,
+// данные запрашиваются у сервера страницами по мере прокрутки.
+class VirtualList {
+    constructor(container, options) {
+        this.container = container;
+        this.rowHeight = options.rowHeight;
+        this.className = options.className;
+        this.emptyMessage = options.emptyMessage;
+        this.fetchPage = options.fetchPage;
+        this.renderRow = options.renderRow;
+        this.onSelect = options.onSelect;
+        this.pageSize = options.pageSize || LIST_PAGE_SIZE;
+        this.overscan = options.overscan || 10;
+
+        this.total = 0;
+        this.pages = new Map();
+        this.loading = new Set();
+        this.rows = new Map();
+        this.selectedIndex = null;
+        this.generation = 0;
+        this.frame = null;
+
+        this.container.innerHTML = '';
+        this.container.classList.add('virtual-list');
+        this.spacer = document.createElement('div');
+        this.spacer.className = 'virtual-spacer';
+        this.empty = document.createElement('div');
+        this.empty.className = 'empty-message';
+        this.empty.textContent = this.emptyMessage;
+        this.container.appendChild(this.spacer);
+        this.container.appendChild(this.empty);
+
+        this.container.addEventListener('scroll', () => this.scheduleRender());
+        window.addEventListener('resize', () => this.scheduleRender());
+    }
+
+    // Полная перезагрузка: сбрасывает кэш страниц и запрашивает первую видимую страницу
+    reload() {
+        this.generation++;
+        this.pages.clear();
+        this.loading.clear();
+        this.clearRows();
+        this.selectedIndex = null;
+        return this.loadPage(this.pageOf(this.firstVisible()));
+    }
+
+    // Сбрасывает кэш страниц начиная с индекса (после удаления строки индексы сдвигаются)
+    invalidateFrom(index, total) {
+        const firstPage = this.pageOf(index);
+        for (const page of Array.from(this.pages.keys())) {
+            if (page >= firstPage) this.pages.delete(page);
+        }
+        this.loading.clear();
+        this.generation++;
+        for (const rowIndex of Array.from(this.rows.keys())) {
+            if (rowIndex >= index) this.removeRow(rowIndex);
+        }
+        this.setTotal(total);
+    }
+
+    // Добавляет элемент в конец списка без перезагрузки страниц
+    append(item, total) {
+        const index = total - 1;
+        const page = this.pages.get(this.pageOf(index));
+        if (page && page.length === index % this.pageSize) {
+            page.push(item);
+        }
+        this.setTotal(total);
+    }
+
+    // Заменяет элемент в кэше и перерисовывает строку, если она видна
+    update(index, item) {
+        const page = this.pages.get(this.pageOf(index));
+        if (page && index % this.pageSize < page.length) {
+            page[index % this.pageSize] = item;
+        }
+        this.removeRow(index);
+        this.scheduleRender();
+    }
+
+    // Ищет индекс элемента среди уже загруженных страниц
+    findIndex(predicate) {
+        for (const [page, items] of this.pages) {
+            const offset = items.findIndex(predicate);
+            if (offset !== -1) return page * this.pageSize + offset;
+        }
+        return -1;
+    }
+
+    select(index) {
+        this.selectedIndex = index;
+        this.rows.forEach((element, rowIndex) => {
+            element.classList.toggle('selected', rowIndex === index);
+        });
+    }
+
+    clearSelection() {
+        this.select(null);
+    }
+
+    setTotal(total) {
+        this.total = total;
+        this.spacer.style.height = `${total * this.rowHeight}px`;
+        this.empty.style.display = total === 0 ? '' : 'none';
+        this.scheduleRender();
+    }
+
+    pageOf(index) {
+        return Math.floor(index / this.pageSize);
+    }
+
+    firstVisible() {
+        return Math.max(0, Math.floor(this.container.scrollTop / this.rowHeight) - this.overscan);
+    }
+
+    loadPage(page) {
+        if (this.pages.has(page) || this.loading.has(page)) return Promise.resolve();
+
+        const generation = this.generation;
+        this.loading.add(page);
+        return this.fetchPage(page * this.pageSize, this.pageSize)
+            .then(data => {
+                if (generation !== this.generation) return;
+                this.loading.delete(page);
+                this.pages.set(page, data.items);
+                this.setTotal(data.total);
+            })
+            .catch(error => {
+                this.loading.delete(page);
+                console.error('Error:', error);
+            });
+    }
+
+    scheduleRender() {
+        if (this.frame !== null) return;
+        this.frame = requestAnimationFrame(() => {
+            this.frame = null;
+            this.render();
+        });
+    }
+
+    render() {
+        const first = this.firstVisible();
+        const visibleRows = Math.ceil(this.container.clientHeight / this.rowHeight);
+        const last = Math.min(this.total, first + visibleRows + 2 * this.overscan);
+
+        for (const index of Array.from(this.rows.keys())) {
+            if (index < first || index >= last) this.removeRow(index);
+        }
+
+        for (let index = first; index < last; index++) {
+            const page = this.pages.get(this.pageOf(index));
+            const item = page ? page[index % this.pageSize] : undefined;
+            if (item === undefined) {
+                this.loadPage(this.pageOf(index));
+            }
+
+            let element = this.rows.get(index);
+            if (element && element.item === item) continue;
+
+            if (!element) {
+                element = document.createElement('div');
+                element.className = `${this.className} virtual-row`;
+                element.style.top = `${index * this.rowHeight}px`;
+                element.style.height = `${this.rowHeight - 10}px`;
+                element.onclick = () => {
+                    if (element.item !== undefined) this.onSelect(element.item, index, element);
+                };
+                this.rows.set(index, element);
+                this.spacer.appendChild(element);
+            }
+
+            element.item = item;
+            element.classList.toggle('selected', index === this.selectedIndex);
+            if (item === undefined) {
+                element.innerHTML = '<div class="virtual-placeholder">Загрузка...</div>';
+            } else {
+                this.renderRow(element, item, index);
+            }
+        }
+    }
+
+    removeRow(index) {
+        const element = this.rows.get(index);
+        if (element) {
+            element.remove();
+            this.rows.delete(index);
+        }
+    }
+
+    clearRows() {
+        this.rows.forEach(element => element.remove());
+        this.rows.clear();
+    }
+}
+
+function fetchPage(url, offset, limit, searchInputId) {
+    const params = new URLSearchParams({ offset: offset, limit: limit });
+    const search = document.getElementById(searchInputId);
+    if (search && search.value.trim()) {
+        params.set('search', search.value.trim());
+    }
+
+    return fetch(`${url}?${params}`)
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) throw new Error(data.error || 'Ошибка загрузки списка');
+            applyCounts(data);
+            return data;
+        });
+}
+
+function isSearchActive(searchInputId) {
+    const search = document.getElementById(searchInputId);
+    return Boolean(search && search.value.trim());
+}
+
+function filterFacts() {
+    clearFactInputs();
+    factsView.reload();
+}
+
+function filterRules() {
+    clearRuleInputs();
+    rulesView.reload();
+}
+
+function applyCounts(data) {
+    if (data.fact_count !== undefined) factCount = data.fact_count;
+    if (data.rule_count !== undefined) ruleCount = data.rule_count;
+    updateCounters();
+}
+
+function refreshLists() {
+    factsView.reload();
+    rulesView.reload();
+}
+
 function showTab(tabName) {
     document.querySelectorAll('.tab-content').forEach(tab => {
         tab.classList.remove('active');
@@ -50,7 +309,7 @@ function addOrEditFact() {
 
     const factData = { fact: fact, cf: cf };
 
-    fetch('/api/fact', {
+    fetch('/api/fact?compact=true', {
         method: 'POST',
         headers: {'Content-Type': 'application/json'},
         body: JSON.stringify(factData)
@@ -58,10 +317,9 @@ function addOrEditFact() {
     .then(response => response.json())
     .then(data => {
         if (data.success) {
-            currentFacts = data.facts;
-            displayFacts();
+            applyFactChange(data);
             clearFactInputs();
-            updateCounters();
+            applyCounts(data);
         } else {
             alert('Ошибка: ' + (data.error || 'Неизвестная ошибка'));
         }
@@ -82,16 +340,21 @@ function deleteSelectedFact() {
         return;
     }
 
-    fetch(`/api/fact/${encodeURIComponent(selectedFact)}`, {
+    const deletedIndex = factsView.selectedIndex;
+
+    fetch(`/api/fact/${encodeURIComponent(selectedFact)}?compact=true`, {
         method: 'DELETE'
     })
     .then(response => response.json())
     .then(data => {
         if (data.success) {
-            currentFacts = data.facts;
-            displayFacts();
-            selectedFact = null;
-            updateCounters();
+            clearFactInputs();
+            applyCounts(data);
+            if (isSearchActive('factSearch') || deletedIndex === null) {
+                factsView.reload();
+            } else {
+                factsView.invalidateFrom(deletedIndex, data.fact_count);
+            }
         }
     })
     .catch(error => {
@@ -100,23 +363,38 @@ function deleteSelectedFact() {
     });
 }
 
+// Применяет добавление или изменение одного факта к списку без его полной перерисовки
+function applyFactChange(data) {
+    const item = { fact: data.fact, cf: data.cf };
+
+    if (isSearchActive('factSearch')) {
+        factsView.reload();
+        return;
+    }
+
+    if (data.created) {
+        factsView.append(item, data.fact_count);
+        return;
+    }
+
+    const index = factsView.findIndex(cached => cached.fact === data.fact);
+    if (index !== -1) {
+        factsView.update(index, item);
+    }
+}
+
 function clearFactInputs() {
     document.getElementById('factInput').value = '';
     document.getElementById('factCF').value = '';
     selectedFact = null;
-    document.querySelectorAll('.fact-item').forEach(item => {
-        item.classList.remove('selected');
-    });
+    if (factsView) factsView.clearSelection();
 }
 
-function selectFact(fact, element) {
-    selectedFact = fact;
-    document.querySelectorAll('.fact-item').forEach(item => {
-        item.classList.remove('selected');
-    });
-    element.classList.add('selected');
-    document.getElementById('factInput').value = fact;
-    document.getElementById('factCF').value = currentFacts[fact];
+function selectFact(item, index, element) {
+    selectedFact = item.fact;
+    factsView.select(index);
+    document.getElementById('factInput').value = item.fact;
+    document.getElementById('factCF').value = item.cf;
 }
 
 function addOrEditRule() {
@@ -145,7 +423,7 @@ function addOrEditRule() {
         cf: cf
     };
 
-    fetch('/api/rule', {
+    fetch('/api/rule?compact=true', {
         method: 'POST',
         headers: {'Content-Type': 'application/json'},
         body: JSON.stringify(ruleData)
@@ -153,10 +431,13 @@ function addOrEditRule() {
     .then(response => response.json())
     .then(data => {
         if (data.success) {
-            currentRules = data.rules;
-            displayRules();
+            if (isSearchActive('ruleSearch')) {
+                rulesView.reload();
+            } else {
+                rulesView.append(data.rule, data.rule_count);
+            }
             clearRuleInputs();
-            updateCounters();
+            applyCounts(data);
         } else {
             alert('Ошибка: ' + (data.error || 'Неизвестная ошибка'));
         }
@@ -177,16 +458,21 @@ function deleteSelectedRule() {
         return;
     }
 
-    fetch(`/api/rule/${selectedRule}`, {
+    const deletedRow = rulesView.selectedIndex;
+
+    fetch(`/api/rule/${selectedRule}?compact=true`, {
         method: 'DELETE'
     })
     .then(response => response.json())
     .then(data => {
         if (data.success) {
-            currentRules = data.rules;
-            displayRules();
-            selectedRule = null;
-            updateCounters();
+            clearRuleInputs();
+            applyCounts(data);
+            if (isSearchActive('ruleSearch') || deletedRow === null) {
+                rulesView.reload();
+            } else {
+                rulesView.invalidateFrom(deletedRow, data.rule_count);
+            }
         }
     })
     .catch(error => {
@@ -200,19 +486,13 @@ function clearRuleInputs() {
     document.getElementById('conclusionInput').value = '';
     document.getElementById('ruleCF').value = '';
     selectedRule = null;
-    document.querySelectorAll('.rule-item').forEach(item => {
-        item.classList.remove('selected');
-    });
+    if (rulesView) rulesView.clearSelection();
 }
 
-function selectRule(index, element) {
-    selectedRule = index;
-    document.querySelectorAll('.rule-item').forEach(item => {
-        item.classList.remove('selected');
-    });
-    element.classList.add('selected');
+function selectRule(rule, row, element) {
+    selectedRule = rule.index;
+    rulesView.select(row);
 
-    const rule = currentRules[index];
     document.getElementById('conditionsInput').value = formatConditionsForInput(rule.if);
     document.getElementById('conclusionInput').value = rule.then;
     document.getElementById('ruleCF').value = rule.cf;
@@ -370,6 +650,95 @@ function displayQueryResults(query, result) {
     queryResults.innerHTML = html;
 }
 
+function runInference() {
+    const inferenceResults = document.getElementById('inferenceResults');
+    inferenceResults.innerHTML = '<div class="empty-message">Выполняется вывод...</div>';
+
+    const rows = {};
+    let received = 0;
+
+    fetch('/api/infer/stream', { method: 'POST' })
+    .then(response => {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+
+        function read() {
+            return reader.read().then(({ done, value }) => {
+                if (done) return;
+                buffer += decoder.decode(value, { stream: true });
+
+                let boundary;
+                while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                    const frame = buffer.slice(0, boundary);
+                    buffer = buffer.slice(boundary + 2);
+                    handleInferenceEvent(parseEventFrame(frame));
+                }
+                return read();
+            });
+        }
+
+        return read();
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        inferenceResults.innerHTML = '<div class="empty-message" style="color: #e74c3c;">Ошибка соединения с сервером</div>';
+    });
+
+    function handleInferenceEvent(event) {
+        if (!event) return;
+
+        if (event.event === 'inferred') {
+            if (received === 0) {
+                inferenceResults.innerHTML = '';
+            }
+            received++;
+
+            let row = rows[event.fact];
+            if (!row) {
+                row = document.createElement('div');
+                row.className = 'fact-item';
+                rows[event.fact] = row;
+                inferenceResults.appendChild(row);
+            }
+            row.innerHTML = `
+                <div class="fact-content" style="display: flex; justify-content: space-between;">
+                    <span><span class="inferred-fact"></span> <small style="color: #7f8c8d;"></small></span>
+                    <span class="inferred-cf" style="font-weight: bold;"></span>
+                </div>
+            `;
+            row.querySelector('.inferred-fact').textContent = event.fact;
+            row.querySelector('small').textContent = `(правило #${event.rule + 1}, проход ${event.pass})`;
+            row.querySelector('.inferred-cf').textContent = `CF: ${event.cf.toFixed(4)}`;
+        } else if (event.event === 'summary') {
+            const summary = document.createElement('div');
+            summary.className = 'hint-box';
+            summary.textContent = `Выведено фактов: ${Object.keys(event.inferred).length}, ` +
+                `срабатываний правил: ${event.firings}, проходов: ${event.passes}`;
+            if (received === 0) {
+                inferenceResults.innerHTML = '<div class="empty-message">Новых выводов нет</div>';
+            }
+            inferenceResults.appendChild(summary);
+            factsView.reload();
+        } else if (event.event === 'error') {
+            const message = document.createElement('div');
+            message.className = 'empty-message';
+            message.style.color = '#e74c3c';
+            message.textContent = event.error;
+            inferenceResults.replaceChildren(message);
+        }
+    }
+}
+
+function parseEventFrame(frame) {
+    const dataLines = frame.split('\n')
+        .filter(line => line.startsWith('data:'))
+        .map(line => line.slice(5).trim());
+
+    if (dataLines.length === 0) return null;
+    return JSON.parse(dataLines.join('\n'));
+}
+
 function getConfidenceClass(cf) {
     if (cf >= 0.8) return 'very-high';
     if (cf >= 0.6) return 'high';
@@ -416,17 +785,16 @@ function loadSelectedBase() {
         return;
     }
 
-    fetch(`/api/knowledge-base/${selectedFile}`)
+    fetch(`/api/knowledge-base/${selectedFile}?compact=true`)
         .then(response => response.json())
         .then(data => {
             if (data.success) {
-                currentFacts = data.facts;
-                currentRules = data.rules;
                 currentFilename = data.filename || selectedFile;
 
-                displayFacts();
-                displayRules();
-                updateCounters();
+                clearFactInputs();
+                clearRuleInputs();
+                applyCounts(data);
+                refreshLists();
 
                 alert(`База знаний "${selectedFile}" успешно загружена`);
             }
@@ -441,12 +809,8 @@ function saveCurrentBase() {
     const filename = prompt('Введите имя для новой базы знаний:', currentFilename || 'моя_база_знаний');
     if (!filename) return;
 
-    const data = { facts: currentFacts, rules: currentRules };
-
     fetch(`/api/knowledge-base/${filename}`, {
-        method: 'POST',
-        headers: {'Content-Type': 'application/json'},
-        body: JSON.stringify(data)
+        method: 'POST'
     })
     .then(response => response.json())
     .then(data => {
@@ -490,96 +854,71 @@ function deleteSelectedBase() {
     });
 }
 
-function displayFacts() {
-    const factsList = document.getElementById('factsList');
-    factsList.innerHTML = '';
-
-    if (Object.keys(currentFacts).length === 0) {
-        factsList.innerHTML = '<div class="empty-message">Факты отсутствуют</div>';
-        return;
-    }
-
-    Object.entries(currentFacts).forEach(([fact, cf]) => {
-        const factItem = document.createElement('div');
-        factItem.className = 'fact-item';
-        factItem.onclick = () => selectFact(fact, factItem);
-        factItem.innerHTML = `
-            <div class="fact-content">
-                <div class="fact-text">${fact}</div>
-                <div style="background: #667eea; color: white; padding: 4px 12px; border-radius: 12px; font-size: 0.85em; font-weight: 500;">
-                    CF: ${cf.toFixed(2)}
-                </div>
+function renderFactRow(element, item) {
+    element.innerHTML = `
+        <div class="fact-content">
+            <div class="fact-text"></div>
+            <div style="background: #667eea; color: white; padding: 4px 12px; border-radius: 12px; font-size: 0.85em; font-weight: 500;">
+                CF: ${item.cf.toFixed(2)}
             </div>
-        `;
-        factsList.appendChild(factItem);
-    });
+        </div>
+    `;
+    element.querySelector('.fact-text').textContent = item.fact;
 }
 
-function displayRules() {
-    const rulesList = document.getElementById('rulesList');
-    rulesList.innerHTML = '';
-
-    if (currentRules.length === 0) {
-        rulesList.innerHTML = '<div class="empty-message">Правила отсутствуют</div>';
-        return;
-    }
-
-    currentRules.forEach((rule, index) => {
-        const ruleItem = document.createElement('div');
-        ruleItem.className = 'rule-item';
-        ruleItem.onclick = () => selectRule(index, ruleItem);
-
-        let conditionsText = '';
-        rule.if.forEach((cond, i) => {
-            if (cond.is_group && Array.isArray(cond.fact)) {
-                conditionsText += `(${cond.fact.join(', ')})`;
-            } else {
-                let factText = cond.fact;
-                if (cond.operator === 'NOT') {
-                    factText = 'НЕТ ' + factText;
-                }
-                conditionsText += factText;
+function formatConditionsText(conditions) {
+    let conditionsText = '';
+    conditions.forEach((cond, i) => {
+        if (cond.is_group && Array.isArray(cond.fact)) {
+            conditionsText += `(${cond.fact.join(', ')})`;
+        } else {
+            let factText = cond.fact;
+            if (cond.operator === 'NOT') {
+                factText = 'НЕТ ' + factText;
             }
+            conditionsText += factText;
+        }
 
-            if (i < rule.if.length - 1) {
-                if (cond.operator === 'AND') {
-                    conditionsText += ' И ';
-                } else if (cond.operator === 'OR') {
-                    conditionsText += ' ИЛИ ';
-                } else {
-                    conditionsText += ' ';
-                }
+        if (i < conditions.length - 1) {
+            if (cond.operator === 'AND') {
+                conditionsText += ' И ';
+            } else if (cond.operator === 'OR') {
+                conditionsText += ' ИЛИ ';
+            } else {
+                conditionsText += ' ';
             }
-        });
+        }
+    });
+    return conditionsText;
+}
 
-        ruleItem.innerHTML = `
-            <div>
-                <div style="display: flex; justify-content: space-between; margin-bottom: 5px;">
-                    <span style="color: #667eea; font-weight: 500;">CF: ${rule.cf.toFixed(2)}</span>
-                </div>
-                <div><strong>ЕСЛИ:</strong> ${conditionsText}</div>
-                <div><strong>ТО:</strong> ${rule.then}</div>
+function renderRuleRow(element, rule) {
+    element.innerHTML = `
+        <div>
+            <div style="display: flex; justify-content: space-between; margin-bottom: 5px;">
+                <span style="color: #667eea; font-weight: 500;">CF: ${rule.cf.toFixed(2)}</span>
+                <span style="color: #7f8c8d;">#${rule.index + 1}</span>
             </div>
-        `;
-        rulesList.appendChild(ruleItem);
-    });
+            <div class="rule-line"><strong>ЕСЛИ:</strong> <span class="rule-conditions"></span></div>
+            <div class="rule-line"><strong>ТО:</strong> <span class="rule-conclusion"></span></div>
+        </div>
+    `;
+    element.querySelector('.rule-conditions').textContent = formatConditionsText(rule.if);
+    element.querySelector('.rule-conclusion').textContent = rule.then;
 }
 
 function updateCounters() {
-    document.getElementById('factCount').textContent = Object.keys(currentFacts).length;
-    document.getElementById('ruleCount').textContent = currentRules.length;
+    document.getElementById('factCount').textContent = factCount;
+    document.getElementById('ruleCount').textContent = ruleCount;
 }
 
 function loadCurrentState() {
-    fetch('/api/current-state')
+    fetch('/api/current-state?compact=true')
         .then(response => response.json())
         .then(data => {
             if (data.success) {
-                currentFacts = data.facts;
-                currentRules = data.rules;
-                displayFacts();
-                displayRules();
-                updateCounters();
+                applyCounts(data);
+                refreshLists();
             }
         })
         .catch(error => {
@@ -0,0 +1,20 @@
+import pytest
+
+from benchmarks import verify_closed_form, verify_score
+
+
+@pytest.mark.parametrize("config", sorted(verify_closed_form.CONFIGS))
+@pytest.mark.parametrize("seed", [0, 1])
+def test_closed_form_matches_infer(config, seed):
+    """Вычисление в замкнутой форме совпадает с infer."""
+
+    params = {"facts": 100, "rules": 300, **verify_closed_form.CONFIGS[config]}
+    assert verify_closed_form.verify(config, params, seed, cases=3, samples=10) == []
+
+
+@pytest.mark.parametrize("config", sorted(verify_score.CONFIGS))
+def test_compiled_evaluate_matches_infer(config):
+    """Вычисление случаев скомпилированной базой знаний совпадает с выводом заново."""
+
+    params = {"facts": 80, "rules": 240, **verify_score.CONFIGS[config]}
+    assert verify_score.verify(config, params, seed=0, cases=10) == []
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from app.fuzzy_index import TrigramIndex, trigrams
+from app.query_index import normalize_fact_name
+from benchmarks import verify_wildcards
+from benchmarks.synthetic import SyntheticKnowledgeBase
+
+
+def fuzzy_scan(names, name, threshold, limit):
+    """Найти похожие имена перебором всех имен (эталон для TrigramIndex)."""
+
+    normalized = {}
+    for fact in names:
+        normalized.setdefault(normalize_fact_name(fact), fact)
+    key = normalize_fact_name(name)
+    grams = trigrams(key)
+    scored = []
+    for other, fact in normalized.items():
+        if other == key or not grams:
+            continue
+        other_grams = trigrams(other)
+        shared = len(grams & other_grams)
+        similarity = shared / (len(grams) + len(other_grams) - shared)
+        if similarity >= threshold:
+            scored.append(similarity)
+    scored.sort(reverse=True)
+    exact = [1.0] if key in normalized else []
+    return exact + scored[:limit - len(exact)]
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_prefix_trie_matches_scan(seed):
+    """Поиск по префиксу в FactStore и FactOverlay совпадает с перебором."""
+
+    assert verify_wildcards.verify_trie(seed, operations=300) == []
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+def test_wildcard_inference_matches_direct_evaluation(seed):
+    """Вывод по шаблонным условиям совпадает при всех способах вычисления."""
+
+    params = {"facts": 100, "rules": 300, "wildcard_ratio": 0.2}
+    assert verify_wildcards.verify_inference(params, seed, changes=5) == []
+
+
+@pytest.mark.parametrize("threshold", [-0.5, 0.0, 0.2, 0.5, 0.9])
+def test_fuzzy_search_matches_scan(threshold):
+    """Поиск похожих имен по индексу триграмм совпадает с перебором при любом пороге."""
+
+    rng = random.Random(0)
+    names = list(SyntheticKnowledgeBase(seed=0, facts=200, rules=50).generate()["facts"])
+    names += ["кашель", "насморк сильный", "ЖАР"]
+    index = TrigramIndex(names)
+    for _ in range(50):
+        name = rng.choice(names)
+        name = name[:max(1, len(name) - rng.randint(0, 3))]
+        limit = rng.randint(1, 8)
+        found = [similarity for _, similarity in index.search(name, threshold, limit)]
+        assert found == fuzzy_scan(names, name, threshold, limit), name
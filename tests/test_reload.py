@@ -0,0 +1,12 @@
+import pytest
+
+from benchmarks import verify_reload
+
+
+@pytest.mark.parametrize("infer", [False, True])
+@pytest.mark.parametrize("seed", [0, 1])
+def test_reload_matches_full_load(seed, infer):
+    """Перезагрузка по разнице совпадает с полной загрузкой (без NOT над выводимыми фактами)."""
+
+    params = {"facts": 100, "rules": 300, "not_ratio": 0.0, "cycle_ratio": 0.05 if seed % 2 else 0.0}
+    assert verify_reload.verify(params, seed, versions=4, infer=infer) == []
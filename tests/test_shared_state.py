@@ -0,0 +1,80 @@
+import multiprocessing
+
+import pytest
+
+from app import shared_state
+from app.expert_system import ExpertSystem
+
+pytestmark = pytest.mark.skipif(shared_state.fcntl is None, reason="общее состояние только для POSIX")
+
+
+def add_facts(directory: str, worker: int, count: int):
+    """Добавить факты из отдельного процесса, каждый - отдельным изменением."""
+
+    state = shared_state.SharedKnowledgeBase(directory)
+    engine = ExpertSystem()
+    for number in range(count):
+        state.begin_update(engine)
+        engine.add_fact(f"факт_{worker}_{number}", 0.5)
+        state.end_update(engine)
+
+
+def test_updates_from_two_copies_do_not_conflict(tmp_path):
+    """Изменения двух копий применяются к последней опубликованной версии."""
+
+    first = shared_state.SharedKnowledgeBase(str(tmp_path))
+    second = shared_state.SharedKnowledgeBase(str(tmp_path))
+    first_engine, second_engine = ExpertSystem(), ExpertSystem()
+
+    first.begin_update(first_engine)
+    first_engine.add_fact("а", 0.5)
+    first_engine.add_rule("а", "б", 0.8)
+    assert first.end_update(first_engine)
+
+    second.begin_update(second_engine)
+    second_engine.add_fact("в", 0.7)
+    assert second.end_update(second_engine)
+
+    assert first.sync(first_engine)
+    assert dict(first_engine.facts) == dict(second_engine.facts) == {"а": 0.5, "в": 0.7}
+    assert first_engine.rules_as_dicts() == second_engine.rules_as_dicts()
+    assert not second.sync(second_engine)
+
+
+def test_inference_is_not_published(tmp_path):
+    """Результаты вывода не публикуются: каждая копия выводит их сама."""
+
+    first = shared_state.SharedKnowledgeBase(str(tmp_path))
+    second = shared_state.SharedKnowledgeBase(str(tmp_path))
+    first_engine, second_engine = ExpertSystem(), ExpertSystem()
+
+    first.begin_update(first_engine)
+    first_engine.add_fact("а", 0.5)
+    first_engine.add_rule("а", "б", 0.8)
+    assert first.end_update(first_engine)
+    version = first.shared_version
+
+    first.begin_update(first_engine)
+    first_engine.infer()
+    assert not first.end_update(first_engine)
+    assert first.shared_version == version
+
+    second.sync(second_engine)
+    assert "б" not in second_engine.facts
+
+
+def test_concurrent_processes_lose_no_updates(tmp_path):
+    """Одновременные изменения из нескольких процессов не теряются."""
+
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=add_facts, args=(str(tmp_path), worker, 10)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join(60)
+        assert process.exitcode == 0
+
+    state = shared_state.SharedKnowledgeBase(str(tmp_path))
+    engine = ExpertSystem()
+    assert state.sync(engine)
+    assert set(engine.facts) == {f"факт_{worker}_{number}" for worker in range(4) for number in range(10)}
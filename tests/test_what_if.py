@@ -0,0 +1,12 @@
+import pytest
+
+from benchmarks import verify_what_if
+
+
+@pytest.mark.parametrize("config", sorted(verify_what_if.CONFIGS))
+@pytest.mark.parametrize("seed", [0, 1])
+def test_what_if_matches_full_inference(config, seed):
+    """what_if (в том числе с удалением и понижением фактов) совпадает с выводом заново."""
+
+    params = {"facts": 100, "rules": 300, **verify_what_if.CONFIGS[config]}
+    assert verify_what_if.verify(config, params, seed, cases=15) == []